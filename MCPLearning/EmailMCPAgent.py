@@ -1,36 +1,20 @@
-from agents.mcp import MCPServerStdio
 import asyncio
 import os
-import sys
 from dotenv import load_dotenv
 from typing import Optional
 import json
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
 
 from datetime import datetime
 from agents import Agent, Runner, function_tool
+from mcpResultGuard import ResultGuard
+from emailOutbox import OutgoingEmail, get_outbox
 
+# Loading the .env variables from the .env file
 load_dotenv()
 
 # Get the value
 MONGO_URI = os.getenv("MONGO_URI")
 
-# Pydantic model for the data required to send an email
-class OutgoingEmail(BaseModel):
-    """
-    Represents the information needed to send an email.
-    This structure would be populated by the agent when it intends to use the email sending tool.
-    """
-    to_emails: List[EmailStr]  # List of recipient email addresses. EmailStr provides basic validation.
-    subject: str             # The subject line of the email.
-    plain_text_body: str     # The plain text content of the email.
-    html_body: Optional[str] = None  # Optional HTML content for the email.
-
-
 # Custom tool to get the currernt time
 @function_tool
 async def get_time() -> str:
@@ -42,155 +26,192 @@ async def get_email_address() -> str:
     return "charlie06atkinson@gmail.com"
 
 @function_tool
-def send_email_logic(to_email: str, subject: str, plain_text_content: str, html_content: Optional[str] = None):
+async def send_email_logic(to_email: str, subject: str, plain_text_content: str, html_content: Optional[str] = None) -> str:
     """
-    Sends an email using SendGrid.
+    Queues an email for delivery through SendGrid.
     Args:
         to_email (str): The recipient's email address.
         subject (str): The subject of the email.
         plain_text_content (str): The plain text content of the email.
         html_content (str, optional): The HTML content of the email. Defaults to None.
     Returns:
-        None. Prints JSON output to stdout.
+        JSON with the message id, which can be passed to `get_email_status`.
     """
 
-    # Loading the .env variables from the .env file
-    load_dotenv()
-
-    # Twilio SendGrid API information (required for sending emails)
-    api_key = os.environ.get('SENDGRID_API_KEY')
-    from_email_address = 'juzatkia@gmail.com'  # Replace with your verified SendGrid sender email
-
-    if not api_key:
-        print(json.dumps({
+    # The outbox sends in the background over a pooled client, so this returns straight away
+    outbox = get_outbox()
+    if outbox is None:
+        return json.dumps({
             "status": "error",
             "message": "SENDGRID_API_KEY not found in environment variables."
-        }))
-        sys.exit(1)
-
-    if not from_email_address: # Should be set in the script or from config
-        print(json.dumps({
-            "status": "error",
-            "message": "Sender email address is not configured."
-        }))
-        sys.exit(1)
-
-    message = Mail(
-        from_email=from_email_address,
-        to_emails=to_email,
-        subject=subject,
-        plain_text_content=plain_text_content,
-        html_content=html_content  # Can be the same as plain_text_content if no HTML
-    )
+        })
 
     try:
-        sg = SendGridAPIClient(api_key)
-        response = sg.send(message)
-        if 200 <= response.status_code < 300:
-            print(json.dumps({
-                "status": "success",
-                "message": f"Email sent successfully to {to_email}",
-                "status_code": response.status_code
-            }))
-            sys.exit(0)
-        else:
-            print(json.dumps({
-                "status": "error",
-                "message": "Failed to send email.",
-                "status_code": response.status_code,
-                "details": response.body.decode() if response.body else "No details"
-            }))
-            sys.exit(1)
-    except Exception as e:
-        print(json.dumps({
+        message_id = outbox.enqueue(OutgoingEmail(
+            to_emails=[to_email],
+            subject=subject,
+            plain_text_body=plain_text_content,
+            html_body=html_content,
+        ))
+    except asyncio.QueueFull:
+        return json.dumps({
             "status": "error",
-            "message": f"An exception occurred: {str(e)}"
-        }))
-        sys.exit(1)
+            "message": "The outbox is full, try again shortly."
+        })
+    return json.dumps({
+        "status": "queued",
+        "message": f"Email to {to_email} queued for delivery",
+        "message_id": message_id
+    })
 
-# Loading the .env variables from the .env file
-load_dotenv()
+@function_tool
+async def get_email_status(message_id: str) -> str:
+    """Looks up the delivery status (queued, sending, sent or failed) of an email queued with `send_email_logic`."""
+    outbox = get_outbox()
+    delivery = outbox.status(message_id) if outbox else None
+    if delivery is None:
+        return json.dumps({"status": "error", "message": f"Unknown message id {message_id}"})
+    return delivery.model_dump_json()
 
 # MCP Servers
+# Nothing here is built on import: the servers and the agents using them are created the first time they're asked
+# for, so importing this module for its tools doesn't set up MCP. The old module attributes (mongoDB_server,
+# email_agent, ...) still work through __getattr__ below.
+
+_web_fetch_server = None
+_mongodb_server = None
+_email_agent = None
+_triage_agent = None
+
+# Keeps the listings the agent fetches small (max documents / bytes per page), with a cursor it can page through
+result_guard = ResultGuard(max_documents=10, max_bytes=8_000)
+
 
 # MCP Server for fetching web content
-mcp_web_fetch = MCPServerStdio(
-    params={
-        "command": "uvx",
-        "args": ["mcp-server-fetch"], # This defines what the agent should search the web
-    }
-)
+def get_web_fetch_server():
+    global _web_fetch_server
+    if _web_fetch_server is None:
+        from agents.mcp import MCPServerStdio
+
+        _web_fetch_server = MCPServerStdio(
+            params={
+                "command": "uvx",
+                "args": ["mcp-server-fetch"], # This defines what the agent should search the web
+            }
+        )
+    return _web_fetch_server
+
 
 # MCP Server for MongoDB database operations
-mongoDB_server = MCPServerStdio(
-    name="MongoDB Server",
-    params={
-        "command": "npx",
-        "args": ["-y", "mongodb-mcp-server"],
-        "env": {
-            "MDB_MCP_CONNECTION_STRING": f"{MONGO_URI}"
-        }
-    },
-    cache_tools_list=True,
-)
+def get_mongodb_server():
+    global _mongodb_server
+    if _mongodb_server is None:
+        from agents.mcp import MCPServerStdio
+
+        _mongodb_server = MCPServerStdio(
+            name="MongoDB Server",
+            params={
+                "command": "npx",
+                "args": ["-y", "mongodb-mcp-server"],
+                "env": {
+                    "MDB_MCP_CONNECTION_STRING": f"{MONGO_URI}"
+                }
+            },
+            cache_tools_list=True,
+        )
+        result_guard.watch(_mongodb_server)
+    return _mongodb_server
+
 
 # Agent for sending emails
-email_agent = Agent(
-    name="EmailAssistant",
-    model="gpt-4.1-mini", # Or your preferred model
-    instructions="""
-    You are an intelligent assistant responsible for sending professional, well-formatted emails.
-
-    You must follow these strict rules:
-
-    1. **You must use the `get_email_addresses` tool to determine the recipient.** Do not guess or hardcode email addresses.
-    2. **You must call each tool only once.** Do not repeat tool calls unnecessarily.
-    3. **You must call `send_email_logic` to send the email.** This is your only valid output. Do not print or return email content as text or HTML.
-
-    Use the tools in this sequence:
-    - Call `get_time` once to retrieve relevant contextual information such as product launch dates.
-    - Call `get_email_addresses` once to get the correct recipient's email.
-    - Call 'mongoDB_server' to get the correct listings from AppriseMarketplaceDatabase listings collection.
-    - Once all information is gathered, call `send_email_logic` with the full, polished email content.
-
-    The email must:
-    - Be addressed using the address from `get_email_addresses`.
-    - Contain accurate and relevant information (e.g., product launch date from `get_time`).
-    - Be clear, concise, and visually professional.
-    - Be sent only through the `send_email_logic` tool.
-
-    ✅ Valid: One call to each tool, with final output via `send_email_logic`.
-    ❌ Invalid: Hardcoding recipients, repeating tools, or outputting raw text or HTML.
-
-    You must only complete the task by calling `send_email_logic`. Do not output anything else.
-    """
-    ,
-    tools=[get_time, send_email_logic, get_email_address], # And any other tools
-    mcp_servers=[mongoDB_server],
-    output_type=OutgoingEmail
-)
+def get_email_agent():
+    global _email_agent
+    if _email_agent is None:
+        _email_agent = Agent(
+            name="EmailAssistant",
+            model="gpt-4.1-mini", # Or your preferred model
+            instructions="""
+            You are an intelligent assistant responsible for sending professional, well-formatted emails.
+
+            You must follow these strict rules:
+
+            1. **You must use the `get_email_addresses` tool to determine the recipient.** Do not guess or hardcode email addresses.
+            2. **You must call each tool only once.** Do not repeat tool calls unnecessarily.
+            3. **You must call `send_email_logic` to send the email.** This is your only valid output. Do not print or return email content as text or HTML.
+
+            Use the tools in this sequence:
+            - Call `get_time` once to retrieve relevant contextual information such as product launch dates.
+            - Call `get_email_addresses` once to get the correct recipient's email.
+            - Call 'mongoDB_server' to get the correct listings from AppriseMarketplaceDatabase listings collection.
+            - Once all information is gathered, call `send_email_logic` with the full, polished email content.
+
+            The email must:
+            - Be addressed using the address from `get_email_addresses`.
+            - Contain accurate and relevant information (e.g., product launch date from `get_time`).
+            - Be clear, concise, and visually professional.
+            - Be sent only through the `send_email_logic` tool.
+
+            ✅ Valid: One call to each tool, with final output via `send_email_logic`.
+            ❌ Invalid: Hardcoding recipients, repeating tools, or outputting raw text or HTML.
+
+            You must only complete the task by calling `send_email_logic`. Do not output anything else.
+            """
+            ,
+            tools=[get_time, send_email_logic, get_email_status, get_email_address, result_guard.page_tool], # And any other tools
+            mcp_servers=[get_mongodb_server()],
+            output_type=OutgoingEmail
+        )
+    return _email_agent
+
 
 # Agent for handling inital enquiries. Agent can pass onto specalised agents based on the enquiry.
-triage_agent = Agent(
-    name = "Internal Business Agent",
-    instructions="""You are the internal business agent, desinged to assist employees carryout their work.
+def get_triage_agent():
+    global _triage_agent
+    if _triage_agent is None:
+        _triage_agent = Agent(
+            name = "Internal Business Agent",
+            instructions="""You are the internal business agent, desinged to assist employees carryout their work.
     
-    If the employee requests help about emails, you can hand off to the EmailAssistant.
+            If the employee requests help about emails, you can hand off to the EmailAssistant.
     
-    For general inquiries or questions about products, you can answer directly.
+            For general inquiries or questions about products, you can answer directly.
     
-    Always be polite and helpful, and ensure a smooth transition when handing off to specialists.
-    """,
-    mcp_servers=[ mongoDB_server ],
-    handoffs=[email_agent]
-)
+            Always be polite and helpful, and ensure a smooth transition when handing off to specialists.
+            """,
+            tools=[result_guard.page_tool], # Its Mongo results are paged by result_guard too
+            mcp_servers=[ get_mongodb_server() ],
+            handoffs=[get_email_agent()]
+        )
+    return _triage_agent
+
+
+_LAZY_ATTRIBUTES = {
+    "mcp_web_fetch": get_web_fetch_server,
+    "mongoDB_server": get_mongodb_server,
+    "email_agent": get_email_agent,
+    "triage_agent": get_triage_agent,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Starting MCP dynamic discovery on runtime ??? I think. Need to figure out how to add multiple MCP servers
-async def handle_request(request):
-    async with mongoDB_server:
-        result = await Runner.run(triage_agent, request)
+# Pass a session (any SDK Session, eg conversationSessions.SessionStore(...).session(id)) to remember earlier turns,
+# and a run_config with eg modelCascade.CascadeModelProvider to pick the model per turn instead of gpt-4.1-mini
+async def handle_request(request, session=None, run_config=None):
+    async with get_mongodb_server():
+        result = await Runner.run(get_triage_agent(), request, session=session, run_config=run_config)
         print(result.final_output)
 
+    # Let the outbox finish delivering anything the agent queued before the process exits
+    outbox = get_outbox()
+    if outbox:
+        await outbox.close()
+
 
 # Stating the runtime when the file is run
 # asycio ensures that the application will run asynchronously
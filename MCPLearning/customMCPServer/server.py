@@ -1,14 +1,17 @@
 from mcp.server.fastmcp import FastMCP
-import requests
+import httpx
 
 # defines the MCP sever
 mcp = FastMCP("Weather Server")
 
+# FastMCP calls plain `def` tools on its event loop, so a blocking requests.get stalled every other tool call
+# while wttr.in answered. httpx's async client (already installed with mcp) waits without blocking
+weather_client = httpx.AsyncClient(base_url="https://wttr.in", timeout=10)
+
 @mcp.tool()
-def get_weather(city: str) -> str:
+async def get_weather(city: str) -> str:
     """Fetches the current weather for the specified city."""
-    endpoint = "https://wttr.in"
-    response = requests.get(f"{endpoint}/{city}")
+    response = await weather_client.get(f"/{city}")
     return response.text
 
 @mcp.tool()
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Optional
+
+from agents import Agent, Runner
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from pymongo import MongoClient
+
+from emailOutbox import EmailOutbox, OutgoingEmail, get_outbox
+
+load_dotenv()
+
+# Get the value
+MONGO_URI = os.getenv("MONGO_URI")
+
+# email_agent produces exactly one OutgoingEmail per run, which means one full LLM generation per recipient.
+# Campaign mode flips that around:
+# 1. the LLM writes ONE shared template (with {first_name} / {snippet} placeholders)
+# 2. recipients are streamed from a Mongo cursor in batches, and their fields are filled in locally
+# 3. the LLM is only called again for the optional one-line personalised snippet (with bounded concurrency)
+# 4. each email goes into the outbox as soon as it's ready, so nothing waits for the whole list
+
+
+class CampaignTemplate(BaseModel):
+    subject: str
+    plain_text_body: str  # May use {first_name} and {snippet}
+    html_body: Optional[str] = None  # May use {first_name} and {snippet}
+
+
+template_agent = Agent(
+    name="Campaign Writer",
+    model="gpt-4.1-mini",
+    instructions="""You write marketing email templates for Apprise Marketplace.
+
+    Write ONE email that will be sent to every recipient of the campaign.
+    - Use the placeholder {first_name} wherever the recipient's name should appear.
+    - Put the placeholder {snippet} on its own line where a short personalised sentence can go
+      (it may be replaced with an empty string).
+    - Do not use any other curly braces in the email.
+    """,
+    output_type=CampaignTemplate,
+)
+
+snippet_agent = Agent(
+    name="Snippet Writer",
+    model="gpt-4.1-nano",
+    instructions="""Write ONE short, friendly sentence (under 25 words) personalising a marketing email for the
+    recipient described. Return only the sentence.""",
+)
+
+
+PLACEHOLDERS = ("first_name", "snippet")
+
+
+def fill(template: str, **fields) -> str:
+    # Only our two placeholders are replaced: any other braces (CSS in the html body, a stray "{") stay as they are
+    for name in PLACEHOLDERS:
+        template = template.replace("{" + name + "}", fields.get(name, ""))
+    return template
+
+
+def first_name(user: dict) -> str:
+    name = user.get("firstName") or user.get("name") or ""
+    return name.split()[0] if name.strip() else "there"
+
+
+async def stream_recipients(query: Optional[dict] = None, batch_size: int = 500,
+                            mongo_uri: Optional[str] = MONGO_URI) -> AsyncIterator[dict]:
+    """Yield users one at a time from a Mongo cursor, fetching a batch at a time off the event loop."""
+    client = MongoClient(mongo_uri)
+    cursor = client["AppriseMarketplaceDatabase"]["users"].find(
+        query or {"email": {"$exists": True}},
+        {"email": 1, "name": 1, "firstName": 1, "interests": 1},
+    ).batch_size(batch_size)
+
+    def next_batch():
+        return [user for _, user in zip(range(batch_size), cursor)]
+
+    try:
+        while True:
+            batch = await asyncio.to_thread(next_batch)
+            if not batch:
+                return
+            for user in batch:
+                yield user
+    finally:
+        cursor.close()
+        client.close()
+
+
+class CampaignStats:
+    def __init__(self):
+        self.emails = 0
+        self.llm_calls = 0
+        self.failed_snippets = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"Queued {self.emails} emails in {elapsed:.1f}s "
+              f"({self.emails / elapsed if elapsed else 0:.1f} emails/s), "
+              f"{self.llm_calls} LLM calls ({self.llm_calls / max(self.emails, 1):.3f} per email), "
+              f"{self.failed_snippets} snippets fell back to empty, {self.skipped} invalid addresses skipped")
+
+
+async def run_campaign(brief: str, recipients: AsyncIterator[dict], outbox: EmailOutbox,
+                       personalise: bool = False, concurrency: int = 8) -> CampaignStats:
+    stats = CampaignStats()
+
+    result = await Runner.run(template_agent, brief)
+    template: CampaignTemplate = result.final_output
+    stats.llm_calls += 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def send(user: dict):
+        try:
+            snippet = ""
+            if personalise:
+                try:
+                    snippet_result = await Runner.run(
+                        snippet_agent,
+                        f"Campaign: {template.subject}\nRecipient: {first_name(user)}, "
+                        f"interests: {user.get('interests') or 'unknown'}",
+                    )
+                    snippet = snippet_result.final_output.strip()
+                except Exception:
+                    stats.failed_snippets += 1
+                finally:
+                    stats.llm_calls += 1
+
+            fields = {"first_name": first_name(user), "snippet": snippet}
+            subject = fill(template.subject, **fields)
+            plain_text_body = fill(template.plain_text_body, **fields)
+            html_body = fill(template.html_body, **fields) if template.html_body else None
+            try:
+                email = OutgoingEmail(to_emails=[user.get("email")], subject=subject,
+                                      plain_text_body=plain_text_body, html_body=html_body)
+            except ValueError:
+                # Invalid email address in the database -> skip it rather than stopping the campaign
+                stats.skipped += 1
+                return
+            # Waits while the outbox is full, so a slow SendGrid slows the cursor down instead of filling memory
+            await outbox.send(email)
+            stats.emails += 1
+        finally:
+            semaphore.release()
+
+    async for user in recipients:
+        # Acquiring before creating the task keeps at most `concurrency` recipients being prepared at once, and
+        # outbox.send() blocks while the outbox already holds max_queued emails
+        await semaphore.acquire()
+        task = asyncio.create_task(send(user))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    await asyncio.gather(*pending)
+    return stats
+
+
+async def main():
+    outbox = get_outbox()
+    if outbox is None:
+        print("SENDGRID_API_KEY not found in environment variables.")
+        return
+
+    stats = await run_campaign(
+        """Write the launch email for our new product, which uses the Model Context Protocol (MCP) to fetch
+        listings information straight from our database.""",
+        stream_recipients(),
+        outbox,
+        personalise=os.getenv("PERSONALISE") == "1",
+    )
+    stats.report()
+    await outbox.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
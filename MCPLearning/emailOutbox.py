@@ -0,0 +1,250 @@
+import asyncio
+import os
+import random
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel, EmailStr
+
+# send_email_logic used to build a new SendGridAPIClient for every email, send it inline (blocking the event loop)
+# and then sys.exit() -> killing the whole agent. The outbox replaces that:
+# - the tool just enqueues an OutgoingEmail and returns a message id straight away
+# - background workers deliver over one pooled httpx.AsyncClient (keep-alive connections are reused)
+# - emails with the same content are batched into one SendGrid request (one personalization per email)
+# - 429 / 5xx / network errors are retried with exponential backoff (or after Retry-After), and sends are rate limited
+# - if a batched request is rejected outright (eg, one bad address), its emails are retried one by one
+# - the delivery status of each message id can be looked up at any time
+
+SENDGRID_BASE_URL = "https://api.sendgrid.com"
+
+# SendGrid accepts up to 1000 personalizations in one /v3/mail/send request
+MAX_PERSONALIZATIONS = 1000
+
+
+# Pydantic model for the data required to send an email
+class OutgoingEmail(BaseModel):
+    """
+    Represents the information needed to send an email.
+    This structure would be populated by the agent when it intends to use the email sending tool.
+    """
+    to_emails: List[EmailStr]  # List of recipient email addresses. EmailStr provides basic validation.
+    subject: str             # The subject line of the email.
+    plain_text_body: str     # The plain text content of the email.
+    html_body: Optional[str] = None  # Optional HTML content for the email.
+
+
+class DeliveryStatus(BaseModel):
+    message_id: str
+    status: str = "queued"  # queued -> sending -> sent / failed
+    attempts: int = 0
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    queued_at: float
+    sent_at: Optional[float] = None
+
+
+def retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """Seconds to wait before the next attempt: the Retry-After header (seconds or an HTTP date), or backoff."""
+    backoff = min(30.0, 0.5 * 2 ** (attempt - 1))
+    if not retry_after:
+        return backoff
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return backoff  # Neither, ignore it
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` requests per second, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class EmailOutbox:
+    def __init__(self, api_key: str, from_email: str, base_url: str = SENDGRID_BASE_URL, workers: int = 4,
+                 batch_size: int = 100, batch_wait: float = 0.05, max_retries: int = 5,
+                 requests_per_second: float = 10, max_connections: int = 10, max_queued: int = 10_000):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.base_url = base_url
+        self.workers = workers
+        self.batch_size = min(batch_size, MAX_PERSONALIZATIONS)
+        self.batch_wait = batch_wait  # How long a worker waits for more emails to fill a batch
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.max_queued = max_queued  # Emails waiting for a worker; send() waits and enqueue() raises beyond this
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.statuses: Dict[str, DeliveryStatus] = {}
+        self.requests_sent = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        # Started lazily on the first enqueue, so the outbox always lives on the agent's running event loop
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def enqueue(self, email: OutgoingEmail) -> str:
+        """Queue without waiting (for the agent's tool). Raises asyncio.QueueFull if the outbox is full."""
+        self.start()
+        message_id = uuid.uuid4().hex
+        self._queue.put_nowait((message_id, email))
+        self.statuses[message_id] = DeliveryStatus(message_id=message_id, queued_at=time.time())
+        return message_id
+
+    async def send(self, email: OutgoingEmail) -> str:
+        """Queue, waiting for room if the outbox is full (for bulk senders like emailCampaign)."""
+        self.start()
+        message_id = uuid.uuid4().hex
+        self.statuses[message_id] = DeliveryStatus(message_id=message_id, queued_at=time.time())
+        await self._queue.put((message_id, email))
+        return message_id
+
+    def status(self, message_id: str) -> Optional[DeliveryStatus]:
+        return self.statuses.get(message_id)
+
+    async def close(self):
+        """Wait for everything queued to be delivered (or to fail), then stop the workers."""
+        if not self._tasks:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.aclose()
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give other emails a moment to arrive so they can share one request
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                # Emails with identical content go out as one request with a personalization each
+                groups: Dict[tuple, list] = {}
+                for message_id, email in batch:
+                    groups.setdefault((email.subject, email.plain_text_body, email.html_body), []).append(
+                        (message_id, email))
+                await asyncio.gather(*(self._deliver(group) for group in groups.values()), return_exceptions=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _payload(self, group: list) -> dict:
+        email = group[0][1]
+        content = [{"type": "text/plain", "value": email.plain_text_body}]
+        if email.html_body:
+            content.append({"type": "text/html", "value": email.html_body})
+        return {
+            "personalizations": [
+                {"to": [{"email": address} for address in message.to_emails]} for _, message in group
+            ],
+            "from": {"email": self.from_email},
+            "subject": email.subject,
+            "content": content,
+        }
+
+    async def _deliver(self, group: list):
+        payload = self._payload(group)
+        for message_id, _ in group:
+            self.statuses[message_id].status = "sending"
+
+        status_code, error = None, None
+        for attempt in range(1, self.max_retries + 1):
+            for message_id, _ in group:
+                self.statuses[message_id].attempts = attempt
+
+            await self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = await self._client.post("/v3/mail/send", json=payload)
+                self.requests_sent += 1
+                status_code = response.status_code
+                if 200 <= status_code < 300:
+                    self._mark(group, "sent", status_code)
+                    return
+                error = response.text or f"HTTP {status_code}"
+                # 4xx other than 429 won't get better by retrying (bad address, bad API key...)
+                if status_code != 429 and status_code < 500:
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                delay = retry_delay(retry_after, attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 4))
+
+        if len(group) > 1 and status_code is not None and 400 <= status_code < 500 and status_code != 429:
+            # SendGrid rejects the whole request for one bad personalization, don't fail the others with it
+            await asyncio.gather(*(self._deliver([message]) for message in group))
+            return
+        self._mark(group, "failed", status_code, error)
+
+    def _mark(self, group: list, status: str, status_code: Optional[int], error: Optional[str] = None):
+        for message_id, _ in group:
+            delivery = self.statuses[message_id]
+            delivery.status = status
+            delivery.status_code = status_code
+            delivery.error = error
+            if status == "sent":
+                delivery.sent_at = time.time()
+
+
+# One outbox per process, created on first use (reads SENDGRID_API_KEY / SENDGRID_BASE_URL from the env)
+_outbox: Optional[EmailOutbox] = None
+
+
+def get_outbox() -> Optional[EmailOutbox]:
+    global _outbox
+    if _outbox is None:
+        api_key = os.environ.get("SENDGRID_API_KEY")
+        if not api_key:
+            return None
+        _outbox = EmailOutbox(
+            api_key=api_key,
+            from_email=os.environ.get("SENDGRID_FROM_EMAIL", "juzatkia@gmail.com"),  # Verified SendGrid sender
+            base_url=os.environ.get("SENDGRID_BASE_URL", SENDGRID_BASE_URL),
+        )
+    return _outbox
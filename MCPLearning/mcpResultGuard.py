@@ -0,0 +1,245 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from agents import function_tool
+from agents.mcp import MCPServer
+from mcp.types import TextContent
+
+# When email_agent (or the MongoDB client agent) asks for "the listings", the MongoDB MCP server happily returns
+# every field of every document in the collection, and all of that ends up in the prompt.
+# ResultGuard sits between MCPServerStdio.call_tool and the agent and shapes the result before the model sees it:
+# - projections: only the fields listed for a collection are kept (and asked for up front where possible)
+# - a maximum number of documents and bytes per page
+# - a cursor token the agent can pass to the `next_result_page` tool to get the rest (cursors the agent never
+#   comes back for expire after cursor_ttl seconds, and at most max_cursors are kept, oldest dropped first)
+# - documents are decoded one at a time from the tool output, so the rest of the result is never parsed
+#   into Python objects until the agent actually pages to it
+
+# Rough token estimate (about 4 characters per token for English / JSON)
+CHARS_PER_TOKEN = 4
+
+# Tools whose output is a list of documents
+DOCUMENT_TOOLS = {"find", "aggregate"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _iter_json_documents(text: str) -> Iterator[dict]:
+    """Yield documents from a JSON array (or a single JSON object) inside text, one at a time."""
+    decoder = json.JSONDecoder()
+    start = min((i for i in (text.find("["), text.find("{")) if i != -1), default=-1)
+    if start == -1:
+        return
+
+    if text[start] == "{":
+        try:
+            document, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            return
+        yield document
+        return
+
+    position = start + 1
+    while True:
+        # Skip whitespace and commas between array elements
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text) or text[position] == "]":
+            return
+        try:
+            document, position = decoder.raw_decode(text, position)
+        except ValueError:
+            return
+        yield document
+
+
+def _project(document: dict, fields: List[str]) -> dict:
+    """Keep only the given fields (dot paths like "location.city" are supported)."""
+    projected = {}
+    for field in fields:
+        value, found = document, True
+        for part in field.split("."):
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                found = False
+                break
+        if not found:
+            continue
+        target = projected
+        parts = field.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return projected
+
+
+def _trim(value, max_field_bytes: int):
+    """Without a projection, at least cut down long strings (descriptions, base64 images...)."""
+    if isinstance(value, dict):
+        return {key: _trim(inner, max_field_bytes) for key, inner in value.items()}
+    if isinstance(value, list):
+        return [_trim(item, max_field_bytes) for item in value]
+    if isinstance(value, str) and len(value) > max_field_bytes:
+        return value[:max_field_bytes] + "...[truncated]"
+    return value
+
+
+class _Cursor:
+    def __init__(self, documents: Iterator[dict], fields: Optional[List[str]]):
+        self.documents = documents
+        self.fields = fields
+        self.returned = 0
+        self.expires = 0.0
+
+
+class ResultGuard:
+    """
+    Shapes MongoDB MCP tool results: projections, document / byte limits and cursor-token paging.
+    """
+
+    def __init__(self, projections: Optional[Dict[str, List[str]]] = None, max_documents: int = 10,
+                 max_bytes: int = 8_000, max_limit: int = 500, max_field_bytes: int = 500, max_cursors: int = 100,
+                 cursor_ttl: float = 600):
+        self.projections = projections or {}
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        # Hard cap on the `limit` sent to the server, so one call can never dump a whole collection
+        self.max_limit = max_limit
+        self.max_field_bytes = max_field_bytes
+        # Each cursor holds the rest of a tool result in memory, so they can't be kept forever
+        self.cursors: "OrderedDict[str, _Cursor]" = OrderedDict()
+        self.max_cursors = max_cursors
+        self.cursor_ttl = cursor_ttl
+        self.calls = 0
+        self.tokens_saved = 0
+
+        guard = self
+
+        @function_tool
+        def next_result_page(cursor: str) -> str:
+            """Get the next page of documents from a previous database query, using the cursor token it returned."""
+            return guard.next_page(cursor)
+
+        self.page_tool = next_result_page
+
+    def watch(self, server: MCPServer) -> MCPServer:
+        """Wrap the server's call_tool so document results are shaped before they reach the agent."""
+        original_call_tool = server.call_tool
+
+        async def call_tool(tool_name, arguments, *args, **kwargs):
+            if tool_name not in DOCUMENT_TOOLS or not arguments:
+                return await original_call_tool(tool_name, arguments, *args, **kwargs)
+
+            arguments = self._shape_arguments(tool_name, dict(arguments))
+            result = await original_call_tool(tool_name, arguments, *args, **kwargs)
+            if getattr(result, "isError", False):
+                return result
+            return self._shape_result(arguments.get("collection"), result)
+
+        server.call_tool = call_tool
+        return server
+
+    def _shape_arguments(self, tool_name: str, arguments: dict) -> dict:
+        # Ask the server for less in the first place: projection + a bounded limit
+        fields = self.projections.get(arguments.get("collection"))
+        if tool_name == "find":
+            if fields and not arguments.get("projection"):
+                arguments["projection"] = {field: 1 for field in fields}
+            arguments["limit"] = min(int(arguments.get("limit") or self.max_limit), self.max_limit)
+        else:
+            pipeline = list(arguments.get("pipeline") or [])
+            if pipeline and any(stage in pipeline[-1] for stage in ("$out", "$merge")):
+                return arguments  # Writes its results to a collection, and $out / $merge have to be the last stage
+            if not any("$limit" in stage for stage in pipeline):
+                pipeline.append({"$limit": self.max_limit})
+            if fields and not any("$project" in stage or "$group" in stage for stage in pipeline):
+                pipeline.append({"$project": {field: 1 for field in fields}})
+            arguments["pipeline"] = pipeline
+        return arguments
+
+    def _shape_result(self, collection: Optional[str], result):
+        original_text = "".join(item.text for item in result.content if item.type == "text")
+
+        # Text items without documents (eg, "Found 250 documents in the collection") are passed through as-is
+        notes, document_texts = [], []
+        for item in result.content:
+            if item.type != "text":
+                notes.append(item)
+            elif "{" in item.text:
+                document_texts.append(item.text)
+            else:
+                notes.append(item)
+
+        if not document_texts:
+            return result
+
+        # Chain the documents from every text item lazily -> nothing past the first page is decoded yet
+        documents = (document for text in document_texts for document in _iter_json_documents(text))
+        cursor = _Cursor(documents, self.projections.get(collection))
+        page = self._page(cursor)
+        shaped = result.model_copy(update={"content": notes + [TextContent(type="text", text=page)]})
+
+        saved = estimate_tokens(original_text) - estimate_tokens(page)
+        self.calls += 1
+        self.tokens_saved += max(saved, 0)
+        print(f"[ResultGuard] {collection}: {estimate_tokens(original_text)} -> {estimate_tokens(page)} tokens "
+              f"({saved} saved, {self.tokens_saved} saved over {self.calls} calls)")
+        return shaped
+
+    def _page(self, cursor: _Cursor) -> str:
+        page, size = [], 0
+        for document in cursor.documents:
+            if cursor.fields:
+                document = _project(document, cursor.fields)
+            else:
+                document = _trim(document, self.max_field_bytes)
+            encoded = json.dumps(document, default=str)
+            # Always return at least one document, even if it's bigger than max_bytes on its own
+            if page and (len(page) >= self.max_documents or size + len(encoded) > self.max_bytes):
+                cursor.documents = _prepend(document, cursor.documents)
+                break
+            page.append(encoded)
+            size += len(encoded)
+        else:
+            cursor = None
+
+        if cursor is None:
+            return json.dumps({"documents": [json.loads(d) for d in page], "cursor": None})
+
+        cursor.returned += len(page)
+        cursor.expires = time.monotonic() + self.cursor_ttl
+        token = uuid.uuid4().hex[:12]
+        self.cursors[token] = cursor
+        self._evict()
+        return json.dumps({
+            "documents": [json.loads(d) for d in page],
+            "cursor": token,
+            "note": f"More documents are available. Call next_result_page with cursor '{token}' if you need them.",
+        })
+
+    def next_page(self, token: str) -> str:
+        self._evict()
+        cursor = self.cursors.pop(token, None)
+        if cursor is None:
+            return json.dumps({"error": f"Unknown, expired or exhausted cursor '{token}', run the query again"})
+        return self._page(cursor)
+
+    def _evict(self):
+        # Cursors are in creation order, so the expired ones are at the front
+        now = time.monotonic()
+        while self.cursors:
+            oldest = next(iter(self.cursors.values()))
+            if len(self.cursors) <= self.max_cursors and oldest.expires > now:
+                break
+            self.cursors.popitem(last=False)
+
+
+def _prepend(document: dict, documents: Iterator[dict]) -> Iterator[dict]:
+    yield document
+    yield from documents
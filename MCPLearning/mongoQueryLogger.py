@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from agents.mcp import MCPServer, MCPServerStdio
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+# Get the value
+MONGO_URI = os.getenv("MONGO_URI")
+
+# The MongoDB MCP server lets the agent write its own filters (eg, {"email": "juzatkia@gmail.com"} on users,
+# or {"userId": ...} on bookings). This module sits between the agent and the MCP server and records the
+# *shape* of each find / aggregate call, so I can see which queries are slow and which ones need an index.
+
+# Only these MCP tools carry a query that can be explained / indexed
+WATCHED_TOOLS = {"find", "aggregate"}
+
+# Operators that make a field a range predicate (they go last in a compound index -> Equality, Sort, Range)
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists"}
+
+
+def query_shape(value):
+    """Strip the literals out of a filter / pipeline, keeping only field names and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(inner) for key, inner in sorted(value.items())}
+    if isinstance(value, list):
+        # {"$in": [1, 2, 3]} and {"$in": [4]} are the same shape
+        if value and all(not isinstance(item, (dict, list)) for item in value):
+            return ["?"]
+        return [query_shape(item) for item in value]
+    return "?"
+
+
+def _shape_key(shape) -> str:
+    return json.dumps(shape, sort_keys=True, separators=(",", ":"))
+
+
+def _split_predicates(query_filter: dict):
+    """Split a filter into equality fields and range fields (ignoring $and / $or nesting beyond one level)."""
+    equality, ranges = [], []
+    for field, condition in (query_filter or {}).items():
+        if field in ("$and", "$or"):
+            for clause in condition:
+                inner_equality, inner_ranges = _split_predicates(clause)
+                equality += inner_equality
+                ranges += inner_ranges
+            continue
+        if field.startswith("$"):
+            continue
+        if isinstance(condition, dict) and any(op in RANGE_OPERATORS for op in condition):
+            ranges.append(field)
+        else:
+            equality.append(field)
+    return equality, ranges
+
+
+def recommend_index(operation: str, arguments: dict) -> Optional[list]:
+    """Build an ESR (equality, sort, range) compound index for a single query, or None if it isn't worth one."""
+    if operation == "find":
+        query_filter = arguments.get("filter") or {}
+        sort = arguments.get("sort") or {}
+    else:
+        # Only the leading $match / $sort stages of a pipeline can use an index
+        query_filter, sort = {}, {}
+        for stage in arguments.get("pipeline") or []:
+            if "$match" in stage and not query_filter and not sort:
+                query_filter = stage["$match"]
+            elif "$sort" in stage and not sort:
+                sort = stage["$sort"]
+            else:
+                break
+
+    equality, ranges = _split_predicates(query_filter)
+    keys = [(field, 1) for field in equality]
+    keys += [(field, direction) for field, direction in sort.items()]
+    keys += [(field, 1) for field in ranges]
+
+    # De-duplicate while keeping the ESR order
+    seen, index = set(), []
+    for field, direction in keys:
+        if field not in seen:
+            seen.add(field)
+            index.append((field, direction))
+
+    if not index or index == [("_id", 1)]:
+        return None
+    return index
+
+
+def _find_stages(plan, stages=None):
+    """Walk an explain() plan tree and collect every stage name (COLLSCAN, IXSCAN, FETCH...)."""
+    stages = [] if stages is None else stages
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            _find_stages(value, stages)
+    elif isinstance(plan, list):
+        for item in plan:
+            _find_stages(item, stages)
+    return stages
+
+
+def summarise_explain(explain: dict) -> dict:
+    planner = explain.get("queryPlanner") or {}
+    stats = explain.get("executionStats") or {}
+    stages = _find_stages(planner.get("winningPlan") or explain.get("stages") or {})
+    return {
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class QueryShapeStats:
+    def __init__(self, database, collection, operation, shape, index):
+        self.database = database
+        self.collection = collection
+        self.operation = operation
+        self.shape = shape
+        self.index = index
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.collscans = 0
+        self.last_explain = None
+
+
+class QueryShapeLogger:
+    """
+    Records the shape, latency and explain() summary of every find / aggregate call the agent makes
+    through the MongoDB MCP server, then recommends (and optionally creates) compound indexes.
+    """
+
+    def __init__(self, mongo_uri: Optional[str] = MONGO_URI, explain: bool = True, create_indexes: bool = False):
+        self.explain = explain and bool(mongo_uri)
+        self.create_indexes = create_indexes
+        self.mongo_uri = mongo_uri
+        self.stats = {}
+        self._client = None
+        self._pending = set()
+
+    def _mongo(self) -> MongoClient:
+        # Only opened when explain() or index creation is actually needed
+        if self._client is None:
+            self._client = MongoClient(self.mongo_uri)
+        return self._client
+
+    def watch(self, server: MCPServer) -> MCPServer:
+        """Wrap the server's call_tool so every tool call the agent makes passes through the logger."""
+        original_call_tool = server.call_tool
+
+        async def call_tool(tool_name, arguments, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original_call_tool(tool_name, arguments, *args, **kwargs)
+            finally:
+                if tool_name in WATCHED_TOOLS and arguments:
+                    self.record(tool_name, arguments, (time.perf_counter() - start) * 1000)
+
+        server.call_tool = call_tool
+        return server
+
+    def record(self, operation: str, arguments: dict, elapsed_ms: float):
+        database = arguments.get("database")
+        collection = arguments.get("collection")
+        if operation == "find":
+            shape = {"filter": query_shape(arguments.get("filter") or {}),
+                     "sort": query_shape(arguments.get("sort") or {})}
+        else:
+            shape = {"pipeline": query_shape(arguments.get("pipeline") or [])}
+
+        key = (database, collection, operation, _shape_key(shape))
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = QueryShapeStats(database, collection, operation, shape, recommend_index(operation, arguments))
+            self.stats[key] = entry
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+
+        # explain() is run in the background with pymongo so it never delays the agent's tool call
+        if self.explain and entry.last_explain is None:
+            entry.last_explain = {"pending": True}
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._explain, entry, operation, arguments))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _explain(self, entry: QueryShapeStats, operation: str, arguments: dict):
+        db = self._mongo()[entry.database]
+        try:
+            if operation == "find":
+                cursor = db[entry.collection].find(arguments.get("filter") or {}, arguments.get("projection"))
+                if arguments.get("sort"):
+                    cursor = cursor.sort(list(arguments["sort"].items()))
+                if arguments.get("limit"):
+                    cursor = cursor.limit(int(arguments["limit"]))
+                explain = cursor.explain()
+            else:
+                explain = db.command("explain", {"aggregate": entry.collection,
+                                                 "pipeline": arguments.get("pipeline") or [],
+                                                 "cursor": {}}, verbosity="executionStats")
+        except Exception as e:
+            entry.last_explain = {"error": str(e)}
+            return
+
+        entry.last_explain = summarise_explain(explain)
+        if entry.last_explain["collscan"]:
+            entry.collscans += 1
+
+    async def flush(self):
+        """Wait for any explain() calls that are still running in the background."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def recommendations(self) -> list:
+        """Recommended indexes, most expensive shapes first (total time across every call with that shape)."""
+        by_index = {}
+        for entry in sorted(self.stats.values(), key=lambda e: e.total_ms, reverse=True):
+            if not entry.index:
+                continue
+            key = (entry.database, entry.collection, tuple(entry.index))
+            recommendation = by_index.setdefault(key, {
+                "database": entry.database,
+                "collection": entry.collection,
+                "index": entry.index,
+                "calls": 0,
+                "total_ms": 0.0,
+                "collscan": False,
+            })
+            recommendation["calls"] += entry.count
+            recommendation["total_ms"] += entry.total_ms
+            recommendation["collscan"] |= bool(entry.collscans)
+
+        # An index that is a prefix of a bigger recommendation on the same collection is redundant
+        recommendations = list(by_index.values())
+        return [
+            r for r in recommendations
+            if not any(other is not r
+                       and (other["database"], other["collection"]) == (r["database"], r["collection"])
+                       and len(other["index"]) > len(r["index"])
+                       and other["index"][:len(r["index"])] == r["index"]
+                       for other in recommendations)
+        ]
+
+    def apply_recommendations(self) -> list:
+        """Create the recommended indexes (only when the logger was built with create_indexes=True)."""
+        if not self.create_indexes:
+            return []
+        created = []
+        for recommendation in self.recommendations():
+            collection = self._mongo()[recommendation["database"]][recommendation["collection"]]
+            existing = [list(info["key"]) for info in collection.index_information().values()]
+            wanted = [tuple(key) for key in recommendation["index"]]
+            if any([tuple(key) for key in index[:len(wanted)]] == wanted for index in existing):
+                continue
+            created.append(collection.create_index(recommendation["index"]))
+        return created
+
+    def report(self):
+        print("=== Query shapes (by total time) ===")
+        for entry in sorted(self.stats.values(), key=lambda e: e.total_ms, reverse=True):
+            explain = entry.last_explain or {}
+            print(f"{entry.database}.{entry.collection} {entry.operation} x{entry.count} "
+                  f"total={entry.total_ms:.1f}ms max={entry.max_ms:.1f}ms "
+                  f"stages={explain.get('stages')} docs_examined={explain.get('docs_examined')}")
+            print(f"   shape: {_shape_key(entry.shape)}")
+
+        print("\n=== Recommended indexes ===")
+        for recommendation in self.recommendations():
+            flag = " (currently a COLLSCAN)" if recommendation["collscan"] else ""
+            print(f"{recommendation['database']}.{recommendation['collection']}: {recommendation['index']} "
+                  f"-> {recommendation['calls']} calls, {recommendation['total_ms']:.1f}ms{flag}")
+
+
+# Same lookup as MongoDBMCPClient.py, but with the logger watching every query the agent builds
+async def main():
+    from agents import Agent, Runner
+
+    logger = QueryShapeLogger(create_indexes=os.getenv("CREATE_INDEXES") == "1")
+
+    async with MCPServerStdio(
+        name="MongoDB Server",
+        params={
+            "command": "npx",
+            "args": ["-y", "mongodb-mcp-server"],
+            "env": {
+                "MDB_MCP_CONNECTION_STRING": f"{MONGO_URI}"
+            }
+        },
+        cache_tools_list=True,
+    ) as server:
+        logger.watch(server)
+        agent = Agent(
+            name="Assistant",
+            instructions="""You are a helpful assistant and would use tools to help the user""",
+            mcp_servers=[server],
+        )
+        response = await Runner.run(agent, """In the AppriseMarketplaceDatabase users collection, find the user with
+        the email 'juzatkia@gmail.com' and then use that information to find the bookings made under that account.""")
+        print(response.final_output)
+
+    await logger.flush()
+    logger.report()
+    for name in logger.apply_recommendations():
+        print(f"Created index {name}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
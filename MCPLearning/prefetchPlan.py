@@ -0,0 +1,143 @@
+import asyncio
+import dataclasses
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agents import Agent, FunctionTool, Runner
+from agents.mcp import MCPServer
+from agents.tool_context import ToolContext
+
+# email_agent's instructions force a fixed order: get_time -> get_email_address -> Mongo listings -> send_email_logic.
+# The first three don't depend on each other (or on anything the model decides), but the model still spends one
+# round trip per step to call them.
+# A PrefetchPlan declares those independent data-gathering calls up front. They run concurrently with
+# asyncio.gather *before* the first model call, their results are injected into the agent's instructions,
+# and the agent is cloned without those tools so the model goes straight to the step that actually needs it.
+
+
+class PrefetchStep:
+    def __init__(self, name: str, call: Callable[[], Awaitable[Any]], tool_name: Optional[str] = None):
+        self.name = name  # Label used in the injected context
+        self.call = call  # Async callable with no arguments
+        self.tool_name = tool_name  # Tool this step replaces (removed from the prefetched agent)
+
+
+def function_tool_step(tool: FunctionTool, arguments: Optional[dict] = None, name: Optional[str] = None) -> PrefetchStep:
+    """Prefetch a @function_tool by invoking it directly, the same way the Runner would."""
+    input_json = json.dumps(arguments or {})
+
+    async def call():
+        context = ToolContext(context=None, tool_name=tool.name, tool_call_id=f"prefetch-{tool.name}",
+                              tool_arguments=input_json)
+        return await tool.on_invoke_tool(context, input_json)
+
+    return PrefetchStep(name or tool.name, call, tool_name=tool.name)
+
+
+def mcp_tool_step(server: MCPServer, tool_name: str, arguments: dict, name: Optional[str] = None) -> PrefetchStep:
+    """Prefetch an MCP tool call (eg, a Mongo `find`). MCP tools stay on the agent, since the server is shared."""
+
+    async def call():
+        result = await server.call_tool(tool_name, arguments)
+        return "\n".join(item.text for item in result.content if item.type == "text")
+
+    return PrefetchStep(name or tool_name, call)
+
+
+class PrefetchPlan:
+    def __init__(self, steps: List[PrefetchStep]):
+        self.steps = steps
+
+    async def gather(self) -> Dict[str, str]:
+        # return_exceptions -> one failing step doesn't stop the others, the model just sees the error
+        results = await asyncio.gather(*(step.call() for step in self.steps), return_exceptions=True)
+        return {
+            step.name: f"Error: {result}" if isinstance(result, Exception) else str(result)
+            for step, result in zip(self.steps, results)
+        }
+
+    def prepare(self, agent: Agent, results: Dict[str, str]) -> Agent:
+        """Clone the agent with the prefetched results in its instructions and the replaced tools removed."""
+        replaced = {step.tool_name for step in self.steps if step.tool_name}
+        context = "\n\n".join(f"### {name}\n{value}" for name, value in results.items())
+        instructions = f"""{agent.instructions}
+
+    The following information has already been gathered for you. Treat these steps as done and do not try to
+    call the tools for them again:
+
+{context}
+    """
+        return agent.clone(
+            instructions=instructions,
+            tools=[tool for tool in agent.tools if tool.name not in replaced],
+        )
+
+
+async def run_with_prefetch(agent: Agent, request: str, plan: PrefetchPlan):
+    start = time.perf_counter()
+    results = await plan.gather()
+    prefetch_ms = (time.perf_counter() - start) * 1000
+
+    result = await Runner.run(plan.prepare(agent, results), request)
+    stats = {
+        "model_turns": len(result.raw_responses),
+        "prefetch_ms": prefetch_ms,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+    }
+    return result, stats
+
+
+async def compare(agent: Agent, request: str, plan: PrefetchPlan):
+    """Run the agent normally and with the prefetch plan, then print the model turns and wall time saved."""
+    start = time.perf_counter()
+    baseline = await Runner.run(agent, request)
+    baseline_ms = (time.perf_counter() - start) * 1000
+    baseline_turns = len(baseline.raw_responses)
+
+    _, stats = await run_with_prefetch(agent, request, plan)
+
+    print(f"Without prefetch: {baseline_turns} model turns, {baseline_ms:.0f}ms")
+    print(f"With prefetch:    {stats['model_turns']} model turns, {stats['wall_ms']:.0f}ms "
+          f"(prefetch took {stats['prefetch_ms']:.0f}ms)")
+    print(f"Saved: {baseline_turns - stats['model_turns']} model turns, {baseline_ms - stats['wall_ms']:.0f}ms")
+
+
+def without_sending(agent: Agent) -> Agent:
+    """Clone the agent with send_email_logic answering "queued" without sending, so a benchmark emails nobody."""
+    async def queued(context, arguments: str) -> str:
+        return json.dumps({"status": "queued", "message": "Benchmark run, nothing was sent",
+                           "message_id": "prefetch-benchmark"})
+
+    return agent.clone(tools=[dataclasses.replace(tool, on_invoke_tool=queued) if tool.name == "send_email_logic"
+                              else tool for tool in agent.tools])
+
+
+async def main():
+    from EmailMCPAgent import email_agent, get_email_address, get_time, mongoDB_server
+    from emailOutbox import get_outbox
+
+    plan = PrefetchPlan([
+        function_tool_step(get_time),
+        function_tool_step(get_email_address),
+        mcp_tool_step(mongoDB_server, "find", {
+            "database": "AppriseMarketplaceDatabase",
+            "collection": "listings",
+            "limit": 10,
+        }, name="AppriseMarketplaceDatabase listings"),
+    ])
+
+    # compare() runs the agent twice, so both passes get a send_email_logic that doesn't send anything (the same
+    # swap modelCassettes.stub_function_tool does) -> the model sees the same tool, SendGrid sees nothing
+    async with mongoDB_server:
+        await compare(without_sending(email_agent), "Create a marketing email for the new product launch, including our current "
+                                   "listings and the launch date.", plan)
+
+    # Nothing should have been queued, but if anything was, deliver it before the process exits
+    outbox = get_outbox()
+    if outbox:
+        await outbox.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
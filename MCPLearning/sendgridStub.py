@@ -0,0 +1,155 @@
+import asyncio
+import json
+import random
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import httpx
+
+from emailOutbox import EmailOutbox, OutgoingEmail
+
+# A local stand-in for the SendGrid v3 API, so the outbox can be exercised and benchmarked without sending
+# real emails (or needing an API key). It only implements POST /v3/mail/send, supports HTTP/1.1 keep-alive,
+# and can add latency / random 429s and 500s to check the retry logic. For tests, `script` lists the
+# (status, headers) of the first responses, and requests with an address in `rejected` get a 400.
+
+
+class SendGridStub:
+    def __init__(self, latency: float = 0.02, failure_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 script: Optional[List[Tuple[int, List[str]]]] = None, rejected: Iterable[str] = ()):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.script = list(script or [])
+        self.rejected = set(rejected)
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.connections = 0
+        self.delivered = 0  # Personalizations accepted (one per email)
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, extra_headers, response_body = await self._respond(method, path, headers, body)
+                head = [f"HTTP/1.1 {status} Stub", f"Content-Length: {len(response_body)}",
+                        "Content-Type: application/json"] + extra_headers
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + response_body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path, headers, body):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+        if method != "POST" or path != "/v3/mail/send":
+            return 404, [], b'{"errors": [{"message": "not found"}]}'
+        if not headers.get("authorization", "").startswith("Bearer "):
+            return 401, [], b'{"errors": [{"message": "authorization required"}]}'
+
+        if self.script:
+            status, extra_headers = self.script.pop(0)
+            if status >= 300:
+                return status, extra_headers, b'{"errors": [{"message": "scripted failure"}]}'
+
+        payload = json.loads(body)
+        addresses = {to["email"] for p in payload.get("personalizations", []) for to in p["to"]}
+        if addresses & self.rejected:
+            return 400, [], b'{"errors": [{"message": "Does not contain a valid address.", "field": "to"}]}'
+
+        roll = random.random()
+        if roll < self.failure_rate / 2:
+            return 429, ["Retry-After: 0.05"], b'{"errors": [{"message": "too many requests"}]}'
+        if roll < self.failure_rate:
+            return 500, [], b'{"errors": [{"message": "internal error"}]}'
+
+        self.delivered += len(payload.get("personalizations", []))
+        return 202, [], b""
+
+
+def make_emails(count: int, shared_content: bool):
+    for i in range(count):
+        subject = "Apprise Marketplace launch" if shared_content else f"Apprise Marketplace launch #{i}"
+        yield OutgoingEmail(to_emails=[f"user{i}@example.com"], subject=subject,
+                            plain_text_body="Our new listings are live!")
+
+
+async def send_inline(base_url: str, emails) -> int:
+    # What send_email_logic used to do: a new client (and connection) per email, one at a time
+    sent = 0
+    for email in emails:
+        async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": "Bearer stub"}) as client:
+            response = await client.post("/v3/mail/send", json={
+                "personalizations": [{"to": [{"email": address} for address in email.to_emails]}],
+                "from": {"email": "juzatkia@gmail.com"},
+                "subject": email.subject,
+                "content": [{"type": "text/plain", "value": email.plain_text_body}],
+            })
+            sent += response.status_code == 202
+    return sent
+
+
+async def send_with_outbox(base_url: str, emails) -> EmailOutbox:
+    outbox = EmailOutbox(api_key="stub", from_email="juzatkia@gmail.com", base_url=base_url,
+                         workers=8, requests_per_second=200)
+    for email in emails:
+        outbox.enqueue(email)
+    await outbox.close()
+    return outbox
+
+
+async def benchmark(count: int = 500, latency: float = 0.02, failure_rate: float = 0.05):
+    print(f"=== {count} emails, {latency * 1000:.0f}ms stub latency, {failure_rate:.0%} transient failures ===")
+
+    async with SendGridStub(latency=latency) as stub:
+        start = time.perf_counter()
+        sent = await send_inline(stub.base_url, make_emails(count, shared_content=False))
+        elapsed = time.perf_counter() - start
+        print(f"Inline (old send_email_logic): {sent / elapsed:8.1f} emails/s, "
+              f"{stub.requests} requests, {stub.connections} connections")
+
+    for shared_content in (False, True):
+        async with SendGridStub(latency=latency, failure_rate=failure_rate) as stub:
+            start = time.perf_counter()
+            outbox = await send_with_outbox(stub.base_url, make_emails(count, shared_content))
+            elapsed = time.perf_counter() - start
+            sent = sum(status.status == "sent" for status in outbox.statuses.values())
+            label = "Outbox (same content)" if shared_content else "Outbox (unique content)"
+            print(f"{label:31}: {sent / elapsed:8.1f} emails/s, {stub.requests} requests, "
+                  f"{stub.connections} connections, {count - sent} failed")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
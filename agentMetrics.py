@@ -0,0 +1,296 @@
+import asyncio
+import bisect
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from agents import RunConfig, RunHooks, Runner, TracingProcessor, add_trace_processor, function_tool
+from dotenv import load_dotenv
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# Where do the time and tokens go across triage_agent, the specialists, the function tools and the MCP tools?
+# MetricsHooks (RunHooks) times every model call and tool call per agent and counts tokens and handoffs.
+# MetricsTracingProcessor picks up what the hooks can't see: which MCP server a tool call went to.
+# Everything lands in in-process histograms (fixed buckets, a bisect + two additions per observation) which
+# can be scraped in Prometheus text format over HTTP or written to an OTLP JSON file.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def cumulative(self, series: list) -> List[int]:
+        counts, running = [], 0
+        for count in series[:len(self.buckets) + 1]:
+            running += count
+            counts.append(running)
+        return counts
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], value: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class AgentMetrics:
+    def __init__(self):
+        self.started_ns = time.time_ns()
+        self.model_latency = Histogram("agent_model_call_seconds", "Model call latency", ("agent",), LATENCY_BUCKETS)
+        self.model_tokens = Histogram("agent_model_call_tokens", "Tokens per model call", ("agent", "direction"),
+                                      TOKEN_BUCKETS)
+        self.tool_latency = Histogram("agent_tool_call_seconds", "Tool call latency", ("agent", "tool"),
+                                      LATENCY_BUCKETS)
+        self.mcp_latency = Histogram("agent_mcp_tool_call_seconds", "MCP tool call latency", ("server", "tool"),
+                                     LATENCY_BUCKETS)
+        self.tokens = Counter("agent_tokens_total", "Tokens used", ("agent", "direction"))
+        self.handoffs = Counter("agent_handoffs_total", "Handoffs between agents", ("from_agent", "to_agent"))
+        self.runs = Counter("agent_runs_total", "Times each agent produced the final output", ("agent",))
+
+    @property
+    def all(self):
+        return [self.model_latency, self.model_tokens, self.tool_latency, self.mcp_latency, self.tokens,
+                self.handoffs, self.runs]
+
+    def prometheus_text(self) -> str:
+        lines = []
+        for metric in self.all:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            if isinstance(metric, Histogram):
+                lines.append(f"# TYPE {metric.name} histogram")
+                for labels, series in metric.series.items():
+                    for bound, count in zip(metric.buckets + ("+Inf",), metric.cumulative(series)):
+                        le = f'le="{bound}"'
+                        lines.append(f"{metric.name}_bucket{_labels(metric.label_names, labels, le)} {count}")
+                    lines.append(f"{metric.name}_sum{_labels(metric.label_names, labels)} {series[-2]}")
+                    lines.append(f"{metric.name}_count{_labels(metric.label_names, labels)} {series[-1]}")
+            else:
+                lines.append(f"# TYPE {metric.name} counter")
+                for labels, value in metric.series.items():
+                    lines.append(f"{metric.name}{_labels(metric.label_names, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def otlp_json(self, service_name: str = "openai-agents-learning") -> dict:
+        """The metrics as an OTLP/JSON ExportMetricsServiceRequest (what an OTLP/HTTP collector accepts)."""
+        now = str(time.time_ns())
+        metrics = []
+        for metric in self.all:
+            points = []
+            for labels, value in metric.series.items():
+                point = {
+                    "attributes": [{"key": k, "value": {"stringValue": str(v)}}
+                                   for k, v in zip(metric.label_names, labels)],
+                    "startTimeUnixNano": str(self.started_ns),
+                    "timeUnixNano": now,
+                }
+                if isinstance(metric, Histogram):
+                    point.update(count=str(value[-1]), sum=value[-2], explicitBounds=list(metric.buckets),
+                                 bucketCounts=[str(c) for c in value[:len(metric.buckets) + 1]])
+                else:
+                    point["asDouble"] = value
+                points.append(point)
+            if isinstance(metric, Histogram):
+                data = {"histogram": {"dataPoints": points, "aggregationTemporality": 2}}
+            else:
+                data = {"sum": {"dataPoints": points, "aggregationTemporality": 2, "isMonotonic": True}}
+            metrics.append({"name": metric.name, "description": metric.help, **data})
+        return {"resourceMetrics": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeMetrics": [{"scope": {"name": "agentMetrics"}, "metrics": metrics}],
+        }]}
+
+    def write_otlp_json(self, path: str = "agent_metrics.otlp.json"):
+        with open(path, "w") as f:
+            json.dump(self.otlp_json(), f)
+
+
+class MetricsHooks(RunHooks):
+    """Pass as Runner.run(..., hooks=MetricsHooks(metrics)). One instance can be shared by concurrent runs."""
+
+    def __init__(self, metrics: AgentMetrics):
+        self.metrics = metrics
+        self._started: Dict[object, float] = {}
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._started[(id(context), agent.name)] = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        start = self._started.pop((id(context), agent.name), None)
+        if start is not None:
+            self.metrics.model_latency.observe((agent.name,), time.perf_counter() - start)
+        usage = response.usage
+        self.metrics.model_tokens.observe((agent.name, "input"), usage.input_tokens)
+        self.metrics.model_tokens.observe((agent.name, "output"), usage.output_tokens)
+        self.metrics.tokens.inc((agent.name, "input"), usage.input_tokens)
+        self.metrics.tokens.inc((agent.name, "output"), usage.output_tokens)
+
+    async def on_tool_start(self, context, agent, tool):
+        # Function tools get a ToolContext with the call id, so parallel calls of the same tool don't collide
+        self._started[getattr(context, "tool_call_id", None) or (id(context), tool.name)] = time.perf_counter()
+
+    async def on_tool_end(self, context, agent, tool, result):
+        start = self._started.pop(getattr(context, "tool_call_id", None) or (id(context), tool.name), None)
+        if start is not None:
+            self.metrics.tool_latency.observe((agent.name, tool.name), time.perf_counter() - start)
+
+    async def on_handoff(self, context, from_agent, to_agent):
+        self.metrics.handoffs.inc((from_agent.name, to_agent.name))
+
+    async def on_agent_end(self, context, agent, output):
+        self.metrics.runs.inc((agent.name,))
+
+
+class MetricsTracingProcessor(TracingProcessor):
+    """Times MCP tool calls per server from the SDK's function spans (the hooks only see the tool name)."""
+
+    def __init__(self, metrics: AgentMetrics):
+        self.metrics = metrics
+        self._started: Dict[str, float] = {}
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        if span.span_data.type == "function":
+            self._started[span.span_id] = time.perf_counter()
+
+    def on_span_end(self, span):
+        start = self._started.pop(span.span_id, None)
+        data = span.span_data
+        if start is not None and data.mcp_data:
+            self.metrics.mcp_latency.observe((str(data.mcp_data.get("server")), data.name), time.perf_counter() - start)
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        pass
+
+
+class PrometheusServer:
+    """GET /metrics -> Prometheus text format (same minimal asyncio.start_server approach as streamFanout.SSEServer)."""
+
+    def __init__(self, metrics: AgentMetrics, host: str = "127.0.0.1", port: int = 9464):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if request_line.split(" ")[1:2] == ["/metrics"]:
+                body = self.metrics.prometheus_text().encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def instrument(metrics: Optional[AgentMetrics] = None) -> Tuple[AgentMetrics, MetricsHooks]:
+    """Set up metrics for this process: returns (metrics, hooks to pass to every Runner.run)."""
+    metrics = metrics or AgentMetrics()
+    add_trace_processor(MetricsTracingProcessor(metrics))
+    return metrics, MetricsHooks(metrics)
+
+
+async def main():
+    from handoffs import general_inquiry, technical_inquiry, triage_agent
+
+    metrics, hooks = instrument()
+    server = await PrometheusServer(metrics).start()
+    print(f"Metrics on http://{server.host}:{server.port}/metrics")
+    for request in (technical_inquiry, general_inquiry):
+        result = await Runner.run(triage_agent, request, hooks=hooks)
+        print(result.final_output)
+    metrics.write_otlp_json()
+    print(metrics.prometheus_text())
+    await server.stop()
+
+
+@function_tool
+def get_popular_listing() -> str:
+    """Stand-in for appriseMarketAgent's Mongo lookup."""
+    return "Sea View Cottage, 4.9 stars"
+
+
+async def benchmark(requests: int = 500):
+    from standInModel import StandInModelProvider
+
+    from handoffs import billing_agent, technical_agent, triage_agent
+
+    agents = triage_agent.clone(handoffs=[billing_agent.clone(tools=[get_popular_listing]),
+                                          technical_agent.clone(tools=[get_popular_listing])])
+    run_config = RunConfig(model_provider=StandInModelProvider(latency=0, seconds_per_token=0), tracing_disabled=True)
+    metrics = AgentMetrics()
+    results = {}
+    for label, hooks in (("no hooks", None), ("metrics", MetricsHooks(metrics))) * 2:
+        start = time.perf_counter()
+        for i in range(requests):
+            await Runner.run(agents, f"Request {i}: which listing is popular?", hooks=hooks, run_config=run_config)
+        results[label] = (time.perf_counter() - start) / requests  # The second round wins (warm)
+    overhead = results["metrics"] - results["no hooks"]
+    print(f"Per request: {results['no hooks'] * 1e6:.0f}us without hooks, {results['metrics'] * 1e6:.0f}us with "
+          f"-> {overhead * 1e6:.0f}us overhead ({overhead / results['no hooks'] * 100:.1f}%)")
+
+    # And the raw cost of one observation
+    histogram = Histogram("x", "x", ("agent",), LATENCY_BUCKETS)
+    start = time.perf_counter()
+    for i in range(100_000):
+        histogram.observe(("Triage",), 0.1)
+    print(f"Histogram.observe: {(time.perf_counter() - start) / 100_000 * 1e9:.0f}ns")
+    print(f"Tool calls recorded: {sum(s[-1] for s in metrics.tool_latency.series.values())}, "
+          f"handoffs: {sum(metrics.handoffs.series.values())}")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
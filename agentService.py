@@ -0,0 +1,408 @@
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from typing import Dict
+
+from agents import InputGuardrailTripwireTriggered, RunConfig, Runner
+from dotenv import load_dotenv
+from openai import APIError
+from openai.types.responses import ResponseTextDeltaEvent
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from agentMetrics import AgentMetrics, MetricsHooks
+from appriseMarketplace.appriseMarketAgent import triage_agent
+from inputGuardrails import REFUSAL, fast_input_guardrail, forget_blocked_input
+from toolOffload import ToolExecutor, offload_agent
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# appriseMarketAgent's triage_agent is only reachable through the hard-coded __main__ call. This serves it over HTTP
+# so it can sit behind a load balancer:
+#   POST /v1/triage          {"input": "...", "session_id": "optional"} -> JSON with the final output
+#   POST /v1/triage/stream   same body -> Server-Sent Events (text deltas, agent changes, then "done")
+#                            (input tripping inputGuardrails' local checks -> 422, or a "blocked" event)
+#   GET  /healthz            liveness,   GET /readyz -> 503 while draining,   GET /metrics -> Prometheus text
+# - admission control: at most MAX_CONCURRENCY runs at once per worker, up to MAX_QUEUE more wait (for at most
+#   QUEUE_TIMEOUT seconds), anything beyond that gets 503 + Retry-After straight away instead of piling up
+# - per-tenant cap (X-Tenant-ID header): one tenant can't take every slot, over the cap -> 429
+# - graceful drain: on SIGTERM /readyz goes 503 and new work is refused while uvicorn is still listening, running
+#   requests get DRAIN_TIMEOUT seconds to finish, then uvicorn shuts down
+# Run it with several worker processes: python agentService.py --workers 4 (limits are per worker)
+# AGENT_SERVICE_STAND_IN=1 swaps the OpenAI model for standInModel.StandInModel (no network, for load tests), and
+# AGENT_SERVICE_CASCADE=1 picks the model per turn with modelCascade.CascadeModelProvider.
+# The blocking Mongo tools run on their own thread pool (toolOffload.py), AGENT_SERVICE_TOOL_THREADS threads.
+
+MAX_CONCURRENCY = int(os.getenv("AGENT_SERVICE_MAX_CONCURRENCY", "64"))
+MAX_QUEUE = int(os.getenv("AGENT_SERVICE_MAX_QUEUE", "256"))
+QUEUE_TIMEOUT = float(os.getenv("AGENT_SERVICE_QUEUE_TIMEOUT", "10"))
+TENANT_CAP = int(os.getenv("AGENT_SERVICE_TENANT_CAP", "16"))
+DRAIN_TIMEOUT = float(os.getenv("AGENT_SERVICE_DRAIN_TIMEOUT", "30"))
+STAND_IN = os.getenv("AGENT_SERVICE_STAND_IN") == "1"
+TOOL_THREADS = int(os.getenv("AGENT_SERVICE_TOOL_THREADS", "16"))
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, tenant_cap: int):
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tenant_cap = tenant_cap
+        self.waiting = 0
+        self.running = 0
+        self.tenants: Dict[str, int] = {}  # Admitted (waiting or running) per tenant
+        self.rejected = {429: 0, 503: 0}
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, tenant: str):
+        if self.draining:
+            raise self._reject(503, "Server is draining")
+        if self.tenants.get(tenant, 0) >= self.tenant_cap:
+            raise self._reject(429, f"Tenant {tenant} already has {self.tenant_cap} requests in flight")
+        if self.waiting >= self.max_queue and self.slots.locked():
+            raise self._reject(503, "Queue is full")
+
+        self.tenants[tenant] = self.tenants.get(tenant, 0) + 1
+        self._idle.clear()
+        try:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(503, "Timed out waiting for a free slot")
+            finally:
+                self.waiting -= 1
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+                self.slots.release()
+        finally:
+            self.tenants[tenant] -= 1
+            if not self.tenants[tenant]:
+                del self.tenants[tenant]
+            if not self.tenants:
+                self._idle.set()
+
+    def _reject(self, status: int, reason: str) -> Rejected:
+        self.rejected[status] += 1
+        return Rejected(status, reason)
+
+    async def drain(self, timeout: float):
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Drain timed out with {self.running} running / {self.waiting} waiting")
+
+
+admission = AdmissionController(MAX_CONCURRENCY, MAX_QUEUE, QUEUE_TIMEOUT, TENANT_CAP)
+metrics = AgentMetrics()
+hooks = MetricsHooks(metrics)
+tool_executor = ToolExecutor(max_workers=TOOL_THREADS, default_timeout=10)
+agent = offload_agent(triage_agent, tool_executor)
+agent.input_guardrails = [fast_input_guardrail]  # A tripped check answers 422 instead of reaching the model
+sessions = None  # conversationSessions.SessionStore, opened at startup
+
+
+def run_config() -> RunConfig:
+    if STAND_IN:
+        from standInModel import StandInModelProvider
+
+        return RunConfig(model_provider=StandInModelProvider(latency=0.05, seconds_per_token=0.0005),
+                         tracing_disabled=True)
+    if os.getenv("AGENT_SERVICE_CASCADE") == "1":
+        from modelCascade import CascadeModelProvider
+
+        return RunConfig(model_provider=CascadeModelProvider())
+    return RunConfig()
+
+
+async def parse(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict) or not isinstance(body.get("input"), str) or not body["input"].strip():
+        raise Rejected(400, 'Expected a JSON body like {"input": "..."}')
+    session = sessions.session(f"{request.headers.get('x-tenant-id', 'anonymous')}:{body['session_id']}") \
+        if body.get("session_id") and sessions is not None else None
+    return body["input"], session
+
+
+def error_response(error: Rejected) -> JSONResponse:
+    headers = {"Retry-After": str(error.retry_after)} if error.status in (429, 503) else {}
+    return JSONResponse({"error": error.reason}, status_code=error.status, headers=headers)
+
+
+def run_error(error: Exception) -> Rejected:
+    """Anything else Runner raises (model errors, max turns, a tool blowing up...) as a JSON error."""
+    traceback.print_exception(type(error), error, error.__traceback__)
+    if isinstance(error, APIError):
+        return Rejected(502, f"The model call failed ({type(error).__name__})")
+    return Rejected(500, f"The agent run failed ({type(error).__name__})")
+
+
+class AdmittedStream(StreamingResponse):
+    """A StreamingResponse that gives its admission slot back however the response ends.
+
+    The generator's own `finally` never runs if the client is gone before the generator starts, and a
+    BackgroundTask is skipped when the client disconnects, so the slot is released here instead.
+    """
+
+    def __init__(self, content, admitted, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admitted = admitted
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.admitted.__aexit__(None, None, None)
+
+
+async def triage(request: Request):
+    tenant = request.headers.get("x-tenant-id", "anonymous")
+    try:
+        text, session = await parse(request)
+        async with admission.admit(tenant):
+            result = await Runner.run(agent, text, session=session, hooks=hooks, run_config=RUN_CONFIG)
+    except Rejected as error:
+        return error_response(error)
+    except InputGuardrailTripwireTriggered as error:
+        await forget_blocked_input(session, text)
+        return JSONResponse({"error": REFUSAL, "reason": error.guardrail_result.output.output_info.reason},
+                            status_code=422)
+    except Exception as error:
+        return error_response(run_error(error))
+    return JSONResponse({"id": uuid.uuid4().hex, "agent": result.last_agent.name, "output": str(result.final_output)})
+
+
+async def triage_stream(request: Request):
+    tenant = request.headers.get("x-tenant-id", "anonymous")
+    try:
+        text, session = await parse(request)
+        admitted = admission.admit(tenant)
+        # Admit before answering, so a rejection is a real 429 / 503 not an SSE error. AdmittedStream releases it.
+        await admitted.__aenter__()
+    except Rejected as error:
+        return error_response(error)
+
+    async def events():
+        try:
+            result = Runner.run_streamed(agent, text, session=session, hooks=hooks, run_config=RUN_CONFIG)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    yield f"event: delta\ndata: {json.dumps(event.data.delta)}\n\n"
+                elif event.type == "agent_updated_stream_event":
+                    yield f"event: agent\ndata: {json.dumps(event.new_agent.name)}\n\n"
+            done = {"agent": result.last_agent.name, "output": str(result.final_output)}
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+        except InputGuardrailTripwireTriggered as error:
+            await forget_blocked_input(session, text)
+            blocked = {"error": REFUSAL, "reason": error.guardrail_result.output.output_info.reason}
+            yield f"event: blocked\ndata: {json.dumps(blocked)}\n\n"
+        except Exception as error:
+            # The 200 is already sent, so the error goes in the stream
+            failed = run_error(error)
+            yield f"event: error\ndata: {json.dumps({'error': failed.reason, 'status': failed.status})}\n\n"
+
+    return AdmittedStream(events(), admitted, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def healthz(request: Request):
+    return PlainTextResponse("ok")
+
+
+async def readyz(request: Request):
+    if admission.draining:
+        return PlainTextResponse("draining", status_code=503)
+    return JSONResponse({"running": admission.running, "waiting": admission.waiting})
+
+
+async def prometheus(request: Request):
+    text = metrics.prometheus_text() + tool_executor.prometheus_text()
+    text += (f"# TYPE agent_service_running gauge\nagent_service_running {admission.running}\n"
+             f"# TYPE agent_service_waiting gauge\nagent_service_waiting {admission.waiting}\n"
+             f"# TYPE agent_service_rejected_total counter\n"
+             + "".join(f'agent_service_rejected_total{{status="{s}"}} {n}\n' for s, n in admission.rejected.items()))
+    return PlainTextResponse(text)
+
+
+def drain_before_exit():
+    """Puts the drain in front of uvicorn's SIGTERM handler.
+
+    uvicorn stops listening as soon as it gets SIGTERM and only runs the lifespan shutdown once the connections are
+    gone, so draining there is too late: nobody can see /readyz go 503. Called at startup (uvicorn has installed its
+    handlers by then, in every worker process), this makes the first SIGTERM mark the service as draining while it
+    still answers, and hands the signal on to uvicorn once the running requests are done or DRAIN_TIMEOUT is up.
+    A second SIGTERM goes straight to uvicorn.
+    """
+    uvicorn_exit = signal.getsignal(signal.SIGTERM)
+    if not callable(uvicorn_exit):
+        return  # Not running under uvicorn (e.g. Starlette's TestClient)
+    loop = asyncio.get_running_loop()
+    drains = []  # Keeps a reference to the drain task
+
+    async def drain_then_exit(sig, frame):
+        await admission.drain(DRAIN_TIMEOUT)
+        uvicorn_exit(sig, frame)
+
+    def handle_exit(sig, frame):
+        if admission.draining:
+            uvicorn_exit(sig, frame)
+            return
+        admission.draining = True
+        loop.call_soon_threadsafe(lambda: drains.append(loop.create_task(drain_then_exit(sig, frame))))
+
+    signal.signal(signal.SIGTERM, handle_exit)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global sessions
+    from conversationSessions import SessionStore
+
+    if not STAND_IN:
+        from modelClient import install_shared_client
+
+        install_shared_client()
+    sessions = SessionStore(os.getenv("AGENT_SERVICE_SESSIONS_DB", "sessions.db"))
+    drain_before_exit()
+    yield
+    # Shutdown: after a SIGTERM the drain has already happened, this covers Ctrl+C and anything else
+    await admission.drain(DRAIN_TIMEOUT)
+    await sessions.wait_for_compactions()
+    tool_executor.shutdown(wait=False)
+    sessions.close()
+
+
+RUN_CONFIG = run_config()
+
+app = Starlette(
+    routes=[
+        Route("/v1/triage", triage, methods=["POST"]),
+        Route("/v1/triage/stream", triage_stream, methods=["POST"]),
+        Route("/healthz", healthz),
+        Route("/readyz", readyz),
+        Route("/metrics", prometheus),
+    ],
+    lifespan=lifespan,
+)
+
+
+# --- Local load test: the service in worker processes, on the stand-in model ---
+
+LOAD_TEST_INPUTS = (
+    "Request {i}: I have a billing question about a payment on my subscription.",
+    "Request {i}: I have technical problems, the app shows an error when I log in.",
+)
+
+
+async def load_test(url: str, path: str, requests: int, concurrency: int, tenants: int) -> dict:
+    import httpx
+
+    latencies, statuses = [], {}
+    # Drop idle connections before uvicorn's 5s keep-alive timeout does, so we never reuse a closing one
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency, keepalive_expiry=2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(i)
+
+        async def user():
+            while not queue.empty():
+                i = queue.get_nowait()
+                # Billing / technical questions: the Business Information Agent's tools need a real MongoDB
+                body = {"input": LOAD_TEST_INPUTS[i % len(LOAD_TEST_INPUTS)].format(i=i)}
+                start = time.perf_counter()
+                try:
+                    async with client.stream("POST", path, json=body,
+                                             headers={"X-Tenant-ID": f"tenant-{i % tenants}"}) as response:
+                        async for _ in response.aiter_bytes():
+                            pass
+                    status = response.status_code
+                except httpx.TransportError:
+                    status = "connection error"
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"rps": requests / elapsed, "p50": latencies[len(latencies) // 2],
+            "p99": latencies[int(len(latencies) * 0.99) - 1], "statuses": statuses}
+
+
+def serve_in_background(port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "AGENT_SERVICE_STAND_IN": "1", "AGENT_SERVICE_SESSIONS_DB": "sessions_loadtest.db"}
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "agentService:app", "--port", str(port),
+                             "--workers", str(workers), "--log-level", "warning", "--timeout-graceful-shutdown",
+                             str(int(DRAIN_TIMEOUT))], env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_until_ready(url: str, timeout: float = 30):
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Service didn't start")
+
+
+async def run_load_test(workers: int = 2, requests: int = 2000, concurrency: int = 100, tenants: int = 20):
+    port = 8089
+    url = f"http://127.0.0.1:{port}"
+    server = serve_in_background(port, workers)
+    try:
+        await wait_until_ready(url)
+        for path in ("/v1/triage", "/v1/triage/stream"):
+            stats = await load_test(url, path, requests, concurrency, tenants)
+            print(f"{path:>18} ({workers} workers, {concurrency} concurrent): {stats['rps']:.0f} req/s, "
+                  f"p50 {stats['p50'] * 1000:.0f}ms, p99 {stats['p99'] * 1000:.0f}ms, statuses {stats['statuses']}")
+    finally:
+        server.terminate()  # SIGTERM -> graceful drain
+        server.wait()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f"sessions_loadtest.db{suffix}"):
+                os.remove(f"sessions_loadtest.db{suffix}")
+
+
+if __name__ == "__main__":
+    if "--load-test" in sys.argv:
+        asyncio.run(run_load_test())
+    else:
+        import uvicorn
+
+        workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 1
+        uvicorn.run("agentService:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")), workers=workers,
+                    timeout_graceful_shutdown=int(DRAIN_TIMEOUT))
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from agents import Agent, ModelSettings, RunConfig, RunContextWrapper, Runner, function_tool
+
+from agentsAsTools import note_taking_agent, productivity_assistant, task_management_agent
+
+# In agentsAsTools.py, every `.as_tool(...)` call is a full nested Runner.run. When the coordinator asks for
+# both specialists they're separate nested runs, and asking the same specialist the same thing twice runs it twice.
+# SubAgentExecutor is passed as the run context and is shared by every sub-agent tool in that run:
+# - independent sub-agent calls run concurrently (bounded by a semaphore)
+# - results are memoised per run by (agent, input), including calls that are still in flight
+# - each sub-agent has a timeout, and a nested run that overruns is cancelled
+# - a nested run is also cancelled once every caller waiting on it has been cancelled (eg the coordinator's run)
+# - like .as_tool, the nested run gets the parent run's context and run_config
+# - it counts nested runs / cache hits and works out the wall time saved vs running them one after another
+
+
+class SubAgentExecutor:
+    def __init__(self, max_concurrency: int = 4, default_timeout: float = 60.0,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}  # Per sub-agent name
+        self.cache: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.waiters: Dict[asyncio.Task, int] = {}  # Callers still waiting on each in-flight nested run
+        self.nested_runs = 0
+        self.cache_hits = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.durations: Dict[Tuple[str, str], float] = {}
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    async def run(self, agent: Agent, input: str, context: Optional[RunContextWrapper[Any]] = None,
+                  run_config: Optional[RunConfig] = None) -> str:
+        """Run `agent` on `input` as a nested run, or join the same run if it's already cached / in flight.
+        `context` is the calling tool's RunContextWrapper: its .context (and run_config, unless one is passed)
+        is handed on to the nested run."""
+        key = (agent.name, " ".join(input.lower().split()))
+        task = self.cache.get(key)
+        if task is not None:
+            self.cache_hits += 1
+        else:
+            run_config = run_config or getattr(context, "run_config", None)
+            task = asyncio.create_task(self._run(agent, input, key, context.context if context else self, run_config))
+            self.cache[key] = task
+        self.waiters[task] = self.waiters.get(task, 0) + 1
+        try:
+            # shield -> if one caller is cancelled, the other callers waiting on the same run still get it
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.waiters[task] == 1 and not task.done():
+                # Nobody else wants it -> stop it now instead of letting it hold a semaphore slot until its timeout
+                if self.cache.get(key) is task:
+                    del self.cache[key]
+                task.cancel()
+            raise
+        except asyncio.TimeoutError:
+            return f"{agent.name} did not answer within {self.timeouts.get(agent.name, self.default_timeout)}s."
+        finally:
+            self.waiters[task] -= 1
+            if not self.waiters[task]:
+                del self.waiters[task]
+
+    async def _run(self, agent: Agent, input: str, key: Tuple[str, str], context: Any,
+                   run_config: Optional[RunConfig]) -> str:
+        async with self.semaphore:
+            start = time.perf_counter()
+            self.first_start = self.first_start or start
+            self.nested_runs += 1
+            try:
+                # wait_for cancels the nested run when it overruns
+                result = await asyncio.wait_for(Runner.run(agent, input, context=context, run_config=run_config),
+                                                self.timeouts.get(agent.name, self.default_timeout))
+            except BaseException as error:
+                # Failed / timed out / cancelled runs aren't memoised, so a later call can try again
+                if self.cache.get(key) is asyncio.current_task():
+                    del self.cache[key]
+                if isinstance(error, asyncio.CancelledError):
+                    self.cancelled += 1
+                else:
+                    self.failed += 1
+                raise
+            finally:
+                end = time.perf_counter()
+                self.durations[key] = end - start
+                self.last_end = end
+            return str(result.final_output)
+
+    def report(self):
+        sequential = sum(self.durations.values())
+        # A cache hit would otherwise have been another nested run (of about the average length)
+        hit_time = self.cache_hits * (sequential / len(self.durations) if self.durations else 0.0)
+        wall = (self.last_end - self.first_start) if self.first_start else 0.0
+        print(f"Nested runs: {self.nested_runs}, cache hits: {self.cache_hits}, failed / timed out: {self.failed}, "
+              f"cancelled: {self.cancelled}")
+        print(f"Sub-agent time: {sequential:.2f}s sequential (+{hit_time:.2f}s avoided by the cache), "
+              f"{wall:.2f}s wall -> saved {sequential + hit_time - wall:.2f}s")
+
+
+def sub_agent_tool(agent: Agent, tool_name: str, tool_description: str, run_config: Optional[RunConfig] = None):
+    """Like agent.as_tool(...), but run through the SubAgentExecutor in the run context."""
+
+    @function_tool(name_override=tool_name, description_override=tool_description)
+    async def run_sub_agent(ctx: RunContextWrapper[SubAgentExecutor], input: str) -> str:
+        executor = ctx.context if isinstance(ctx.context, SubAgentExecutor) else SubAgentExecutor()
+        return await executor.run(agent, input, context=ctx, run_config=run_config)
+
+    return run_sub_agent
+
+
+# Same coordinator as agentsAsTools.py, but its specialist tools go through the executor and the model is
+# allowed to ask for several tools in one turn
+concurrent_productivity_assistant = productivity_assistant.clone(
+    tools=[
+        sub_agent_tool(note_taking_agent, "note_taking",
+                       "For taking, organizing, and retrieving notes and information"),
+        sub_agent_tool(task_management_agent, "task_management",
+                       "For managing tasks, setting deadlines, and tracking priorities"),
+    ],
+    model_settings=ModelSettings(parallel_tool_calls=True),
+)
+
+
+async def main():
+    request = ("I need to keep track of my project deadlines, and I also want somewhere to keep my meeting notes "
+               "for the same project")
+
+    start = time.perf_counter()
+    result = await Runner.run(productivity_assistant, request)
+    print(f"as_tool: {time.perf_counter() - start:.2f}s")
+
+    executor = SubAgentExecutor(max_concurrency=4, timeouts={"Note Manager": 30, "Task Manager": 30})
+    start = time.perf_counter()
+    result = await Runner.run(concurrent_productivity_assistant, request, context=executor)
+    print(f"executor: {time.perf_counter() - start:.2f}s")
+    executor.report()
+    print(result.final_output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,7 +2,6 @@ import asyncio
 from dotenv import load_dotenv
 import os
 from agents import Agent, Runner, function_tool
-from pymongo import MongoClient
 
 # Loading the .env variables from the .env file
 load_dotenv()
@@ -10,17 +9,36 @@ load_dotenv()
 # Get the value
 MONGO_URI = os.getenv("MONGO_URI")
 
-# Replace with your connection string
-client = MongoClient(MONGO_URI)
+# The MongoClient (and pymongo itself, ~0.3s to import) is only created when a tool first needs the database,
+# so importing this module (eg, agentService workers starting up) doesn't wait on it or start its monitor threads
+_client = None
 
-# Access a database
-db = client["AppriseMarketplaceDatabase"]
+
+def get_db():
+    global _client
+    if _client is None:
+        from pymongo import MongoClient
+
+        # Replace with your connection string
+        _client = MongoClient(MONGO_URI)
+    # Access a database
+    return _client["AppriseMarketplaceDatabase"]
+
+
+# `client` and `db` used to be module attributes, keep them working
+def __getattr__(name):
+    if name == "db":
+        return get_db()
+    if name == "client":
+        get_db()
+        return _client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @function_tool
 def get_listing_count() -> str:
     """Get the current number of active listings on Apprise Marketplace."""
-    collection = db["listings"]
+    collection = get_db()["listings"]
     result = collection.count_documents({})
     # This would normally connect to your database - using mock data for demo
     return f"There are currently {result} active listings on Apprise Marketplace."
@@ -28,7 +46,7 @@ def get_listing_count() -> str:
 
 @function_tool
 def get_popular_listing() -> str:
-    collection = db["bookings"]
+    collection = get_db()["bookings"]
 
     pipeline = [
         {
@@ -100,8 +118,10 @@ triage_agent = Agent(
 # Function takes in the user request (Hard coded at the moment)
 # The function then runs the triage_agent to determine the following actions.
 # Eg, pass the user to a more specialised agent
-async def handle_customer_request(request):
-    result = await Runner.run(triage_agent, request)
+# Pass a session (any SDK Session, eg conversationSessions.SessionStore(...).session(id)) to remember earlier turns,
+# and a run_config with eg modelCascade.CascadeModelProvider to pick the model per turn instead of gpt-4.1-mini
+async def handle_customer_request(request, session=None, run_config=None):
+    result = await Runner.run(triage_agent, request, session=session, run_config=run_config)
     print(result.final_output)
 
 
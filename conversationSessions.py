@@ -0,0 +1,314 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from agents import Agent, RunConfig, Runner
+from dotenv import load_dotenv
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# handle_customer_request and the voice turns start from nothing every time, so callers repeat themselves.
+# Resending the whole history fixes that but grows the tokens of every turn without limit.
+# SessionStore gives each conversation (session id) a Session that Runner.run(..., session=...) understands:
+# - SQLite (WAL) underneath, new items are appended as rows, nothing is ever rewritten
+# - an in-memory LRU of recently used sessions in front, so a busy conversation only reads one version number
+#   per turn (several workers can share the database: a session another store wrote to is re-read)
+# - once a session's history is over the token budget, the older turns are summarised (in the background)
+#   into one summary message, and only the summary + the recent turns are sent to the model; the summarised
+#   rows are deleted, so the database holds each conversation's summary + recent turns, not its whole history
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+def estimate_tokens(item: dict) -> int:
+    # ~4 characters per token is plenty accurate for a budget, and costs nothing per turn
+    return len(json.dumps(item)) // 4
+
+
+summary_agent = Agent(
+    name="Conversation Summariser",
+    instructions="""You summarise the earlier part of a customer conversation for the agent that continues it.
+    Keep names, ids, dates, amounts, decisions, open questions and anything the customer asked to remember.
+    Merge in the previous summary if there is one. Write at most 150 words.""",
+    model="gpt-4.1-nano",
+)
+
+
+async def summarise_with_agent(previous_summary: Optional[str], items: List[dict]) -> str:
+    transcript = "\n".join(f"{item.get('role', item.get('type'))}: {json.dumps(item.get('content', item))[:2000]}"
+                           for item in items)
+    prompt = f"Previous summary: {previous_summary or '(none)'}\n\nConversation to add:\n{transcript}"
+    result = await Runner.run(summary_agent, prompt)
+    return result.final_output
+
+
+class _CachedSession:
+    __slots__ = ("items", "seqs", "tokens", "summary", "summary_tokens", "compacted_upto", "version")
+
+    def __init__(self):
+        self.items: List[dict] = []
+        self.seqs: List[int] = []
+        self.tokens: List[int] = []
+        self.summary: Optional[str] = None
+        self.summary_tokens = 0
+        self.compacted_upto = 0  # Items with seq <= this are covered by the summary (and deleted)
+        self.version = 0  # The session's row in `versions` when this was read
+
+
+class SessionStore:
+    def __init__(self, path: str = "sessions.db", cache_size: int = 256, token_budget: int = 3000,
+                 keep_recent_tokens: int = 1000,
+                 summarise: Callable[[Optional[str], List[dict]], Awaitable[str]] = summarise_with_agent):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                session_id TEXT NOT NULL, seq INTEGER NOT NULL, item TEXT NOT NULL, tokens INTEGER NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS summaries (
+                session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, compacted_upto INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS versions (
+                session_id TEXT PRIMARY KEY, version INTEGER NOT NULL
+            );
+        """)
+        self.cache: "OrderedDict[str, _CachedSession]" = OrderedDict()
+        self.cache_size = cache_size
+        self.token_budget = token_budget
+        self.keep_recent_tokens = keep_recent_tokens
+        self.summarise = summarise
+        self.compacting: Dict[str, asyncio.Task] = {}
+        self.compactions = 0
+
+    def session(self, session_id: str) -> "StoredSession":
+        return StoredSession(self, session_id)
+
+    def _version(self, session_id: str) -> int:
+        row = self.db.execute("SELECT version FROM versions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _load(self, session_id: str) -> _CachedSession:
+        # The cache is only a hint: another SessionStore (another worker) may have written to the same database,
+        # so it's used only while the session's version still matches
+        cached = self.cache.get(session_id)
+        if cached is not None and cached.version == self._version(session_id):
+            self.cache.move_to_end(session_id)
+            return cached
+
+        # Version and rows from one snapshot (inside a write transaction already, or a read transaction of its own)
+        with contextlib.ExitStack() as stack:
+            if not self.db.in_transaction:
+                self.db.execute("BEGIN")
+                stack.callback(self.db.commit)
+            cached = _CachedSession()
+            cached.version = self._version(session_id)
+            row = self.db.execute("SELECT summary, compacted_upto FROM summaries WHERE session_id = ?",
+                                  (session_id,)).fetchone()
+            if row:
+                cached.summary, cached.compacted_upto = row
+                cached.summary_tokens = len(cached.summary) // 4
+            # Primary key range scan: only the turns the summary doesn't cover
+            for seq, item, tokens in self.db.execute(
+                    "SELECT seq, item, tokens FROM items WHERE session_id = ? AND seq > ? ORDER BY seq",
+                    (session_id, cached.compacted_upto)):
+                cached.seqs.append(seq)
+                cached.items.append(json.loads(item))
+                cached.tokens.append(tokens)
+
+        self.cache[session_id] = cached
+        self.cache.move_to_end(session_id)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return cached
+
+    @contextlib.contextmanager
+    def _write(self, session_id: str):
+        """A write transaction for one session, yielding its history as of inside the transaction.
+
+        BEGIN IMMEDIATE takes the database's write lock first, so nobody can append between reading the history
+        and writing to it. Committing bumps the session's version, which tells every other store to re-read it.
+        """
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            cached = self._load(session_id)
+            yield cached
+            self.db.execute("INSERT INTO versions (session_id, version) VALUES (?, 1) "
+                            "ON CONFLICT (session_id) DO UPDATE SET version = version + 1", (session_id,))
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            self.cache.pop(session_id, None)  # May hold changes that weren't committed
+            raise
+        cached.version += 1
+
+    def _next_seq(self, session_id: str, cached: _CachedSession) -> int:
+        # From the database, inside the write transaction. Never at or below compacted_upto: those seqs are
+        # hidden behind the summary (their rows are deleted, so MAX(seq) alone can go back below it)
+        last = self.db.execute("SELECT MAX(seq) FROM items WHERE session_id = ?", (session_id,)).fetchone()[0]
+        return max(last or 0, cached.compacted_upto) + 1
+
+    def get_items(self, session_id: str, limit: Optional[int] = None) -> List[dict]:
+        cached = self._load(session_id)
+        items = cached.items if limit is None else cached.items[-limit:]
+        if cached.summary and (limit is None or limit > len(cached.items)):
+            return [{"role": "system", "content": f"{SUMMARY_PREFIX} {cached.summary}"}] + items
+        return list(items)
+
+    def add_items(self, session_id: str, items: List[dict]):
+        if not items:
+            return
+        with self._write(session_id) as cached:
+            seq = self._next_seq(session_id, cached)
+            rows = []
+            for item in items:
+                tokens = estimate_tokens(item)
+                rows.append((session_id, seq, json.dumps(item), tokens))
+                cached.items.append(item)
+                cached.seqs.append(seq)
+                cached.tokens.append(tokens)
+                seq += 1
+            self.db.executemany("INSERT INTO items (session_id, seq, item, tokens) VALUES (?, ?, ?, ?)", rows)
+
+        if cached.summary_tokens + sum(cached.tokens) > self.token_budget and session_id not in self.compacting:
+            self.compacting[session_id] = asyncio.get_running_loop().create_task(self._compact(session_id))
+
+    def pop_item(self, session_id: str) -> Optional[dict]:
+        with self._write(session_id) as cached:
+            if not cached.items:
+                return None
+            self.db.execute("DELETE FROM items WHERE session_id = ? AND seq = ?", (session_id, cached.seqs[-1]))
+            cached.seqs.pop()
+            cached.tokens.pop()
+            return cached.items.pop()
+
+    def clear(self, session_id: str):
+        with self._write(session_id) as cached:
+            self.db.execute("DELETE FROM items WHERE session_id = ?", (session_id,))
+            self.db.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+            del cached.items[:], cached.seqs[:], cached.tokens[:]
+            cached.summary, cached.summary_tokens, cached.compacted_upto = None, 0, 0
+        compacting = self.compacting.pop(session_id, None)
+        if compacting is not None:
+            compacting.cancel()
+
+    async def _compact(self, session_id: str):
+        try:
+            cached = self._load(session_id)
+            # Keep the most recent ~keep_recent_tokens, and only cut just before a user message so a tool call
+            # is never separated from its output
+            kept, cut = 0, len(cached.items)
+            for index in range(len(cached.items) - 1, -1, -1):
+                kept += cached.tokens[index]
+                if kept > self.keep_recent_tokens:
+                    break
+                if cached.items[index].get("role") == "user":
+                    cut = index
+            if cut == 0 or cut == len(cached.items):
+                return
+            old_items, upto, based_on = cached.items[:cut], cached.seqs[cut - 1], cached.compacted_upto
+            summary = await self.summarise(cached.summary, old_items)
+
+            # New items may have been appended while the summary was being written (here or by another store);
+            # they're all after `cut`. The summarised rows go: the summary replaces them for good.
+            with self._write(session_id) as cached:
+                if upto not in cached.seqs or cached.compacted_upto != based_on:
+                    return  # The history was popped / cleared / compacted underneath us
+                index = cached.seqs.index(upto) + 1
+                del cached.items[:index], cached.seqs[:index], cached.tokens[:index]
+                cached.summary, cached.summary_tokens, cached.compacted_upto = summary, len(summary) // 4, upto
+                self.db.execute("INSERT OR REPLACE INTO summaries (session_id, summary, compacted_upto) "
+                                "VALUES (?, ?, ?)", (session_id, summary, upto))
+                self.db.execute("DELETE FROM items WHERE session_id = ? AND seq <= ?", (session_id, upto))
+            self.compactions += 1
+        finally:
+            if self.compacting.get(session_id) is asyncio.current_task():
+                del self.compacting[session_id]
+
+    async def wait_for_compactions(self):
+        await asyncio.gather(*list(self.compacting.values()), return_exceptions=True)
+
+    def close(self):
+        self.db.close()
+
+
+class StoredSession:
+    """The SDK's Session protocol for one conversation in a SessionStore."""
+
+    session_settings = None
+
+    def __init__(self, store: SessionStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    async def get_items(self, limit: Optional[int] = None) -> List[dict]:
+        return self.store.get_items(self.session_id, limit)
+
+    async def add_items(self, items: List[dict]) -> None:
+        self.store.add_items(self.session_id, items)
+
+    async def pop_item(self) -> Optional[dict]:
+        return self.store.pop_item(self.session_id)
+
+    async def clear_session(self) -> None:
+        self.store.clear(self.session_id)
+
+
+async def main():
+    from handoffs import handle_customer_request
+
+    store = SessionStore()
+    session = store.session("customer-42")
+    await handle_customer_request("Hi, I'm Sam and my order number is 1182. I was charged twice for it.", session)
+    await handle_customer_request("Sorry, what was my order number again?", session)
+    await store.wait_for_compactions()
+    store.close()
+
+
+async def benchmark(turns: int = 50):
+    from standInModel import StandInModelProvider
+
+    from handoffs import triage_agent
+
+    async def stand_in_summary(previous: Optional[str], items: List[dict]) -> str:
+        await asyncio.sleep(0.05)
+        return f"{previous or ''} [{len(items)} earlier items summarised]"
+
+    run_config = RunConfig(model_provider=StandInModelProvider(latency=0, seconds_per_token=0), tracing_disabled=True)
+    path = "sessions_benchmark.db"
+    baseline = None
+    for label in ("no session", "full history", "session store"):
+        if os.path.exists(path):
+            os.remove(path)
+        store = SessionStore(path, token_budget=3000 if label == "session store" else 10 ** 9,
+                             summarise=stand_in_summary)
+        session = None if label == "no session" else store.session("benchmark")
+        elapsed, sent = 0.0, 0
+        for turn in range(turns):
+            request = f"Turn {turn}: I have another question about my billing and payment."
+            if session is not None and turn == turns - 1:
+                sent = sum(estimate_tokens(item) for item in await session.get_items())
+            sent += estimate_tokens({"role": "user", "content": request}) if turn == turns - 1 else 0
+            start = time.perf_counter()
+            await Runner.run(triage_agent, request, session=session, run_config=run_config)
+            elapsed += time.perf_counter() - start
+            await asyncio.sleep(0.06)  # Time between turns, long enough for a background summary to finish
+        await store.wait_for_compactions()
+        per_turn = elapsed / turns
+        baseline = baseline or per_turn
+        print(f"{label:>13}: ~{sent} input tokens at turn {turns}, {per_turn * 1e6:.0f}us per turn "
+              f"(+{(per_turn - baseline) * 1e6:.0f}us), {store.compactions} compactions")
+        store.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
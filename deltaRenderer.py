@@ -0,0 +1,155 @@
+import asyncio
+import io
+import sys
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from agents import Agent, Runner
+from dotenv import load_dotenv
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# streaming.py skips the raw_response_event deltas. Printing them one at a time works, but at high token rates
+# the terminal / socket writes (one syscall per token) end up costing more CPU than everything else.
+# DeltaRenderer buffers the `response.output_text.delta` text and writes it out in frames: at most once per
+# frame budget (16ms by default, ~60fps), or straight away once `max_bytes` are waiting.
+# It records how many writes it made and the display lag (time from a delta arriving to it being written).
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, text: str):
+        self.stream.write(text)
+        self.stream.flush()
+
+    async def drain(self):
+        pass
+
+
+class SocketSink:
+    """Writes to an asyncio StreamWriter (eg, a client connected to an asyncio.start_server handler)."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    def write(self, text: str):
+        self.writer.write(text.encode())
+
+    async def drain(self):
+        await self.writer.drain()
+
+
+class DeltaRenderer:
+    def __init__(self, sink, frame_ms: float = 16, max_bytes: int = 4096):
+        self.sink = sink
+        self.frame = frame_ms / 1000
+        self.max_bytes = max_bytes
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._oldest: Optional[float] = None  # When the oldest unwritten delta arrived
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.writes = 0
+        self.deltas = 0
+        self.bytes = 0
+        self.lags: List[float] = []
+        self.started = time.perf_counter()
+
+    def push(self, delta: str, arrived: Optional[float] = None):
+        arrived = arrived or time.perf_counter()
+        self.deltas += 1
+        self._buffer.append(delta)
+        self._buffered_bytes += len(delta)
+        if self._oldest is None:
+            self._oldest = arrived
+
+        if self.frame <= 0 or self._buffered_bytes >= self.max_bytes:
+            self.flush()
+        elif self._timer is None:
+            # First delta of a new frame -> write it out at the end of the frame
+            self._timer = asyncio.get_running_loop().call_later(self.frame, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self.sink.write(text)
+        self.lags.append(time.perf_counter() - self._oldest)
+        self.writes += 1
+        self.bytes += len(text)
+        self._buffer, self._buffered_bytes, self._oldest = [], 0, None
+
+    async def render(self, events: AsyncIterator[Any]):
+        """Render the text deltas from a stream of SDK events (result.stream_events() or a StreamHub subscription)."""
+        async for event in events:
+            if event.type == "raw_response_event" and getattr(event.data, "type", None) == "response.output_text.delta":
+                self.push(event.data.delta)
+                await self.sink.drain()
+        self.flush()
+        await self.sink.drain()
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "deltas": self.deltas,
+            "writes": self.writes,
+            "writes_per_second": self.writes / elapsed if elapsed else 0.0,
+            "lag_p50_ms": lags[len(lags) // 2] * 1000,
+            "lag_p99_ms": lags[max(0, int(len(lags) * 0.99) - 1)] * 1000,
+        }
+
+
+async def main():
+    agent = Agent(
+        name="Storyteller",
+        instructions="You write long, vivid short stories.",
+    )
+    result = Runner.run_streamed(agent, input="Tell me a story about a lighthouse keeper.")
+    renderer = DeltaRenderer(StdoutSink())
+    await renderer.render(result.stream_events())
+    print(f"\n\n{renderer.stats()}")
+
+
+class _CountingSink:
+    """Stands in for a terminal: each write costs a little CPU, like a real syscall + redraw."""
+
+    def __init__(self):
+        self.stream = io.StringIO()
+
+    def write(self, text: str):
+        self.stream.write(text)
+        sum(range(2000))
+
+    async def drain(self):
+        pass
+
+
+async def benchmark(deltas: int = 5000, tokens_per_second: float = 2000):
+    interval = 1 / tokens_per_second
+    for frame_ms in (0, 16, 50):
+        renderer = DeltaRenderer(_CountingSink(), frame_ms=frame_ms)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        next_delta = wall_start
+        for _ in range(deltas):
+            renderer.push("tok ")
+            # Deltas arrive in bursts (several per loop wake-up), like network reads do
+            next_delta += interval
+            delay = next_delta - time.perf_counter()
+            if delay > 0.001:
+                await asyncio.sleep(delay)
+        renderer.flush()
+        cpu = time.process_time() - cpu_start
+        stats = renderer.stats()
+        label = "per delta" if frame_ms == 0 else f"{frame_ms}ms frames"
+        print(f"{label:>12}: {stats['writes']:5} writes ({stats['writes_per_second']:7.1f}/s), "
+              f"CPU {cpu * 1000:6.1f}ms, lag p50 {stats['lag_p50_ms']:5.2f}ms p99 {stats['lag_p99_ms']:5.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
@@ -1,6 +1,9 @@
 import asyncio
 from dotenv import load_dotenv
-from agents import Agent, Runner
+from agents import Agent, InputGuardrailTripwireTriggered, Runner
+
+from inputGuardrails import REFUSAL, fast_input_guardrail, forget_blocked_input
+from modelClient import install_shared_client
 
 # Loading the .env variables from the .env file
 load_dotenv()
@@ -33,6 +36,7 @@ triage_agent = Agent(
 
    Always be polite and helpful, and ensure a smooth transition when handing off to specialists.""",
     handoffs=[billing_agent, technical_agent],  # Direct handoff to specialist agents
+    input_guardrails=[fast_input_guardrail],  # Local checks (blocklist, PII, length) alongside the first model call
 )
 
 
@@ -40,8 +44,14 @@ triage_agent = Agent(
 # Function takes in the user request (Hard coded at the moment)
 # The function then runs the triage_agent to determine the following actions.
 # Eg, pass the user to a more specialised agent
-async def handle_customer_request(request):
-    result = await Runner.run(triage_agent, request)
+# Pass a session (eg, SessionStore(...).session(customer_id) from conversationSessions.py) to carry on a conversation
+async def handle_customer_request(request, session=None):
+    try:
+        result = await Runner.run(triage_agent, request, session=session)
+    except InputGuardrailTripwireTriggered:
+        await forget_blocked_input(session, request)
+        print(REFUSAL)
+        return
     print(result.final_output)
 
 
@@ -57,4 +67,6 @@ general_inquiry = "What are your business hours?"
 # Stating the runtime when the file is run
 # asycio ensures that the application will run asynchronously
 if __name__ == '__main__':
+    # One pooled HTTP client shared by every agent in this process (see modelClient.py)
+    install_shared_client()
     asyncio.run(handle_customer_request(technical_inquiry))
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import re
+import textwrap
+import time
+from email import message_from_string
+from email.policy import default as default_policy
+from email.utils import getaddresses
+from typing import List, Optional, Tuple
+
+from agents import Agent, Runner
+from pydantic import BaseModel
+
+from understandingAgentOutputs import EmailData, Meeting, Person, Task, email_extractor
+
+# email_extractor asks the LLM to recover sender, recipients and subject, but those are sitting in the RFC 822
+# headers, which Python's email package parses for free. The hybrid extractor:
+# 1. fills subject, sender and recipients (To + CC) locally from the headers
+# 2. regex-detects meeting dates / times / locations / durations in the body
+# 3. sends ONLY the body to the LLM, with a reduced schema (no subject / sender / recipients, and no meetings
+#    when the regexes already found them)
+# 4. merges everything back into a normal EmailData
+
+# "Friday, June 15th", "June 15", "15 June", "2024-06-15", "15/06/2024", "next Monday", "tomorrow"
+DATE_PATTERN = re.compile(
+    r"\b(?:(?:next |this )?(?:Mon|Tues|Wednes|Thurs|Fri|Satur|Sun)day(?:,? (?=[A-Z0-9]))?)?"
+    r"(?:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? \d{1,2}(?:st|nd|rd|th)?"
+    r"|\d{1,2}(?:st|nd|rd|th)? (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*"
+    r"|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})?"
+    r"|\b(?:next |this )?(?:Mon|Tues|Wednes|Thurs|Fri|Satur|Sun)day\b|\btomorrow\b",
+    re.IGNORECASE,
+)
+TIME_PATTERN = re.compile(r"\b\d{1,2}(?::\d{2})? ?(?:AM|PM|am|pm)\b|\b[01]?\d:[0-5]\d\b|\b2[0-3]:[0-5]\d\b")
+DURATION_PATTERN = re.compile(r"\b(?:about |around )?(\d+(?:\.\d+)? ?(?:hours?|hrs?|minutes?|mins?))\b", re.IGNORECASE)
+LOCATION_PATTERN = re.compile(
+    r"\b(?:in|at) (?:the )?((?:[A-Z][\w-]* ?)+(?:Room|Studio|Office|Hall|Suite|Lounge)(?: [A-Z0-9]\b)?)"
+    r"|\bover (video call|zoom|teams|google meet|the phone)\b",
+    re.IGNORECASE,
+)
+MEETING_WORDS = re.compile(r"\b(?:meet|meeting|call|sync|review|catch[- ]up|session)\b", re.IGNORECASE)
+
+
+class BodyExtraction(BaseModel):
+    sender_role: Optional[str]  # Usually only in the signature, so the LLM still has to find it
+    main_points: List[str]
+    tasks: List[Task]
+    next_steps: Optional[str]
+
+
+class BodyExtractionWithMeetings(BodyExtraction):
+    meetings: List[Meeting]
+
+
+_body_instructions = """You are an assistant that extracts structured information from the BODY of an email.
+   The subject, sender and recipients have already been extracted, so only identify:
+   - The sender's role, if their signature mentions it
+   - Main points
+   - Tasks or action items (with assignees, deadlines and priorities)
+   - Next steps or follow-ups
+   {meetings}
+   If something is unclear or not mentioned, leave those fields empty rather than making assumptions.
+   """
+
+body_extractor = Agent(
+    name="Email Body Extractor",
+    instructions=_body_instructions.format(meetings=""),
+    output_type=BodyExtraction,
+)
+
+body_extractor_with_meetings = Agent(
+    name="Email Body Extractor",
+    instructions=_body_instructions.format(meetings="- Meetings (dates, times, locations, durations)"),
+    output_type=BodyExtractionWithMeetings,
+)
+
+
+def parse_email(email_text: str):
+    # sample_email (and emails pasted into prompts) are often indented -> headers must start at column 0
+    return message_from_string(textwrap.dedent(email_text).strip() + "\n", policy=default_policy)
+
+
+def people_from_header(values: List[str]) -> List[Person]:
+    return [Person(name=name or address, role=None, contact=address or None)
+            for name, address in getaddresses(values) if name or address]
+
+
+def message_body(message) -> str:
+    if message.is_multipart():
+        part = message.get_body(preferencelist=("plain", "html"))
+        return part.get_content() if part else ""
+    return message.get_content()
+
+
+def detect_meetings(body: str) -> List[Meeting]:
+    """Find sentences that mention a meeting together with a date and a time."""
+    meetings = []
+    sentences = re.split(r"(?<=[.!?])\s+|\n{2,}", body)
+    for index, sentence in enumerate(sentences):
+        if not MEETING_WORDS.search(sentence):
+            continue
+        dates = [match.group(0).strip(" ,") for match in DATE_PATTERN.finditer(sentence) if match.group(0).strip(" ,")]
+        times = TIME_PATTERN.findall(sentence)
+        if not dates or not times:
+            continue
+        location = LOCATION_PATTERN.search(sentence)
+        # "The meeting should last about 1.5 hours" is often the sentence after the date / time
+        duration = DURATION_PATTERN.search(" ".join(sentences[index:index + 2]))
+        meetings.append(Meeting(
+            date=max(dates, key=len),  # "Friday, June 15th" rather than just "Friday"
+            time=times[0],
+            location=(location.group(1) or location.group(2)).strip() if location else None,
+            duration=duration.group(1) if duration else None,
+        ))
+    return meetings
+
+
+async def extract_email_hybrid(email_text: str) -> Tuple[EmailData, Optional[object]]:
+    """Returns the merged EmailData and the RunResult of the (body-only) LLM call."""
+    message = parse_email(email_text)
+    if not message["From"]:
+        # No headers to parse -> nothing to save, use the normal extractor
+        result = await Runner.run(email_extractor, f"Please extract information from this email:\n\n{email_text}")
+        return result.final_output, result
+
+    senders = people_from_header(message.get_all("From", []))
+    recipients = people_from_header(message.get_all("To", []) + message.get_all("Cc", []))
+    body = message_body(message)
+    meetings = detect_meetings(body)
+
+    agent = body_extractor if meetings else body_extractor_with_meetings
+    result = await Runner.run(agent, f"Please extract information from this email body:\n\n{body}")
+    extracted = result.final_output
+
+    sender = senders[0] if senders else Person(name="", role=None, contact=None)
+    sender.role = extracted.sender_role
+    return EmailData(
+        subject=str(message["Subject"] or ""),
+        sender=sender,
+        recipients=recipients,
+        main_points=extracted.main_points,
+        meetings=meetings or getattr(extracted, "meetings", []),
+        tasks=extracted.tasks,
+        next_steps=extracted.next_steps,
+    ), result
+
+
+def _normalise(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def parity(full: EmailData, hybrid: EmailData) -> dict:
+    """Field-by-field comparison of the full-LLM and hybrid extractions."""
+    return {
+        "subject": _normalise(full.subject) == _normalise(hybrid.subject),
+        "sender": _normalise(full.sender.contact or full.sender.name) in
+                  (_normalise(hybrid.sender.contact), _normalise(hybrid.sender.name)),
+        "recipients": {_normalise(p.contact or p.name) for p in full.recipients}
+                      <= {_normalise(p.contact) for p in hybrid.recipients} | {_normalise(p.name) for p in hybrid.recipients},
+        "meetings": len(full.meetings) == len(hybrid.meetings),
+        "tasks": len(full.tasks) == len(hybrid.tasks),
+    }
+
+
+async def benchmark(fixture_dir: str = os.path.join("fixtures", "emails")):
+    totals = {"full": [0, 0, 0.0], "hybrid": [0, 0, 0.0]}  # input tokens, output tokens, seconds
+    matches, fields = 0, 0
+
+    for name in sorted(os.listdir(fixture_dir)):
+        with open(os.path.join(fixture_dir, name)) as f:
+            email_text = f.read()
+
+        start = time.perf_counter()
+        full = await Runner.run(email_extractor, f"Please extract information from this email:\n\n{email_text}")
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hybrid, hybrid_result = await extract_email_hybrid(email_text)
+        hybrid_seconds = time.perf_counter() - start
+
+        for key, result, seconds in (("full", full, full_seconds), ("hybrid", hybrid_result, hybrid_seconds)):
+            usage = result.context_wrapper.usage
+            totals[key][0] += usage.input_tokens
+            totals[key][1] += usage.output_tokens
+            totals[key][2] += seconds
+
+        checks = parity(full.final_output, hybrid)
+        matches += sum(checks.values())
+        fields += len(checks)
+        print(f"{name}: full {full_seconds:.2f}s, hybrid {hybrid_seconds:.2f}s, "
+              f"mismatches: {[field for field, ok in checks.items() if not ok] or 'none'}")
+
+    for key, (input_tokens, output_tokens, seconds) in totals.items():
+        print(f"{key:>6}: {input_tokens} input tokens, {output_tokens} output tokens, {seconds:.2f}s")
+    saved_tokens = sum(totals["full"][:2]) - sum(totals["hybrid"][:2])
+    print(f"Saved {saved_tokens} tokens ({saved_tokens / max(sum(totals['full'][:2]), 1):.0%}) and "
+          f"{totals['full'][2] - totals['hybrid'][2]:.2f}s; parity {matches}/{fields} fields")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from agents import Agent, FunctionTool, RunConfig, Runner, function_tool
+from dotenv import load_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+
+from standInModel import StandInModelProvider
+from toolOffload import ToolExecutor, offload_agent
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# How many customers at once can the triage -> billing / technical / business information graph take?
+# This drives the agents in handoffs.py, appriseMarketAgent.py and passingDataDuringCustomHandoffs.py with
+# simulated customers, without touching the network:
+# - open loop: new customers arrive at --rate per second (Poisson) whether or not earlier ones are done, so a slow
+#   system builds a queue instead of quietly slowing the test down
+# - personas: scripted multi-turn conversations (with think time between turns), some of them streamed
+# - the model is standInModel.StandInModel with a log-normal time to first token, the Mongo tools are stand-ins
+#   that block for a Mongo-like time on a toolOffload.ToolExecutor
+# - measured: turn latency / time to first token percentiles, throughput, event loop lag, memory per live session
+# Results are written to loadTestResults/<label>.json and compared with loadTestResults/baseline.json (the
+# checked-in reference run, refresh it with --label baseline). Only runs with the same options are compared, and a
+# baseline from another machine gets a warning.
+
+RESULTS_DIR = "loadTestResults"
+BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+
+class Persona:
+    def __init__(self, name: str, graph: str, turns: List[str], streamed: bool = False, weight: int = 1):
+        self.name = name
+        self.graph = graph  # Key into build_graphs()
+        self.turns = turns
+        self.streamed = streamed
+        self.weight = weight
+
+
+PERSONAS = [
+    Persona("double charged", "handoffs", [
+        "I was charged twice for my subscription last month. Can I get a refund?",
+        "It was the payment on the 3rd, card ending 4242.",
+        "Thanks, how long will the refund take?",
+    ], weight=3),
+    Persona("crashing app", "handoffs", [
+        "The app keeps crashing when I try to upload photos. How can I fix this?",
+        "I tried reinstalling, it still shows an error.",
+    ], streamed=True, weight=3),
+    Persona("listing browser", "apprise", [
+        "Okay, do you have any listing recommendations from the marketplace?",
+        "How many listings are there at the moment?",
+        "Which listing is the most popular?",
+    ], weight=2),
+    Persona("apprise billing", "apprise", [
+        "I need a refund for a payment on my booking.",
+    ], streamed=True, weight=1),
+    Persona("premium escalation", "escalation", [
+        "Hi, I am a Premium user, but I am unable to gain access to the Premium account features.",
+        "This is urgent, I have a client meeting tomorrow.",
+    ], weight=1),
+]
+
+
+def stand_in_tool(tool: FunctionTool, median: float, rng: random.Random) -> FunctionTool:
+    """Same name and description as the real (Mongo) tool, blocks for a log-normal time instead."""
+    def lookup() -> str:
+        time.sleep(rng.lognormvariate(0, 0.5) * median)
+        return f"Stand-in result for {tool.name}"
+
+    return function_tool(lookup, name_override=tool.name, description_override=tool.description)
+
+
+def replace_tools(agent: Agent, replace, _done: Optional[dict] = None) -> Agent:
+    done = {} if _done is None else _done
+    if id(agent) in done:
+        return done[id(agent)]
+    copy = done[id(agent)] = agent.clone()
+    copy.tools = [replace(tool) if isinstance(tool, FunctionTool) else tool for tool in agent.tools]
+    copy.handoffs = [replace_tools(h, replace, done) if isinstance(h, Agent) else h for h in agent.handoffs]
+    return copy
+
+
+def build_graphs(executor: ToolExecutor, mongo_latency: float, seed: int) -> Dict[str, Agent]:
+    from appriseMarketplace.appriseMarketAgent import triage_agent as apprise_triage_agent
+    from handoffs import triage_agent
+    from passingDataDuringCustomHandoffs import service_agent
+
+    rng = random.Random(seed)
+    apprise = replace_tools(apprise_triage_agent, lambda tool: stand_in_tool(tool, mongo_latency, rng))
+    return {
+        "handoffs": triage_agent,
+        "apprise": offload_agent(apprise, executor),
+        "escalation": service_agent,
+    }
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class LoadTest:
+    def __init__(self, graphs: Dict[str, Agent], run_config: RunConfig, rate: float, duration: float,
+                 think_time: float, seed: int):
+        self.graphs = graphs
+        self.run_config = run_config
+        self.rate = rate
+        self.duration = duration
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.turn_latencies: List[float] = []
+        self.first_token: List[float] = []
+        self.loop_lag: List[float] = []
+        self.memory_per_session: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.error_examples: Dict[str, str] = {}  # The first message seen for each error type
+        self.live_sessions = 0
+        self.peak_sessions = 0
+        self.sessions_done = 0
+        self.turns_done = 0
+
+    async def customer(self, persona: Persona):
+        self.live_sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.live_sessions)
+        agent, history = self.graphs[persona.graph], []
+        try:
+            for index, turn in enumerate(persona.turns):
+                if index:
+                    await asyncio.sleep(self.random.expovariate(1 / self.think_time))
+                history.append({"role": "user", "content": turn})
+                start = time.perf_counter()
+                if persona.streamed:
+                    result = Runner.run_streamed(agent, history, run_config=self.run_config)
+                    first = None
+                    async for event in result.stream_events():
+                        if (first is None and event.type == "raw_response_event"
+                                and isinstance(event.data, ResponseTextDeltaEvent)):
+                            first = time.perf_counter() - start
+                            self.first_token.append(first)
+                else:
+                    result = await Runner.run(agent, history, run_config=self.run_config)
+                self.turn_latencies.append(time.perf_counter() - start)
+                self.turns_done += 1
+                # Carry on with whoever the conversation was handed to
+                agent, history = result.last_agent, result.to_input_list()
+            self.sessions_done += 1
+        except Exception as error:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+            self.error_examples.setdefault(name, str(error)[:500])
+        finally:
+            self.live_sessions -= 1
+
+    async def monitor(self, interval: float = 0.01):
+        baseline = tracemalloc.get_traced_memory()[0]
+        samples = 0
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(time.perf_counter() - start - interval)
+            samples += 1
+            if samples % 10 == 0 and self.live_sessions:
+                self.memory_per_session.append((tracemalloc.get_traced_memory()[0] - baseline) / self.live_sessions)
+
+    async def run(self) -> dict:
+        personas = [p for p in PERSONAS for _ in range(p.weight)]
+        monitor = asyncio.create_task(self.monitor())
+        customers = []
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival - start < self.duration:
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            customers.append(asyncio.create_task(self.customer(self.random.choice(personas))))
+            next_arrival += self.random.expovariate(self.rate)
+        arrivals_done = time.perf_counter()
+        await asyncio.gather(*customers)
+        elapsed = time.perf_counter() - start
+        monitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await monitor
+        return {
+            "arrivals": len(customers),
+            "arrival_rate": len(customers) / (arrivals_done - start),
+            "sessions_completed": self.sessions_done,
+            "turns_completed": self.turns_done,
+            "turns_per_second": self.turns_done / elapsed,
+            "drain_seconds": elapsed - (arrivals_done - start),
+            "peak_live_sessions": self.peak_sessions,
+            "errors": self.errors,
+            "error_examples": self.error_examples,
+            "turn_latency_ms": {f"p{p}": percentile(self.turn_latencies, p) * 1000 for p in (50, 90, 99, 100)},
+            "first_token_ms": {f"p{p}": percentile(self.first_token, p) * 1000 for p in (50, 90, 99)},
+            "loop_lag_ms": {f"p{p}": percentile(self.loop_lag, p) * 1000 for p in (50, 99, 100)},
+            "memory_per_session_kb": percentile(self.memory_per_session, 50) / 1024,
+        }
+
+
+# Options that don't change what's measured
+NOT_COMPARED = {"label", "baseline"}
+
+
+def compare(record: dict, baseline: dict) -> bool:
+    """Prints the change from the baseline run, if it was run with the same options (False if it wasn't)."""
+    different = {key: (baseline["config"].get(key), value) for key, value in record["config"].items()
+                 if key not in NOT_COMPARED and baseline["config"].get(key) != value}
+    if different:
+        print(f"Not comparing with {baseline['label']}, it was run with different options:")
+        for key, (old, new) in sorted(different.items()):
+            print(f"  --{key.replace('_', '-')}: {old} there, {new} here")
+        return False
+    if baseline.get("machine") != record["machine"]:
+        print(f"Warning: {baseline['label']} was recorded on a different machine ({baseline.get('machine')})")
+
+    results = record["results"]
+    print(f"Compared with {baseline['label']} ({baseline['recorded']}):")
+    rows = [("turns/s", "turns_per_second", None)]
+    rows += [(f"turn latency {p}", "turn_latency_ms", p) for p in ("p50", "p99")]
+    rows += [(f"first token {p}", "first_token_ms", p) for p in ("p50", "p99")]
+    rows += [(f"loop lag {p}", "loop_lag_ms", p) for p in ("p50", "p99")]
+    rows += [("memory/session KB", "memory_per_session_kb", None)]
+    for label, key, sub in rows:
+        old = baseline["results"][key] if sub is None else baseline["results"][key][sub]
+        new = results[key] if sub is None else results[key][sub]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"  {label:>20}: {old:10.1f} -> {new:10.1f} ({change:+.1f}%)")
+    return True
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulated-customer load test for the agent handoff graphs")
+    parser.add_argument("--rate", type=float, default=8, help="new customers per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of arrivals")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a customer's turns")
+    parser.add_argument("--model-latency", type=float, default=0.4, help="median time to first token (seconds)")
+    parser.add_argument("--model-sigma", type=float, default=0.5, help="log-normal sigma of the time to first token")
+    parser.add_argument("--seconds-per-token", type=float, default=0.01)
+    parser.add_argument("--mongo-latency", type=float, default=0.02, help="median stand-in Mongo call (seconds)")
+    parser.add_argument("--tool-threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default="latest")
+    parser.add_argument("--baseline", default=BASELINE, help="an earlier results file to compare against")
+    args = parser.parse_args()
+
+    executor = ToolExecutor(max_workers=args.tool_threads, default_timeout=10)
+    graphs = build_graphs(executor, args.mongo_latency, args.seed)
+    run_config = RunConfig(model_provider=StandInModelProvider(latency=args.model_latency,
+                                                               seconds_per_token=args.seconds_per_token,
+                                                               latency_sigma=args.model_sigma, seed=args.seed),
+                           tracing_disabled=True)
+    test = LoadTest(graphs, run_config, args.rate, args.duration, args.think_time, args.seed)
+    print(f"{args.rate} customers/s for {args.duration}s...")
+    tracemalloc.start()
+    # process_escalation prints every escalation, which would drown the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = await test.run()
+    tracemalloc.stop()
+    executor.shutdown()
+
+    print(json.dumps(results, indent=2))
+    record = {"label": args.label, "recorded": time.strftime("%Y-%m-%d %H:%M:%S"), "config": vars(args),
+              "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                          "cpus": os.cpu_count()},
+              "results": results}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.label}.json")
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    print(f"Saved to {path}")
+    if args.baseline and os.path.exists(args.baseline) and os.path.abspath(args.baseline) != os.path.abspath(path):
+        with open(args.baseline) as f:
+            compare(record, json.load(f))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
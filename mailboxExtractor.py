@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import mailbox
+import os
+import sqlite3
+import time
+import uuid
+from typing import Awaitable, Callable, Iterator, Optional, Tuple
+
+from understandingAgentOutputs import EmailData, extract_email
+
+# process_email only ever handles the one hard-coded sample_email. This runs the same extraction over whole
+# mailboxes (hundreds of thousands of messages) without the memory growing with the mailbox size:
+# - messages are streamed one at a time from mbox / Maildir / JSONL with generators
+# - duplicates are skipped by content hash, and the hashes live in SQLite (not in a Python set)
+# - extractions run with bounded concurrency and a requests-per-minute rate limit
+# - validated EmailData records are written to JSONL (or Parquet, if pyarrow is installed) as they finish
+# - the SQLite checkpoint means a stopped run can be restarted and carries on where it left off
+
+# pyarrow is optional -> only needed for --format parquet
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def iter_messages(path: str) -> Iterator[str]:
+    """Yield the raw text of each message in an mbox file, a Maildir directory or a JSONL file."""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get("raw") or record.get("text") or record.get("body") or ""
+        return
+
+    box = mailbox.Maildir(path, factory=None, create=False) if os.path.isdir(path) else mailbox.mbox(path, create=False)
+    try:
+        for message in box.itervalues():
+            yield message.as_string()
+    finally:
+        box.close()
+
+
+def message_hash(text: str) -> str:
+    # Whitespace differences (eg, the same email exported twice) shouldn't count as a new message
+    return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    Tracks every message hash in SQLite: `pending` while it's being extracted, `done` once its record is written.
+    Rows left `pending` by a run that was stopped are picked up again by the next run.
+    """
+
+    def __init__(self, path: str, commit_every: int = 100):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS messages (
+            hash TEXT PRIMARY KEY, status TEXT NOT NULL, run_id TEXT NOT NULL, error TEXT)""")
+        self.db.commit()
+        self.run_id = uuid.uuid4().hex
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        # Called before every commit (the writer's flush), so `done` is never committed ahead of the record
+        # (for Parquet, ahead of the complete part file holding it)
+        self.before_commit: Optional[Callable[[], None]] = None
+
+    def claim(self, digest: str) -> bool:
+        """True if this message should be processed now (new, or left pending/failed by an earlier run)."""
+        row = self.db.execute("SELECT status, run_id FROM messages WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO messages (hash, status, run_id) VALUES (?, 'pending', ?)", (digest, self.run_id))
+        elif row[0] == "done" or row[1] == self.run_id:
+            return False  # Already extracted, or a duplicate of a message earlier in this run
+        else:
+            self.db.execute("UPDATE messages SET status = 'pending', run_id = ? WHERE hash = ?", (self.run_id, digest))
+        self._tick()
+        return True
+
+    def finish(self, digest: str, error: Optional[str] = None):
+        self.db.execute("UPDATE messages SET status = ?, error = ? WHERE hash = ?",
+                        ("failed" if error else "done", error, digest))
+        self._tick()
+
+    def _tick(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        if self.before_commit:
+            self.before_commit()
+        self.db.commit()
+        self._uncommitted = 0
+
+    def counts(self) -> dict:
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall())
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        # Append mode, so a resumed run adds to the records from the earlier run
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, digest: str, record: EmailData):
+        self.file.write(json.dumps({"hash": digest, **record.model_dump()}) + "\n")
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Buffers rows, and every checkpoint commit writes them out as one complete part file (Parquet can't be appended
+    to, and a file without its footer can't be read). The file is written under a temporary name and renamed, so a
+    part file either exists whole or not at all, and only then are its rows committed as `done`.
+    """
+
+    # Nested models are stored as JSON strings so every part file has the same flat, all-string schema. It's spelt
+    # out rather than inferred, so a batch where a column happens to be all None still matches the others.
+    COLUMNS = ["hash"] + list(EmailData.model_fields)
+
+    def __init__(self, path: str):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is required for --format parquet (pip install pyarrow)")
+        base, extension = os.path.splitext(path)
+        self.prefix = f"{base}-{uuid.uuid4().hex[:8]}"
+        self.extension = extension or ".parquet"
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in self.COLUMNS])
+        self.rows = []
+        self.parts = []
+
+    def write(self, digest: str, record: EmailData):
+        row = {"hash": digest}
+        for field, value in record.model_dump().items():
+            row[field] = value if isinstance(value, str) or value is None else json.dumps(value)
+        self.rows.append(row)
+
+    def flush(self):
+        if not self.rows:
+            return
+        path = f"{self.prefix}-{len(self.parts):05d}{self.extension}"
+        temporary = path + ".tmp"
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema), temporary)
+        with open(temporary, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        self.parts.append(path)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+
+class RateLimiter:
+    """Spaces out request starts so there are at most `per_minute` per minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_start = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self.next_start > now:
+                await asyncio.sleep(self.next_start - now)
+            self.next_start = max(now, self.next_start) + self.interval
+
+
+Extractor = Callable[[str], Awaitable[EmailData]]
+
+
+async def extract_mailbox(messages: Iterator[str], writer, checkpoint: Checkpoint, extractor: Extractor = extract_email,
+                          concurrency: int = 8, requests_per_minute: float = 500, max_retries: int = 3) -> Tuple[int, int, int]:
+    rate_limiter = RateLimiter(requests_per_minute)
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+    counts = {"extracted": 0, "skipped": 0, "failed": 0}
+    checkpoint.before_commit = writer.flush
+
+    async def extract(digest: str, text: str):
+        try:
+            error = None
+            for attempt in range(max_retries):
+                await rate_limiter.wait()
+                try:
+                    record = await extractor(text)
+                    # Re-validate, in case the extractor hands back a dict / partial object
+                    record = EmailData.model_validate(record, from_attributes=True)
+                    break
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(2 ** attempt)
+            else:
+                counts["failed"] += 1
+                checkpoint.finish(digest, error)
+                return
+
+            writer.write(digest, record)
+            counts["extracted"] += 1
+            checkpoint.finish(digest)
+        finally:
+            semaphore.release()
+
+    for text in messages:
+        digest = message_hash(text)
+        if not text.strip() or not checkpoint.claim(digest):
+            counts["skipped"] += 1
+            continue
+        # Acquiring before reading the next message keeps at most `concurrency` messages in memory
+        await semaphore.acquire()
+        task = asyncio.create_task(extract(digest, text))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    await asyncio.gather(*pending)
+    checkpoint.commit()
+    return counts["extracted"], counts["skipped"], counts["failed"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Extract EmailData from every message in a mailbox")
+    parser.add_argument("mailbox", help="mbox file, Maildir directory or .jsonl file")
+    parser.add_argument("--output", default="emails.jsonl")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--checkpoint", default="emails.checkpoint.sqlite")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=500, help="Maximum extraction requests per minute")
+    args = parser.parse_args()
+
+    writer = ParquetWriter(args.output) if args.format == "parquet" else JsonlWriter(args.output)
+    # Every commit is a Parquet part file, so commit less often than for JSONL (~1000 records per file)
+    checkpoint = Checkpoint(args.checkpoint, commit_every=2000 if args.format == "parquet" else 100)
+    start = time.perf_counter()
+    try:
+        extracted, skipped, failed = await extract_mailbox(iter_messages(args.mailbox), writer, checkpoint,
+                                                           concurrency=args.concurrency,
+                                                           requests_per_minute=args.rpm)
+    finally:
+        totals = checkpoint.counts()
+        # Closing the checkpoint flushes the writer one last time, so close it first
+        checkpoint.close()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Extracted {extracted}, skipped {skipped} (duplicates / already done), failed {failed} "
+          f"in {elapsed:.1f}s. Checkpoint totals: {totals}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import re
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents import FunctionTool, Model, ModelProvider, ModelResponse, MultiProvider, RunConfig, Runner, Usage
+from dotenv import load_dotenv
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# Every agent is pinned to gpt-4.1-mini (gpt-4o-mini for voice), whether it's "What are your business hours?" or a
+# multi-step booking dispute. CascadeModelProvider picks the model for each turn instead:
+# - score the turn locally (no extra model call): length, number of questions / steps, intent keywords, whether
+#   the agent's tools look needed, how long the conversation is -> start at the cheapest tier that should cope
+# - check the answer: structured output must validate, tool calls must name a real tool with valid JSON
+#   arguments, and the text must pass a confidence check (no "I'm not sure", not suspiciously short for a hard
+#   question) -> otherwise re-ask the next tier up
+# - record calls, escalations, latency and cost per tier
+# Use it with Runner.run(..., run_config=RunConfig(model_provider=CascadeModelProvider())).
+# Streamed turns can't be taken back once they've been sent, so below the top tier the first STREAM_HOLDBACK
+# characters (or the whole answer, if it's shorter / structured output / a tool call) are held back and checked
+# before anything is passed on. A bad start is escalated like a bad whole answer; once text is flowing it isn't.
+
+
+class ModelTier:
+    def __init__(self, name: str, model: str, input_per_million: float, output_per_million: float):
+        self.name = name
+        self.model = model
+        self.input_per_million = input_per_million  # USD
+        self.output_per_million = output_per_million
+
+    def cost(self, usage) -> float:
+        return (usage.input_tokens * self.input_per_million + usage.output_tokens * self.output_per_million) / 1e6
+
+
+DEFAULT_TIERS = [
+    ModelTier("fast", "gpt-4.1-nano", 0.10, 0.40),
+    ModelTier("standard", "gpt-4.1-mini", 0.40, 1.60),
+    ModelTier("strong", "gpt-4.1", 2.00, 8.00),
+]
+
+COMPLEX_INTENTS = ("dispute", "refund", "charged twice", "complaint", "cancel", "cancellation", "compensation",
+                   "legal", "escalate", "compare", "explain why", "not working", "multiple", "marketing email")
+SIMPLE_INTENTS = ("hours", "hello", "hi ", "thanks", "thank you", "what is", "where is", "how many")
+# Characters of a streamed answer held back for the check (about one spoken sentence)
+STREAM_HOLDBACK = 80
+
+LOW_CONFIDENCE = ("i'm not sure", "i am not sure", "i don't know", "i do not know", "i cannot help",
+                  "i can't help", "unable to determine", "as an ai")
+
+
+def _text_of(item: Any) -> str:
+    content = item.get("content", "") if isinstance(item, dict) else ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def latest_request(input) -> str:
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user":
+            return _text_of(item)
+    return ""
+
+
+def complexity_score(input, tools: list) -> int:
+    """0 = trivial ... 5+ = hard. Only cheap string checks, so it costs microseconds per turn."""
+    text = latest_request(input)
+    lowered = text.lower()
+    score = 0
+    tokens = len(text) // 4
+    score += 0 if tokens < 40 else 1 if tokens < 200 else 2
+    score += min(2, max(0, text.count("?") - 1))  # Several questions in one turn
+    score += min(2, len(re.findall(r"\b(and then|then|also|after that|as well as)\b|^\s*\d+[.)]", lowered,
+                                   flags=re.MULTILINE)))
+    score += sum(2 for intent in COMPLEX_INTENTS if intent in lowered)
+    if any(intent in f" {lowered} " for intent in SIMPLE_INTENTS) and tokens < 40:
+        score -= 1
+    # Tool need: the request talks about what a tool does
+    words = set(re.findall(r"[a-z]{4,}", lowered))
+    if any(words & set(re.findall(r"[a-z]{4,}", f"{t.name} {t.description}".lower()))
+           for t in tools if isinstance(t, FunctionTool)):
+        score += 1
+    if not isinstance(input, str) and len(input) > 12:  # Long conversation so far
+        score += 1
+    return max(0, score)
+
+
+def starting_tier(score: int) -> int:
+    return 0 if score <= 1 else 1 if score <= 3 else 2
+
+
+def check_response(response: ModelResponse, output_schema, tools: list, handoffs: list, score: int) -> Optional[str]:
+    """None if the answer looks fine, otherwise why it should be escalated."""
+    names = {t.name for t in tools if hasattr(t, "name")} | {h.tool_name for h in handoffs}
+    texts = []
+    for item in response.output:
+        if isinstance(item, ResponseFunctionToolCall):
+            if item.name not in names:
+                return f"called unknown tool {item.name}"
+            try:
+                json.loads(item.arguments or "{}")
+            except ValueError:
+                return f"invalid arguments for {item.name}"
+        elif isinstance(item, ResponseOutputMessage):
+            texts.extend(part.text for part in item.content if hasattr(part, "text"))
+    if not texts:
+        return None if response.output else "empty response"
+
+    text = "".join(texts)
+    if output_schema is not None and not output_schema.is_plain_text():
+        try:
+            output_schema.validate_json(text)
+        except Exception as error:
+            return f"output failed validation: {str(error)[:80]}"
+        return None
+    if score >= 2 and len(text) < 40:
+        return "answer too short for the question"
+    return check_text_start(text)
+
+
+def check_text_start(text: str) -> Optional[str]:
+    """The part of the check that works on the start of an answer (all a streamed answer has before it's sent)."""
+    lowered = text.lower()
+    if any(phrase in lowered for phrase in LOW_CONFIDENCE):
+        return "low confidence answer"
+    return None
+
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.started_here = 0
+        self.escalated_from = 0
+        self.latencies: List[float] = []
+        self.cost = 0.0
+
+
+class CascadeModel(Model):
+    def __init__(self, provider: "CascadeModelProvider"):
+        self.provider = provider
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs) -> ModelResponse:
+        provider = self.provider
+        score = complexity_score(input, tools)
+        tier_index = starting_tier(score)
+        provider.stats[provider.tiers[tier_index].name].started_here += 1
+        while True:
+            tier = provider.tiers[tier_index]
+            stats = provider.stats[tier.name]
+            start = time.perf_counter()
+            response = await provider.model_for(tier).get_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs)
+            stats.calls += 1
+            stats.latencies.append(time.perf_counter() - start)
+            stats.cost += tier.cost(response.usage)
+
+            problem = check_response(response, output_schema, tools, handoffs, score)
+            if problem is None or tier_index == len(provider.tiers) - 1:
+                return response
+            stats.escalated_from += 1
+            if provider.verbose:
+                print(f"[cascade] {tier.name} -> {provider.tiers[tier_index + 1].name}: {problem}")
+            tier_index += 1
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, **kwargs) -> AsyncIterator[Any]:
+        provider = self.provider
+        score = complexity_score(input, tools)
+        tier_index = starting_tier(score)
+        provider.stats[provider.tiers[tier_index].name].started_here += 1
+        structured = output_schema is not None and not output_schema.is_plain_text()
+        while True:
+            tier = provider.tiers[tier_index]
+            stats = provider.stats[tier.name]
+            stats.calls += 1
+            start = time.perf_counter()
+            # The top tier has nobody to escalate to, so it streams straight through
+            held, text, released, problem = [], "", tier_index == len(provider.tiers) - 1, None
+            stream = provider.model_for(tier).stream_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs)
+            async for event in stream:
+                if event.type == "response.completed" and event.response.usage is not None:
+                    usage = event.response.usage
+                    stats.cost += (usage.input_tokens * tier.input_per_million
+                                   + usage.output_tokens * tier.output_per_million) / 1e6
+                if released:
+                    yield event
+                    continue
+
+                held.append(event)
+                if event.type == "response.output_text.delta":
+                    text += event.delta
+                    problem = check_text_start(text)
+                elif event.type == "response.completed":
+                    problem = check_response(ModelResponse(output=event.response.output, usage=Usage(),
+                                                           response_id=None), output_schema, tools, handoffs, score)
+                if problem is not None:
+                    break
+                if len(text) >= STREAM_HOLDBACK and not structured:
+                    released = True
+                    for held_event in held:
+                        yield held_event
+            stats.latencies.append(time.perf_counter() - start)
+
+            if problem is None:
+                if not released:  # The whole answer fitted in the holdback
+                    for held_event in held:
+                        yield held_event
+                return
+            await stream.aclose()
+            stats.escalated_from += 1
+            if provider.verbose:
+                print(f"[cascade] {tier.name} -> {provider.tiers[tier_index + 1].name}: {problem} (streamed)")
+            tier_index += 1
+
+
+class CascadeModelProvider(ModelProvider):
+    def __init__(self, tiers: Optional[List[ModelTier]] = None, real_provider: Optional[ModelProvider] = None,
+                 verbose: bool = False):
+        self.tiers = tiers or DEFAULT_TIERS
+        self.real_provider = real_provider or MultiProvider()
+        self.verbose = verbose
+        self.stats: Dict[str, TierStats] = {tier.name: TierStats() for tier in self.tiers}
+        self._models: Dict[str, Model] = {}
+        self._cascade = CascadeModel(self)
+
+    def model_for(self, tier: ModelTier) -> Model:
+        if tier.model not in self._models:
+            self._models[tier.model] = self.real_provider.get_model(tier.model)
+        return self._models[tier.model]
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        # The agent's pinned model is ignored: the cascade picks per turn
+        return self._cascade
+
+    def report(self):
+        total_cost = sum(s.cost for s in self.stats.values())
+        for tier in self.tiers:
+            stats = self.stats[tier.name]
+            latencies = sorted(stats.latencies) or [0.0]
+            print(f"{tier.name:>9} ({tier.model}): {stats.calls:4} calls ({stats.started_here} started here, "
+                  f"{stats.escalated_from} escalated up), latency p50 {latencies[len(latencies) // 2] * 1000:6.0f}ms "
+                  f"p95 {latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000:6.0f}ms, "
+                  f"cost ${stats.cost:.5f} ({stats.cost / total_cost * 100 if total_cost else 0:.0f}%)")
+
+
+SAMPLE_REQUESTS = [
+    "What are your business hours?",
+    "Hello! How many listings do you have?",
+    "I was charged twice for my booking last month and the host cancelled. Can I get a refund and compensation, "
+    "and then also explain why the cancellation policy didn't protect me?",
+    "The app keeps crashing when I try to upload photos. How can I fix this?",
+    "Okay, do you have any listing recommendations from the marketplace?",
+    "I have a technical problem with the app: it shows an error when I upload photos and then logs me out. "
+    "How do I fix it, and will I lose my drafts?",
+    "I'd like to compare two listings for my trip and then book the cheaper one. Which is better?",
+]
+
+
+async def main():
+    from appriseMarketplace.appriseMarketAgent import triage_agent
+
+    provider = CascadeModelProvider(verbose=True)
+    for request in SAMPLE_REQUESTS:
+        result = await Runner.run(triage_agent, request, run_config=RunConfig(model_provider=provider))
+        print(f"{request[:50]!r} -> {result.last_agent.name}: {str(result.final_output)[:80]!r}")
+    provider.report()
+
+
+async def benchmark(requests: int = 200):
+    from standInModel import StandInModelProvider
+
+    from handoffs import triage_agent
+
+    # Stand-in tiers: faster / cheaper models are less reliable on hard requests
+    def unreliable(threshold: int):
+        def script(system_instructions, input, tools, handoffs):
+            if not handoffs and complexity_score(input, tools) >= threshold:
+                return "I'm not sure."
+            return None  # Otherwise behave normally
+        return script
+
+    stand_in = {
+        "gpt-4.1-nano": StandInModelProvider(latency=0.02, seconds_per_token=0.0005, script=unreliable(1)).model,
+        "gpt-4.1-mini": StandInModelProvider(latency=0.05, seconds_per_token=0.001, script=unreliable(3)).model,
+        "gpt-4.1": StandInModelProvider(latency=0.15, seconds_per_token=0.002).model,
+    }
+
+    class StandInTiers(ModelProvider):
+        def __init__(self, pinned: Optional[str] = None):
+            self.pinned = pinned
+
+        def get_model(self, model_name):
+            return stand_in[self.pinned or model_name]
+
+    pinned_provider = StandInTiers(pinned="gpt-4.1-mini")
+    cascade = CascadeModelProvider(real_provider=StandInTiers())
+    for label, provider in (("pinned to gpt-4.1-mini", pinned_provider), ("cascade", cascade)):
+        latencies, cost, unsure = [], 0.0, 0
+        for i in range(requests):
+            start = time.perf_counter()
+            result = await Runner.run(triage_agent, SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)],
+                                      run_config=RunConfig(model_provider=provider, tracing_disabled=True))
+            latencies.append(time.perf_counter() - start)
+            unsure += any(phrase in str(result.final_output).lower() for phrase in LOW_CONFIDENCE)
+            if provider is pinned_provider:
+                cost += sum(DEFAULT_TIERS[1].cost(response.usage) for response in result.raw_responses)
+        if provider is cascade:
+            cost = sum(stats.cost for stats in cascade.stats.values())
+        latencies.sort()
+        print(f"{label}: p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms, cost ${cost:.4f}, "
+              f"{unsure} low confidence final answers")
+    cascade.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
@@ -0,0 +1,436 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from agents import FunctionTool, Model, ModelProvider, ModelResponse, MultiProvider, RunConfig, Runner, Usage
+from agents.mcp import MCPServer
+from dotenv import load_dotenv
+from mcp.types import CallToolResult, GetPromptResult, ListPromptsResult, TextContent, Tool as MCPTool
+from openai.types.responses import ResponseOutputItem, ResponseStreamEvent
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+from pydantic import BaseModel, TypeAdapter
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# None of the scripts run without live OpenAI access, so they can't be benchmarked in CI and a slow run can't be
+# reproduced. CassetteModelProvider sits between Runner and the real model provider:
+# - "record": every model call goes to the real model, and the response (or every streamed event, with its
+#   timing) is saved to a cassette file, keyed by a hash of the request
+# - "replay": no network at all, responses come back from the cassette, with the original latency, scaled,
+#   or a fixed latency
+# - "auto": replay what's in the cassette and record anything that isn't
+# Pass it in with Runner.run(..., run_config=RunConfig(model_provider=provider)).
+# The cassettes in cassettes/ say what recorded them: "openai" (--record) or "standInModel" (--record --stand-in,
+# no API key needed, so the replay benchmark and tests have something to run; the timings are the stand-in's).
+# The MCP scenarios use StubMCPServer instead of the MongoDB / weather servers, so replaying them needs no npx, uvx
+# or database, and the tool results (which end up in the next request) are the same every time.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CASSETTE_DIR = os.path.join(ROOT, "cassettes")
+
+_output_item = TypeAdapter(ResponseOutputItem)
+_stream_event = TypeAdapter(ResponseStreamEvent)
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def request_key(model_name: Optional[str], system_instructions, input, model_settings, tools, output_schema,
+                handoffs, stream: bool) -> str:
+    """Hash of everything that changes what the model would answer."""
+    request = {
+        "model": model_name,
+        "stream": stream,
+        "instructions": system_instructions,
+        "input": _jsonable(input),
+        "settings": model_settings.to_json_dict(),
+        "tools": [[tool.name, tool.params_json_schema] if isinstance(tool, FunctionTool) else tool.name
+                  for tool in tools],
+        "output_schema": output_schema.json_schema() if output_schema and not output_schema.is_plain_text() else None,
+        "handoffs": [handoff.tool_name for handoff in handoffs],
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class Cassette:
+    """The recorded model calls for one scenario: a JSON file with one interaction per model call, in order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: List[dict] = []
+        self.recorded_with: Optional[str] = None
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.interactions = data["interactions"]
+            self.recorded_with = data.get("recorded_with", "openai")
+        self._used = set()
+
+    def find(self, key: str, strict: bool) -> Optional[dict]:
+        for index, interaction in enumerate(self.interactions):
+            if index not in self._used and interaction["key"] == key:
+                self._used.add(index)
+                return interaction
+        if strict:
+            return None
+        # The request changed (eg, a tool returned something different this time) -> fall back to call order
+        for index, interaction in enumerate(self.interactions):
+            if index not in self._used:
+                print(f"[cassette] no exact match for {key}, replaying call {index} of {os.path.basename(self.path)}")
+                self._used.add(index)
+                return interaction
+        return None
+
+    def add(self, interaction: dict):
+        self.interactions.append(interaction)
+        self._used.add(len(self.interactions) - 1)
+        self.save()
+
+    def reset(self):
+        self.interactions = []
+        self._used = set()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"recorded_with": self.recorded_with, "interactions": self.interactions}, f, indent=1)
+            f.write("\n")
+
+
+def _usage_to_json(usage: Usage) -> dict:
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "total_tokens": usage.total_tokens,
+        "input_tokens_details": usage.input_tokens_details.model_dump(mode="json"),
+        "output_tokens_details": usage.output_tokens_details.model_dump(mode="json"),
+    }
+
+
+def _usage_from_json(usage: dict) -> Usage:
+    return Usage(
+        requests=1,
+        input_tokens=usage["input_tokens"],
+        output_tokens=usage["output_tokens"],
+        total_tokens=usage["total_tokens"],
+        input_tokens_details=InputTokensDetails.model_validate(usage["input_tokens_details"]),
+        output_tokens_details=OutputTokensDetails.model_validate(usage["output_tokens_details"]),
+    )
+
+
+class CassetteModel(Model):
+    def __init__(self, provider: "CassetteModelProvider", model_name: Optional[str]):
+        self.provider = provider
+        self.model_name = model_name
+        self._real_model: Optional[Model] = None
+
+    @property
+    def real_model(self) -> Model:
+        if self._real_model is None:
+            self._real_model = self.provider.real_provider.get_model(self.model_name)
+        return self._real_model
+
+    def _replay_interaction(self, key: str) -> Optional[dict]:
+        if self.provider.mode == "record":
+            return None
+        interaction = self.provider.cassette.find(key, self.provider.strict)
+        if interaction is None and self.provider.mode == "replay":
+            raise CassetteMiss(f"No recorded response for request {key} in {self.provider.cassette.path}. "
+                               f"Re-record it with: python modelCassettes.py --record")
+        return interaction
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs) -> ModelResponse:
+        key = request_key(self.model_name, system_instructions, input, model_settings, tools, output_schema,
+                          handoffs, stream=False)
+        interaction = self._replay_interaction(key)
+        if interaction is not None:
+            self.provider.replayed += 1
+            await asyncio.sleep(self.provider.delay(interaction["duration"]))
+            return ModelResponse(
+                output=[_output_item.validate_python(item) for item in interaction["output"]],
+                usage=_usage_from_json(interaction["usage"]),
+                response_id=None,  # The recorded id doesn't exist server side any more
+            )
+
+        start = time.perf_counter()
+        response = await self.real_model.get_response(system_instructions, input, model_settings, tools,
+                                                      output_schema, handoffs, tracing, **kwargs)
+        self.provider.recorded += 1
+        self.provider.cassette.add({
+            "key": key,
+            "model": self.model_name,
+            "duration": round(time.perf_counter() - start, 4),
+            "output": [item.model_dump(mode="json", exclude_none=True) for item in response.output],
+            "usage": _usage_to_json(response.usage),
+        })
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, **kwargs) -> AsyncIterator[Any]:
+        key = request_key(self.model_name, system_instructions, input, model_settings, tools, output_schema,
+                          handoffs, stream=True)
+        interaction = self._replay_interaction(key)
+        if interaction is not None:
+            self.provider.replayed += 1
+            elapsed = 0.0
+            for recorded in interaction["events"]:
+                # Keep the original gaps between events (scaled the same way as whole responses)
+                await asyncio.sleep(self.provider.delay(recorded["offset"] - elapsed, len(interaction["events"])))
+                elapsed = recorded["offset"]
+                yield _stream_event.validate_python(recorded["event"])
+            return
+
+        start = time.perf_counter()
+        events = []
+        async for event in self.real_model.stream_response(system_instructions, input, model_settings, tools,
+                                                           output_schema, handoffs, tracing, **kwargs):
+            events.append({"offset": round(time.perf_counter() - start, 4),
+                           "event": event.model_dump(mode="json", exclude_none=True)})
+            yield event
+        self.provider.recorded += 1
+        self.provider.cassette.add({
+            "key": key,
+            "model": self.model_name,
+            "duration": round(time.perf_counter() - start, 4),
+            "events": events,
+        })
+
+
+class CassetteModelProvider(ModelProvider):
+    def __init__(self, cassette_path: str, mode: str = "replay", latency_scale: float = 1.0,
+                 fixed_latency: Optional[float] = None, strict: bool = False,
+                 real_provider: Optional[ModelProvider] = None):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.cassette = Cassette(cassette_path)
+        self.mode = mode
+        self.latency_scale = latency_scale  # 1.0 = original timing, 0 = as fast as possible
+        self.fixed_latency = fixed_latency  # Seconds per model call, instead of the recorded timing
+        self.strict = strict  # Only replay exact request matches
+        self.real_provider = real_provider or MultiProvider()
+        if mode == "record":
+            self.cassette.reset()  # Re-recording replaces the old cassette
+        if mode != "replay":
+            self.cassette.recorded_with = "openai" if real_provider is None else \
+                type(real_provider).__module__.split(".")[0]
+        self.replayed = 0
+        self.recorded = 0
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return CassetteModel(self, model_name)
+
+    def delay(self, recorded: float, parts: int = 1) -> float:
+        if self.fixed_latency is not None:
+            return self.fixed_latency / parts
+        return max(0.0, recorded * self.latency_scale)
+
+
+class StubMCPServer(MCPServer):
+    """An MCP server that answers every tool call with a canned result, in process."""
+
+    def __init__(self, name: str, tools: Dict[str, Tuple[str, dict, str]]):
+        super().__init__()
+        self._name = name
+        self.tools = tools  # Tool name -> (description, input JSON schema, result text)
+        self.calls: List[Tuple[str, dict]] = []
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def connect(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+    async def list_tools(self, run_context=None, agent=None) -> List[MCPTool]:
+        return [MCPTool(name=name, description=description, inputSchema=schema)
+                for name, (description, schema, _) in self.tools.items()]
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict], meta: Optional[dict] = None) -> CallToolResult:
+        self.calls.append((tool_name, arguments or {}))
+        return CallToolResult(content=[TextContent(type="text", text=self.tools[tool_name][2])])
+
+    async def list_prompts(self) -> ListPromptsResult:
+        return ListPromptsResult(prompts=[])
+
+    async def get_prompt(self, name: str, arguments: Optional[dict] = None) -> GetPromptResult:
+        raise KeyError(name)
+
+
+def stub_function_tool(tool: FunctionTool, result: str) -> FunctionTool:
+    """The same tool as far as the model can tell (name, description, schema), returning `result` instead."""
+    async def invoke(context, arguments: str) -> str:
+        return result
+
+    return dataclasses.replace(tool, on_invoke_tool=invoke)
+
+
+# --- Scenarios: one cassette per script's flow ---
+
+async def basic_scenario(run_config: RunConfig):
+    from agents import Agent
+
+    # Same agent as singleBasicAgent.py
+    agent = Agent(name="Test Agent", instructions="Your are a helpful agent that responds in a concise manner")
+    return await Runner.run(agent, "Hello! Are you working correctly", run_config=run_config)
+
+
+async def handoffs_scenario(run_config: RunConfig):
+    from handoffs import technical_inquiry, triage_agent
+
+    return await Runner.run(triage_agent, technical_inquiry, run_config=run_config)
+
+
+async def custom_handoff_scenario(run_config: RunConfig):
+    from passingDataDuringCustomHandoffs import generalInquiry, service_agent
+
+    return await Runner.run(service_agent, generalInquiry, run_config=run_config)
+
+
+async def agents_as_tools_scenario(run_config: RunConfig):
+    from agentsAsTools import productivity_assistant
+
+    return await Runner.run(productivity_assistant, "I need to keep track of my project deadlines",
+                            run_config=run_config)
+
+
+async def structured_output_scenario(run_config: RunConfig):
+    from understandingAgentOutputs import email_extractor, sample_email
+
+    return await Runner.run(email_extractor, f"Please extract information from this email:\n\n{sample_email}",
+                            run_config=run_config)
+
+
+async def streaming_scenario(run_config: RunConfig):
+    from agents import Agent
+    from streaming import how_many_jokes
+
+    random.seed(7)  # how_many_jokes is random -> keep the tool output (and so the request hash) the same
+    agent = Agent(name="Joker", instructions="First call the `how_many_jokes` tool, then tell that many jokes.",
+                  tools=[how_many_jokes])
+    result = Runner.run_streamed(agent, input="Hello", run_config=run_config)
+    async for _ in result.stream_events():
+        pass
+    return result
+
+
+async def mcp_weather_scenario(run_config: RunConfig):
+    from agents import Agent
+
+    # The agent from customMCPServer/mcp_demo_client.py, with the tools of customMCPServer/server.py
+    weather_server = StubMCPServer("Weather Server", {
+        "get_weather": ("Fetches the current weather for the specified city.",
+                        {"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]},
+                        "London: \u26c5\ufe0f  +14\u00b0C"),
+        "add_numbers": ("Adds two numbers together.",
+                        {"type": "object", "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+                         "required": ["a", "b"]}, "0"),
+    })
+    agent = Agent(name="Assistant", instructions="You are a helpful assistant and would use tools to help the user",
+                  mcp_servers=[weather_server])
+    return await Runner.run(agent, "What's the weather like today in London?", run_config=run_config)
+
+
+async def mcp_email_scenario(run_config: RunConfig):
+    sys.path.insert(0, os.path.join(ROOT, "MCPLearning"))
+    from EmailMCPAgent import get_email_agent
+
+    # EmailMCPAgent's EmailAssistant with a stand-in for mongodb-mcp-server, a fixed clock (get_time is part of
+    # the next request) and a send_email_logic that doesn't send anything
+    mongodb_server = StubMCPServer("MongoDB Server", {
+        "find": ("Run a find query against a MongoDB collection",
+                 {"type": "object", "properties": {"database": {"type": "string"}, "collection": {"type": "string"},
+                                                   "filter": {"type": "object"}, "limit": {"type": "integer"}},
+                  "required": ["database", "collection"]},
+                 json.dumps([{"title": "Sea View Cottage", "price": 120, "rating": 4.9},
+                             {"title": "City Loft", "price": 95, "rating": 4.6}])),
+    })
+    agent = get_email_agent()
+    tools = {"get_time": "2025-07-01 09:00:00",
+             "send_email_logic": json.dumps({"status": "queued", "message_id": "cassette"})}
+    agent = agent.clone(mcp_servers=[mongodb_server],
+                        tools=[stub_function_tool(tool, tools[tool.name]) if tool.name in tools else tool
+                               for tool in agent.tools])
+    return await Runner.run(agent, "Find the current listings in the MongoDB collection and write a launch email "
+                                   "about them.", run_config=run_config)
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "basic": basic_scenario,
+    "handoffs": handoffs_scenario,
+    "custom_handoff": custom_handoff_scenario,
+    "agents_as_tools": agents_as_tools_scenario,
+    "structured_output": structured_output_scenario,
+    "streaming": streaming_scenario,
+    "mcp_weather": mcp_weather_scenario,
+    "mcp_email": mcp_email_scenario,
+}
+
+
+def cassette_path(scenario: str, directory: str = CASSETTE_DIR) -> str:
+    return os.path.join(directory, f"{scenario}.json")
+
+
+async def run_scenario(name: str, mode: str = "replay", directory: str = CASSETTE_DIR, **provider_options) -> dict:
+    provider = CassetteModelProvider(cassette_path(name, directory), mode=mode, **provider_options)
+    start = time.perf_counter()
+    result = await SCENARIOS[name](RunConfig(model_provider=provider,
+                                             tracing_disabled=mode == "replay" or "real_provider" in provider_options))
+    return {
+        "scenario": name,
+        "recorded_with": provider.cassette.recorded_with,
+        "seconds": time.perf_counter() - start,
+        "recorded_seconds": sum(i["duration"] for i in provider.cassette.interactions),
+        "model_calls": len(result.raw_responses),
+        "replayed": provider.replayed,
+        "recorded": provider.recorded,
+        "output": str(result.final_output)[:60].replace("\n", " "),
+        "final_output": result.final_output,
+    }
+
+
+async def main(argv: List[str]):
+    # python modelCassettes.py --record [scenario ...]     -> record with the real API (needs OPENAI_API_KEY)
+    # python modelCassettes.py --record --stand-in [...]   -> record with standInModel instead (no API key)
+    # python modelCassettes.py [--instant] [scenario ...]  -> replay offline as a regression benchmark
+    mode = "record" if "--record" in argv else "replay"
+    options = {"latency_scale": 0.0} if "--instant" in argv else {}
+    if mode == "record" and "--stand-in" in argv:
+        from standInModel import StandInModelProvider
+
+        options["real_provider"] = StandInModelProvider(latency=0.3, seconds_per_token=0.01, seed=1)
+    names = [a for a in argv if not a.startswith("--")] or list(SCENARIOS)
+    for name in names:
+        if mode == "replay" and not os.path.exists(cassette_path(name)):
+            print(f"{name:>18}: no cassette yet (python modelCassettes.py --record {name})")
+            continue
+        stats = await run_scenario(name, mode, **options)
+        print(f"{name:>18}: {stats['seconds']:6.2f}s (recorded {stats['recorded_seconds']:6.2f}s "
+              f"with {stats['recorded_with']}), "
+              f"{stats['model_calls']} model calls, {stats['replayed']} replayed / {stats['recorded']} recorded "
+              f"-> {stats['output']!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
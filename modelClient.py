@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+import httpx
+from agents import set_default_openai_client
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# Every script lets Runner.run build its own default OpenAI client. That's fine for a one-off script, but in a
+# long-lived service we want ONE tuned HTTP client shared by every Agent (and the voice pipeline):
+# - keep-alive connections are reused instead of paying TCP + TLS setup per request
+# - HTTP/2 when the `h2` package is installed (many requests multiplexed over one connection)
+# - a bounded connection pool and explicit timeouts
+# - pool metrics (requests, in flight, open / idle connections, average latency)
+# Call install_shared_client() once at startup -> every Agent picks it up through set_default_openai_client.
+
+try:
+    import h2  # noqa: F401 - only checking that HTTP/2 support is available
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps httpx's pooled transport to count requests and look at the connection pool."""
+
+    def __init__(self, metrics: PoolMetrics, **kwargs):
+        self.metrics = metrics
+        self.max_connections = kwargs["limits"].max_connections
+        self.transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self.metrics
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        start = time.perf_counter()
+        try:
+            return await self.transport.handle_async_request(request)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.total_seconds += time.perf_counter() - start
+
+    def connections(self):
+        # httpcore's pool isn't public API, so this is best effort
+        pool = getattr(self.transport, "_pool", None)
+        return list(getattr(pool, "connections", []))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def create_http_client(max_connections: int = 100, max_keepalive_connections: int = 20,
+                       keepalive_expiry: float = 30.0, connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                       http2: Optional[bool] = None, metrics: Optional[PoolMetrics] = None) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections,
+                          keepalive_expiry=keepalive_expiry)
+    transport = MeteredTransport(metrics or PoolMetrics(), limits=limits,
+                                 http2=HTTP2_AVAILABLE if http2 is None else http2, retries=1)
+    # Long read timeout, since streamed responses can stay open for a while
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+# Registry: one shared client per process
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_client(**http_options) -> AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            http_client=create_http_client(**http_options),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            max_retries=2,
+        )
+    return _openai_client
+
+
+def install_shared_client(**http_options) -> AsyncOpenAI:
+    """Make every Agent in this process use the shared, pooled client."""
+    client = get_openai_client(**http_options)
+    set_default_openai_client(client)
+    return client
+
+
+def voice_model_provider():
+    """The voice pipeline's STT / TTS models, on the same pooled client (pass as VoicePipelineConfig.model_provider)."""
+    from agents.voice import OpenAIVoiceModelProvider
+
+    return OpenAIVoiceModelProvider(openai_client=get_openai_client())
+
+
+def pool_metrics(client: Optional[AsyncOpenAI] = None) -> dict:
+    client = client or _openai_client
+    if client is None:
+        return {}
+    transport = client._client._transport  # The httpx client we passed in
+    metrics = transport.metrics
+    connections = transport.connections()
+    return {
+        "requests": metrics.requests,
+        "errors": metrics.errors,
+        "in_flight": metrics.in_flight,
+        "peak_in_flight": metrics.peak_in_flight,
+        "avg_latency_ms": metrics.total_seconds / metrics.requests * 1000 if metrics.requests else 0.0,
+        "open_connections": len(connections),
+        "idle_connections": sum(1 for c in connections if c.is_idle()),
+        "pool_utilisation": metrics.in_flight / transport.max_connections,
+    }
+
+
+# --- Benchmark against a local mock of the Responses API ---
+
+MOCK_RESPONSE = {
+    "id": "resp_mock",
+    "object": "response",
+    "created_at": 0,
+    "status": "completed",
+    "model": "gpt-4.1-mini",
+    "output": [{
+        "type": "message", "id": "msg_mock", "status": "completed", "role": "assistant",
+        "content": [{"type": "output_text", "text": "Hello from the mock!", "annotations": []}],
+    }],
+    "parallel_tool_calls": True,
+    "tool_choice": "auto",
+    "tools": [],
+    "usage": {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15,
+              "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}},
+}
+
+
+class MockResponsesServer:
+    """POST /v1/responses -> a canned response. `handshake` simulates the TCP + TLS cost of a new connection."""
+
+    def __init__(self, latency: float = 0.005, handshake: float = 0.03):
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self.port = 0
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        body = json.dumps(MOCK_RESPONSE).encode()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def benchmark(requests: int = 200, concurrency: int = 10):
+    async with MockResponsesServer() as server:
+        base_url = f"http://127.0.0.1:{server.port}/v1"
+
+        async def one_request(client):
+            start = time.perf_counter()
+            await client.responses.create(model="gpt-4.1-mini", input="Hello")
+            return time.perf_counter() - start
+
+        # Default setup: a fresh client (and connection) for every run
+        async def fresh_client_request(_):
+            async with AsyncOpenAI(api_key="mock", base_url=base_url) as client:
+                return await one_request(client)
+
+        shared = AsyncOpenAI(api_key="mock", base_url=base_url, http_client=create_http_client(max_connections=20))
+
+        async def shared_client_request(_):
+            return await one_request(shared)
+
+        for label, request in (("fresh client per run", fresh_client_request),
+                               ("shared pooled client", shared_client_request)):
+            server.connections = 0
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited(i):
+                async with semaphore:
+                    return await request(i)
+
+            start = time.perf_counter()
+            latencies = sorted(await asyncio.gather(*(limited(i) for i in range(requests))))
+            elapsed = time.perf_counter() - start
+            print(f"{label}: mean {sum(latencies) / len(latencies) * 1000:.1f}ms, "
+                  f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms, "
+                  f"{requests / elapsed:.0f} req/s, {server.connections} connections opened")
+
+        print(f"Pool metrics: {pool_metrics(shared)}")
+        await shared.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -1,9 +1,11 @@
 import asyncio  # Asynchronous functions (async & await)
 from pydantic import BaseModel  # Data structures (Like Mongoose Schemas for MERN Stack)
 from typing import Optional
-from agents import Agent, handoff, RunContextWrapper, Runner  # OpenAI Agent SDK
+from agents import Agent, handoff, InputGuardrailTripwireTriggered, RunContextWrapper, Runner  # OpenAI Agent SDK
 from dotenv import load_dotenv
 
+from inputGuardrails import REFUSAL, fast_input_guardrail
+
 load_dotenv()  # Loading the env variables from the /env file=
 
 
@@ -48,11 +50,16 @@ service_agent = Agent(
             input_type=EscalationData,  # Pydantic EscalationData data structure (Informing the hand off agent)
         )
     ],
+    input_guardrails=[fast_input_guardrail],  # Local checks (blocklist, PII, length) alongside the first model call
 )
 
 
 async def handle_customer_request(request):
-    result = await Runner.run(service_agent, request)  # Selecting the initial agent and inputting the request
+    try:
+        result = await Runner.run(service_agent, request)  # Selecting the initial agent and inputting the request
+    except InputGuardrailTripwireTriggered:  # The guardrail stopped the run -> nothing was sent on to the agents
+        print(REFUSAL)
+        return
     print(result.final_output)  # final_output attribute is just the response from the LLM
 
 # Hard coded inquiry -> This could be replaced with an input field in full-stack applications
@@ -2,11 +2,15 @@ import asyncio
 from dotenv import load_dotenv
 from agents import Agent, Runner
 
+from modelClient import install_shared_client
+
 # Loading the .env variables from the .env file
 load_dotenv()
 
 
 async def main():
+    # One pooled HTTP client shared by every agent in this process (see modelClient.py)
+    install_shared_client()
     agent = Agent(
         name="Test Agent",
         instructions="Your are a helpful agent that responds in a concise manner"
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+import zlib
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from agents import FunctionTool, Model, ModelProvider, ModelResponse, Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+# A model that never touches the network, for load tests and overhead benchmarks where we want to measure OUR
+# code (hooks, servers, queues...) rather than the OpenAI API. It behaves roughly like a real model would:
+# - a triage agent hands off to the handoff whose name best matches the request
+# - an agent with tools calls the best matching tool once, then answers
+# - an agent with an output_type answers with a minimal valid JSON object
+# - latency is a time to first token plus time per output token, and streaming sends real text deltas.
+#   latency_sigma > 0 makes the time to first token log-normal around `latency` (a long tail, like the real API)
+# Pass `script` to take over the decisions: script(system_instructions, input, tools, handoffs) returns either
+# the reply text, a list of output items, or None to carry on as above.
+
+
+STOP_WORDS = {"a", "an", "and", "are", "can", "for", "hand", "handoff", "handle", "how", "i", "if", "in", "is", "it",
+              "my", "of", "off", "on", "or", "the", "to", "with", "you", "your", "agent", "request", "questions"}
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z]+", (text or "").lower())) - STOP_WORDS
+
+
+def _mentions(instructions: Optional[str], name: str) -> str:
+    """The sentences of the instructions that mention `name` (eg, "If ... billing ..., hand off to the Billing Agent")."""
+    return " ".join(s for s in re.split(r"[.\n]", instructions or "") if name.lower() in s.lower())
+
+
+def _text_of(item: Any) -> str:
+    content = item.get("content", "") if isinstance(item, dict) else ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def example_from_schema(schema: dict, definitions: Optional[dict] = None) -> Any:
+    """Smallest value that validates against a JSON schema (good enough for the pydantic models in this repo)."""
+    definitions = definitions if definitions is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_from_schema(definitions[schema["$ref"].split("/")[-1]], definitions)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = schema[key]
+            non_null = [o for o in options if o.get("type") != "null"]
+            return None if len(non_null) < len(options) else example_from_schema(non_null[0], definitions)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: example_from_schema(prop, definitions) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return []
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    if "enum" in schema:
+        return schema["enum"][0]
+    return "stand-in"
+
+
+class StandInModel(Model):
+    def __init__(self, latency: float = 0.05, seconds_per_token: float = 0.002, reply_tokens: int = 40,
+                 script: Optional[Callable] = None, latency_sigma: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency  # Time to first token (the median when latency_sigma > 0)
+        self.latency_sigma = latency_sigma
+        self.random = random.Random(seed)
+        self.seconds_per_token = seconds_per_token
+        self.reply_tokens = reply_tokens
+        self.script = script
+        self.calls = 0
+
+    def decide(self, system_instructions, input, tools, output_schema, handoffs) -> List[Any]:
+        if self.script is not None:
+            decision = self.script(system_instructions, input, tools, handoffs)
+            if decision is not None:
+                return self._message(decision) if isinstance(decision, str) else decision
+
+        items = [{"role": "user", "content": input}] if isinstance(input, str) else list(input)
+        last_user = max((i for i, item in enumerate(items) if isinstance(item, dict) and item.get("role") == "user"),
+                        default=0)
+        request = _text_of(items[last_user]) if items else ""
+        since_request = items[last_user + 1:]
+        called = {item.get("name") for item in since_request if isinstance(item, dict)
+                  and item.get("type") == "function_call"}
+
+        # Hand off once: to the agent the instructions / handoff description tie to the request's words, or
+        # (like a model guessing) a stable pick based on the request
+        if handoffs and not called & {h.tool_name for h in handoffs}:
+            handoff = self._best_match(request, handoffs, lambda h: f"{h.agent_name} {h.tool_description} "
+                                       + _mentions(system_instructions, h.agent_name))
+            return [self._call(handoff.tool_name, example_from_schema(handoff.input_json_schema or {}))]
+
+        function_tools = [t for t in tools if isinstance(t, FunctionTool)]
+        if function_tools and not called & {t.name for t in function_tools}:
+            tool = self._best_match(request, function_tools, lambda t: f"{t.name} {t.description}")
+            return [self._call(tool.name, example_from_schema(tool.params_json_schema))]
+
+        if output_schema is not None and not output_schema.is_plain_text():
+            return self._message(json.dumps(example_from_schema(output_schema.json_schema())))
+        words = " ".join(["stand-in"] * self.reply_tokens)
+        return self._message(f"Stand-in answer to: {request[:80]} {words}")
+
+    def time_to_first_token(self) -> float:
+        if self.latency_sigma <= 0 or self.latency <= 0:
+            return self.latency
+        return self.random.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+    @staticmethod
+    def _best_match(request: str, options: list, describe: Callable):
+        words = _words(request)
+        scores = [len(words & _words(describe(option))) for option in options]
+        if max(scores) == 0:
+            return options[zlib.crc32(request.encode()) % len(options)]
+        return options[scores.index(max(scores))]
+
+    @staticmethod
+    def _call(name: str, arguments: dict) -> ResponseFunctionToolCall:
+        return ResponseFunctionToolCall(type="function_call", id=f"fc_{uuid.uuid4().hex[:12]}",
+                                        call_id=f"call_{uuid.uuid4().hex[:12]}", name=name,
+                                        arguments=json.dumps(arguments), status="completed")
+
+    @staticmethod
+    def _message(text: str) -> List[ResponseOutputMessage]:
+        return [ResponseOutputMessage(
+            type="message", id=f"msg_{uuid.uuid4().hex[:12]}", role="assistant", status="completed",
+            content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+        )]
+
+    @staticmethod
+    def _usage(input, output: List[Any]) -> Usage:
+        input_tokens = len(json.dumps(input, default=str)) // 4
+        output_tokens = sum(len(item.model_dump_json()) for item in output) // 4
+        return Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                     total_tokens=input_tokens + output_tokens)
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs) -> ModelResponse:
+        self.calls += 1
+        output = self.decide(system_instructions, input, tools, output_schema, handoffs)
+        usage = self._usage(input, output)
+        await asyncio.sleep(self.time_to_first_token() + usage.output_tokens * self.seconds_per_token)
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, **kwargs) -> AsyncIterator[Any]:
+        self.calls += 1
+        output = self.decide(system_instructions, input, tools, output_schema, handoffs)
+        await asyncio.sleep(self.time_to_first_token())
+        sequence = 0
+        for index, item in enumerate(output):
+            if isinstance(item, ResponseOutputMessage):
+                # Roughly one delta per token (~4 characters)
+                text = item.content[0].text
+                for start in range(0, len(text), 4):
+                    await asyncio.sleep(self.seconds_per_token)
+                    yield ResponseTextDeltaEvent(type="response.output_text.delta", delta=text[start:start + 4],
+                                                 item_id=item.id, output_index=index, content_index=0,
+                                                 sequence_number=sequence, logprobs=[])
+                    sequence += 1
+        response = Response(id=f"resp_{uuid.uuid4().hex[:12]}", created_at=0, model="stand-in", object="response",
+                            output=output, parallel_tool_calls=True, tool_choice="auto", tools=[])
+        yield ResponseCompletedEvent(type="response.completed", sequence_number=sequence, response=response)
+
+
+class StandInModelProvider(ModelProvider):
+    """Every agent gets the same StandInModel: Runner.run(..., run_config=RunConfig(model_provider=...))."""
+
+    def __init__(self, **model_options):
+        self.model = StandInModel(**model_options)
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
@@ -0,0 +1,125 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# How long does it take to import each agent module, and where does the time go? Autoscaled workers pay this on
+# every cold start. For each module this runs `python -X importtime -c "import <module>"` in a fresh process
+# (`runs` times), then prints:
+# - the module's own import time against its budget in startupBudget.json
+# - the packages that time went to (self time summed per top-level package, this repo's modules as "(repo)")
+# - any module that must stay lazy (pymongo, numpy, sounddevice, agents.voice...) but got imported anyway
+# Every module here pulls in `agents`, which is most of the total and swings by hundreds of ms from run to run.
+# So the budget is for the module's own cost: its cumulative time minus the `agents` subtree, both read from the
+# same -X importtime output (no separately timed baseline to drift against), median of the runs.
+# python startupBudget.py --check exits with 1 if a module is over budget or imports something it mustn't,
+# python startupBudget.py --update rewrites the budgets from this machine's numbers (+ headroom).
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUDGET_FILE = os.path.join(ROOT, "startupBudget.json")
+REPO_PACKAGES = {"appriseMarketplace"} | {name[:-3] for folder in (ROOT, os.path.join(ROOT, "MCPLearning"))
+                                          for name in os.listdir(folder) if name.endswith(".py")}
+
+
+def import_times(module: str, cwd: str) -> List[dict]:
+    """One fresh interpreter's -X importtime lines for `import module`: name, nesting depth, self and cumulative
+    microseconds. Rows come out children first, so a module's subtree is the deeper rows right before it."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr.splitlines()[-1]}")
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"name": name.strip(), "depth": depth, "self": int(self_us), "cumulative": int(cumulative_us)})
+    return rows
+
+
+def subtree(rows: List[dict], index: int) -> List[dict]:
+    """rows[index] and everything it imported."""
+    start = index
+    while start > 0 and rows[start - 1]["depth"] > rows[index]["depth"]:
+        start -= 1
+    return rows[start:index + 1]
+
+
+def own_cost(rows: List[dict], module: str, excluded: str) -> dict:
+    """Split one import of `module` into the `excluded` package's subtree and the module's own cost (the rest)."""
+    index = max(i for i, row in enumerate(rows) if row["name"] == module)
+    rows = subtree(rows, index)
+    shared = next((subtree(rows, i) for i, row in enumerate(rows) if row["name"] == excluded), [])
+    shared_ids = {id(row) for row in shared}
+    return {"total": rows[-1]["cumulative"], "excluded": shared[-1]["cumulative"] if shared else 0,
+            "own_rows": [row for row in rows if id(row) not in shared_ids], "modules": {row["name"] for row in rows}}
+
+
+def profile(module: str, cwd: str, excluded: str, runs: int = 5) -> dict:
+    samples = sorted((own_cost(import_times(module, cwd), module, excluded) for _ in range(runs)),
+                     key=lambda sample: sample["total"] - sample["excluded"])
+    median = samples[len(samples) // 2]
+    packages: Dict[str, int] = {}
+    for row in median["own_rows"]:
+        top = row["name"].split(".")[0]
+        top = "(repo)" if top in REPO_PACKAGES else top
+        packages[top] = packages.get(top, 0) + row["self"]
+    return {"own_ms": statistics.median(sample["total"] - sample["excluded"] for sample in samples) / 1000,
+            "excluded_ms": median["excluded"] / 1000, "total_ms": median["total"] / 1000,
+            "modules": set().union(*(sample["modules"] for sample in samples)),
+            "packages_ms": {name: us / 1000 for name, us in sorted(packages.items(), key=lambda p: -p[1])}}
+
+
+def load_budget() -> dict:
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def main(argv: List[str]) -> int:
+    budget = load_budget()
+    runs, excluded = budget.get("runs", 5), budget["excluded"]
+    failures: List[str] = []
+    for target in budget["modules"]:
+        module, cwd = target["module"], os.path.join(ROOT, target.get("cwd", "."))
+        try:
+            result = profile(module, cwd, excluded, runs)
+        except RuntimeError as error:
+            print(f"{module}: {error}\n")
+            failures.append(f"{module} doesn't import")
+            continue
+
+        budget_ms: Optional[float] = target.get("budget_ms")
+        limit = budget_ms + budget["noise_ms"] if budget_ms is not None else None
+        status = "ok" if limit is None or result["own_ms"] <= limit else "OVER BUDGET"
+        print(f"{module}: {result['own_ms']:.0f}ms own + {result['excluded_ms']:.0f}ms {excluded} "
+              f"(budget {budget_ms:.0f}ms + {budget['noise_ms']}ms = {limit:.0f}ms) {status}" if limit is not None
+              else f"{module}: {result['own_ms']:.0f}ms own + {result['excluded_ms']:.0f}ms {excluded} (no budget yet)")
+        for name, ms in list(result["packages_ms"].items())[:8]:
+            print(f"    {name:<24} {ms:8.1f}ms")
+        eager = [name for name in target.get("must_not_import", []) if name in result["modules"]]
+        for name in eager:
+            print(f"    imported {name} at startup, it should be lazy")
+        print()
+
+        if status != "ok":
+            failures.append(f"{module} took {result['own_ms']:.0f}ms on top of {excluded}, budget {limit:.0f}ms")
+        failures.extend(f"{module} imported {name}" for name in eager)
+        if "--update" in argv:
+            target["budget_ms"] = round(result["own_ms"] * (1 + budget["headroom"]))
+
+    if "--update" in argv:
+        with open(BUDGET_FILE, "w") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"Budgets updated in {BUDGET_FILE}")
+    elif failures:
+        print("Startup budget check failed:\n  " + "\n  ".join(failures))
+        return 1 if "--check" in argv else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from agents import Agent, ItemHelpers, Runner
+from dotenv import load_dotenv
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# streaming.py has one `async for event in result.stream_events()` loop that prints events and throws the
+# raw_response_event deltas away. StreamHub reads the stream ONCE and fans every event out to any number of
+# subscribers (a browser UI over Server-Sent Events, an audit logger, a metrics sink...):
+# - each subscriber has its own bounded queue, so a slow one can't grow memory without limit
+# - the policy decides what happens when a queue is full: "block" (backpressure on the whole stream),
+#   "drop_oldest" or "drop_newest" (the subscriber misses events, everyone else carries on)
+# - the same event object is shared by every subscriber, never copied
+
+POLICIES = ("block", "drop_oldest", "drop_newest")
+
+_END = object()  # Marks the end of the stream in each queue
+
+
+class Subscription:
+    def __init__(self, hub: "StreamHub", name: str, maxsize: int, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.hub = hub
+        self.name = name
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.delivered = 0
+        self.dropped = 0
+
+    async def put(self, event: Any):
+        if self.policy == "block":
+            await self.queue.put(event)
+            return
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy == "drop_newest":
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def close(self):
+        # The end marker always goes in, even if it means dropping an event
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(_END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is _END:
+            self.hub.unsubscribe(self)
+            raise StopAsyncIteration
+        self.delivered += 1
+        return event
+
+
+class StreamHub:
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self.finished = False
+        self.events = 0
+
+    def subscribe(self, name: str, maxsize: int = 256, policy: str = "drop_oldest") -> Subscription:
+        subscription = Subscription(self, name, maxsize, policy)
+        if self.finished:
+            subscription.close()
+        else:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    async def run(self, source: AsyncIterator[Any]):
+        """Read the source once and deliver every event to every current subscriber."""
+        try:
+            async for event in source:
+                self.events += 1
+                blocking = []
+                for subscription in list(self.subscriptions):
+                    if subscription.policy == "block" and subscription.queue.full():
+                        # Only subscribers that are actually behind make the stream wait
+                        blocking.append(subscription.put(event))
+                    else:
+                        await subscription.put(event)  # Never actually waits
+                if blocking:
+                    await asyncio.gather(*blocking)
+        finally:
+            self.finished = True
+            for subscription in list(self.subscriptions):
+                subscription.close()
+
+    async def run_result(self, result):
+        """Fan out a RunResultStreaming (from Runner.run_streamed)."""
+        await self.run(result.stream_events())
+
+    def stats(self) -> Dict[str, dict]:
+        return {s.name: {"delivered": s.delivered, "dropped": s.dropped, "queued": s.queue.qsize()}
+                for s in self.subscriptions}
+
+
+def event_to_json(event: Any) -> str:
+    """Serialise an SDK stream event for external clients."""
+    payload = {"type": getattr(event, "type", type(event).__name__)}
+    if payload["type"] == "raw_response_event":
+        payload["data"] = event.data.model_dump(mode="json")
+    elif payload["type"] == "agent_updated_stream_event":
+        payload["agent"] = event.new_agent.name
+    elif payload["type"] == "run_item_stream_event":
+        payload["name"] = event.name
+        payload["item_type"] = event.item.type
+        if event.item.type == "message_output_item":
+            payload["text"] = ItemHelpers.text_message_output(event.item)
+        elif event.item.type == "tool_call_output_item":
+            payload["output"] = str(event.item.output)
+    return json.dumps(payload, default=str)
+
+
+class SSEServer:
+    """
+    Minimal HTTP server: GET /events streams the hub's events as Server-Sent Events.
+    Each client gets its own drop_oldest subscription, so a slow browser never stalls the run.
+    """
+
+    def __init__(self, hub: StreamHub, host: str = "127.0.0.1", port: int = 8765, maxsize: int = 1024):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self._server = None
+        self._clients = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscription = None
+        try:
+            request_line = (await reader.readline()).decode()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers aren't needed
+            parts = request_line.split(" ")
+            if len(parts) < 2 or parts[0] != "GET" or parts[1].split("?")[0] != "/events":
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Connection: close\r\nAccess-Control-Allow-Origin: *\r\n\r\n")
+            await writer.drain()
+
+            self._clients += 1
+            subscription = self.hub.subscribe(f"sse-{self._clients}", self.maxsize, "drop_oldest")
+            async for event in subscription:
+                writer.write(f"event: {getattr(event, 'type', 'event')}\ndata: {event_to_json(event)}\n\n".encode())
+                await writer.drain()
+            writer.write(b"event: done\ndata: {}\n\n")
+            await writer.drain()
+        except ConnectionError:
+            # Browser went away -> stop queueing events for it
+            if subscription is not None:
+                self.hub.unsubscribe(subscription)
+        finally:
+            writer.close()
+
+
+# Example subscribers for the Joker agent from streaming.py
+async def console_printer(subscription: Subscription):
+    async for event in subscription:
+        if event.type == "agent_updated_stream_event":
+            print(f"Agent updated: {event.new_agent.name}")
+        elif event.type == "run_item_stream_event":
+            if event.item.type == "tool_call_item":
+                print("-- Tool was called")
+            elif event.item.type == "tool_call_output_item":
+                print(f"-- Tool output: {event.item.output}")
+            elif event.item.type == "message_output_item":
+                print(f"-- Message output:\n {ItemHelpers.text_message_output(event.item)}")
+
+
+async def audit_logger(subscription: Subscription, path: str = "stream_audit.jsonl"):
+    with open(path, "a") as f:
+        async for event in subscription:
+            f.write(event_to_json(event) + "\n")
+
+
+async def metrics_sink(subscription: Subscription, counts: Dict[str, int]):
+    async for event in subscription:
+        counts[event.type] = counts.get(event.type, 0) + 1
+
+
+async def main():
+    from streaming import how_many_jokes
+
+    agent = Agent(
+        name="Joker",
+        instructions="First call the `how_many_jokes` tool, then tell that many jokes.",
+        tools=[how_many_jokes],
+    )
+
+    hub = StreamHub()
+    sse = await SSEServer(hub).start()
+    print(f"=== Run starting (SSE on http://{sse.host}:{sse.port}/events) ===")
+
+    counts = {}
+    consumers = [
+        console_printer(hub.subscribe("console", policy="block")),
+        audit_logger(hub.subscribe("audit", policy="block")),
+        metrics_sink(hub.subscribe("metrics", policy="drop_oldest"), counts),
+    ]
+    result = Runner.run_streamed(agent, input="Hello")
+    await asyncio.gather(hub.run_result(result), *consumers)
+    await sse.stop()
+
+    print(f"=== Run complete === {hub.events} events, by type: {counts}")
+
+
+class _TimedEvent:
+    __slots__ = ("type", "created")
+
+    def __init__(self):
+        self.type = "benchmark_event"
+        self.created = time.perf_counter()
+
+
+async def benchmark(events: int = 2000, interval: float = 0.0005):
+    async def source():
+        for _ in range(events):
+            yield _TimedEvent()
+            await asyncio.sleep(interval)
+
+    async def consume(subscription: Subscription, latencies: list):
+        async for event in subscription:
+            latencies.append(time.perf_counter() - event.created)
+
+    for subscribers in (1, 10, 100):
+        for policy in ("block", "drop_oldest"):
+            hub = StreamHub()
+            latencies: list = []
+            consumers = [consume(hub.subscribe(f"s{i}", policy=policy), latencies) for i in range(subscribers)]
+            await asyncio.gather(hub.run(source()), *consumers)
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(f"{subscribers:>3} subscribers ({policy:>11}): mean {statistics.mean(latencies) * 1e6:7.1f}us, "
+                  f"p99 {p99 * 1e6:7.1f}us added latency, {len(latencies)} deliveries")
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, List, Optional, Tuple, get_args, get_origin
+
+from agents import Runner
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from openai.types.responses import ResponseTextDeltaEvent
+
+from understandingAgentOutputs import EmailData, Meeting, Person, Task, email_extractor, sample_email
+
+# With output_type=EmailData, process_email has to wait for the whole JSON object before it can print anything.
+# But with Runner.run_streamed the JSON arrives as text deltas, so fields can be used as soon as they close:
+# usually `subject` first, then the sender, then each recipient / meeting / task as its object closes.
+# IncrementalJSONObjectParser finds those boundaries in the delta stream (without re-parsing the whole buffer),
+# and stream_email_data validates each piece and yields a growing PartialEmailData.
+
+
+class PartialEmailData(BaseModel):
+    subject: Optional[str] = None
+    sender: Optional[Person] = None
+    recipients: List[Person] = []
+    main_points: List[str] = []
+    meetings: List[Meeting] = []
+    tasks: List[Task] = []
+    next_steps: Optional[str] = None
+
+
+class IncrementalJSONObjectParser:
+    """
+    Scans a JSON object as it arrives in pieces and reports:
+    - ("field", key, raw_json) when a top-level value is complete
+    - ("item", key, raw_json) when an element of a top-level array is complete
+    Each character is only scanned once, however many deltas the text arrives in.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.stack = []  # Open containers: "{" or "["
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.expect_key = False
+        self.key_start = None
+        self.key = None
+        self.value_start = None  # Start of the current top-level value
+        self.element_start = None  # Start of the current element of a top-level array
+        self.events = []
+
+    def feed(self, delta: str) -> List[Tuple[str, str, str]]:
+        self.buffer += delta
+        self.events = []
+        buffer = self.buffer
+        for i in range(self.position, len(buffer)):
+            c = buffer[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    self._string_closed(i)
+                continue
+
+            if c == '"':
+                self._value_begins(i, is_string=True)
+                self.in_string = True
+                self.string_start = i
+            elif c in "{[":
+                self._value_begins(i)
+                self.stack.append(c)
+                if len(self.stack) == 1:
+                    self.expect_key = True
+            elif c in "}]":
+                self._primitive_ends(i)
+                self.stack.pop()
+                self._container_closed(i)
+            elif c == ",":
+                self._primitive_ends(i)
+                if len(self.stack) == 1:
+                    self.expect_key = True
+            elif c not in " \t\r\n:":
+                self._value_begins(i)
+        self.position = len(buffer)
+        return self.events
+
+    def _in_top_level_array(self) -> bool:
+        return len(self.stack) == 2 and self.stack[1] == "["
+
+    def _value_begins(self, i: int, is_string: bool = False):
+        if len(self.stack) == 1:
+            if self.expect_key and is_string:
+                self.key_start = i
+            elif not self.expect_key and self.value_start is None:
+                self.value_start = i
+        elif self._in_top_level_array() and self.element_start is None:
+            self.element_start = i
+
+    def _string_closed(self, i: int):
+        if len(self.stack) == 1:
+            if self.expect_key:
+                self.key = json.loads(self.buffer[self.key_start:i + 1])
+                self.expect_key = False
+            elif self.value_start == self.string_start:
+                self._emit("field", self.value_start, i + 1)
+                self.value_start = None
+        elif self._in_top_level_array() and self.element_start == self.string_start:
+            self._emit("item", self.element_start, i + 1)
+            self.element_start = None
+
+    def _primitive_ends(self, i: int):
+        # Numbers / true / false / null only end when the next , } or ] shows up
+        if len(self.stack) == 1 and self.value_start is not None:
+            self._emit("field", self.value_start, i)
+            self.value_start = None
+        elif self._in_top_level_array() and self.element_start is not None:
+            self._emit("item", self.element_start, i)
+            self.element_start = None
+
+    def _container_closed(self, i: int):
+        if len(self.stack) == 1 and self.value_start is not None:
+            self._emit("field", self.value_start, i + 1)
+            self.value_start = None
+        elif self._in_top_level_array() and self.element_start is not None:
+            self._emit("item", self.element_start, i + 1)
+            self.element_start = None
+
+    def _emit(self, kind: str, start: int, end: int):
+        self.events.append((kind, self.key, self.buffer[start:end].strip()))
+
+
+# One TypeAdapter per EmailData field (and per list element type), built once
+_field_adapters = {name: TypeAdapter(field.annotation) for name, field in EmailData.model_fields.items()}
+_item_adapters = {
+    name: TypeAdapter(get_args(field.annotation)[0])
+    for name, field in EmailData.model_fields.items() if get_origin(field.annotation) in (list, List)
+}
+
+
+async def stream_email_data(deltas: AsyncIterator[str]) -> AsyncIterator[Tuple[str, PartialEmailData]]:
+    """Yield (what_just_completed, partial) each time a field or list item is validated, eg ("tasks[0]", partial)."""
+    parser = IncrementalJSONObjectParser()
+    partial = PartialEmailData()
+    async for delta in deltas:
+        for kind, key, raw in parser.feed(delta):
+            if key not in _field_adapters:
+                continue
+            try:
+                if kind == "item" and key in _item_adapters:
+                    items = getattr(partial, key)
+                    items.append(_item_adapters[key].validate_json(raw))
+                    yield f"{key}[{len(items) - 1}]", partial
+                elif kind == "field" and key not in _item_adapters:
+                    setattr(partial, key, _field_adapters[key].validate_json(raw))
+                    yield key, partial
+            except ValidationError:
+                # A piece that doesn't validate is skipped here; the full EmailData check at the end still applies
+                continue
+
+
+async def text_deltas(result) -> AsyncIterator[str]:
+    """The output text deltas from a RunResultStreaming."""
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            yield event.data.delta
+
+
+async def process_email_streamed(email_text: str):
+    result = Runner.run_streamed(email_extractor, f"Please extract information from this email:\n\n{email_text}")
+    async for completed, partial in stream_email_data(text_deltas(result)):
+        if completed == "subject":
+            print(f"Subject: {partial.subject}")
+        elif completed == "sender":
+            print(f"From: {partial.sender.name} ({partial.sender.role})")
+        elif completed.startswith("main_points"):
+            print(f"- {partial.main_points[-1]}")
+        elif completed.startswith("meetings"):
+            meeting = partial.meetings[-1]
+            print(f"- Meeting: {meeting.date} at {meeting.time}, Location: {meeting.location}")
+        elif completed.startswith("tasks"):
+            task = partial.tasks[-1]
+            print(f"- Task: {task.description} (Assignee: {task.assignee}, Deadline: {task.deadline})")
+    # The final output is still validated as a whole EmailData by the SDK
+    return result.final_output
+
+
+# Replays a JSON document as small deltas at a fixed rate, like a model streaming its output
+async def simulated_deltas(text: str, chars_per_delta: int = 4, delay: float = 0.01) -> AsyncIterator[str]:
+    for i in range(0, len(text), chars_per_delta):
+        await asyncio.sleep(delay)
+        yield text[i:i + chars_per_delta]
+
+
+async def benchmark():
+    # A realistic EmailData for sample_email, streamed at ~400 characters per second
+    email = EmailData(
+        subject="Project Phoenix Update and Next Steps",
+        sender=Person(name="Alex Johnson", role="Senior Project Manager", contact="alex.j@techcorp.com"),
+        recipients=[Person(name="Team Development", role=None, contact="team-dev@techcorp.com"),
+                    Person(name="Sarah Wong", role=None, contact="sarah.w@techcorp.com"),
+                    Person(name="Miguel Fernandez", role=None, contact="miguel.f@techcorp.com")],
+        main_points=["Beta testing shows 85% positive feedback", "Performance issues remain on mobile devices",
+                     "The client requested additional dashboard features"],
+        meetings=[Meeting(date="Friday, June 15th", time="2:00 PM", location="Conference Room B", duration="1.5 hours")],
+        tasks=[Task(description="Address mobile performance issues", assignee="Sarah", deadline="June 20th",
+                    priority="High"),
+               Task(description="Create dashboard mock-ups", assignee="Miguel", deadline="Next Monday", priority=None),
+               Task(description="Review beta testing feedback", assignee="Everyone", deadline="EOD tomorrow",
+                    priority=None)],
+        next_steps="Follow-up meeting on Friday",
+    )
+    text = email.model_dump_json()
+
+    start = time.perf_counter()
+    buffer = ""
+    async for delta in simulated_deltas(text):
+        buffer += delta
+    EmailData.model_validate_json(buffer)
+    full_parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_field, first_task = None, None
+    async for completed, _ in stream_email_data(simulated_deltas(text)):
+        first_field = first_field or (completed, time.perf_counter() - start)
+        if first_task is None and completed.startswith("tasks"):
+            first_task = time.perf_counter() - start
+    incremental = time.perf_counter() - start
+
+    print(f"{len(text)} characters of JSON")
+    print(f"Full parse:  first usable data after {full_parse * 1000:.0f}ms")
+    print(f"Incremental: first field ({first_field[0]}) after {first_field[1] * 1000:.0f}ms, "
+          f"first task after {first_task * 1000:.0f}ms, finished after {incremental * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else process_email_streamed(sample_email))
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The scripts live flat in the repo root and in MCPLearning/, and import each other by module name
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in (ROOT, os.path.join(ROOT, "MCPLearning")):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+# Nothing in the tests talks to OpenAI, but the SDK wants a key to build its default client
+os.environ.setdefault("OPENAI_API_KEY", "test")
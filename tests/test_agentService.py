@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+from agents import MaxTurnsExceeded, Runner
+from starlette.testclient import TestClient
+
+import agentService
+
+
+@pytest.fixture(autouse=True)
+def fresh_service(monkeypatch, tmp_path):
+    # A lifespan shutdown leaves the module's controller draining, and the sessions database goes in tmp
+    monkeypatch.setattr(agentService, "admission", agentService.AdmissionController(4, 4, 1, 4))
+    monkeypatch.setenv("AGENT_SERVICE_SESSIONS_DB", str(tmp_path / "sessions.db"))
+
+
+def test_stream_releases_its_slot_when_the_client_is_gone_before_it_starts():
+    async def scenario():
+        scope = {"type": "http", "method": "POST", "path": "/v1/triage/stream", "headers": [],
+                 "asgi": {"version": "3.0", "spec_version": "2.4"}}
+        body = json.dumps({"input": "I have a billing question"}).encode()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def disconnected(message):
+            raise OSError("client went away")
+
+        request = agentService.Request(scope, receive)
+        response = await agentService.triage_stream(request)
+        assert agentService.admission.running == 1
+        try:
+            await response(scope, receive, disconnected)
+        except Exception:
+            pass  # Starlette turns the OSError into ClientDisconnect
+        return agentService.admission.running, dict(agentService.admission.tenants)
+
+    assert asyncio.run(scenario()) == (0, {})
+
+
+def test_run_failures_are_json_errors(monkeypatch):
+    async def failing_run(*args, **kwargs):
+        raise MaxTurnsExceeded("Max turns (10) exceeded")
+
+    monkeypatch.setattr(Runner, "run", failing_run)
+    with TestClient(agentService.app, raise_server_exceptions=False) as client:
+        response = client.post("/v1/triage", json={"input": "I have a billing question"})
+    assert response.status_code == 500
+    assert response.json() == {"error": "The agent run failed (MaxTurnsExceeded)"}
+    assert agentService.admission.running == 0
+
+
+def test_stream_failures_end_with_an_error_event(monkeypatch):
+    def failing_run_streamed(*args, **kwargs):
+        raise MaxTurnsExceeded("Max turns (10) exceeded")
+
+    monkeypatch.setattr(Runner, "run_streamed", failing_run_streamed)
+    with TestClient(agentService.app) as client:
+        response = client.post("/v1/triage/stream", json={"input": "I have a billing question"})
+    assert response.status_code == 200
+    assert response.text.startswith("event: error\n")
+    assert agentService.admission.running == 0
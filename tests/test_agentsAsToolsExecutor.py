@@ -0,0 +1,81 @@
+import asyncio
+
+from agents import Agent, RunConfig, RunContextWrapper, Runner
+
+from agentsAsToolsExecutor import SubAgentExecutor
+
+specialist = Agent(name="Task Manager", instructions="You manage tasks")
+
+
+class Result:
+    def __init__(self, final_output):
+        self.final_output = final_output
+
+
+def slow_runs(monkeypatch, seconds):
+    """Runner.run stand-in: takes `seconds`, records what it was called with and whether it got cancelled."""
+    calls = []
+
+    async def run(agent, input, **kwargs):
+        call = dict(kwargs, input=input, cancelled=False)
+        calls.append(call)
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            call["cancelled"] = True
+            raise
+        return Result(f"done: {input}")
+
+    monkeypatch.setattr(Runner, "run", run)
+    return calls
+
+
+def test_cancelling_the_only_caller_cancels_the_nested_run_and_frees_its_slot(monkeypatch):
+    calls = slow_runs(monkeypatch, 0.2)
+
+    async def scenario():
+        executor = SubAgentExecutor(max_concurrency=1, default_timeout=30)
+        coordinator = asyncio.create_task(executor.run(specialist, "plan my week"))
+        await asyncio.sleep(0.05)
+        coordinator.cancel()
+        await asyncio.gather(coordinator, return_exceptions=True)
+        # The slot is free straight away, not after the 30s timeout
+        answer = await asyncio.wait_for(executor.run(specialist, "plan my week"), 1)
+        return executor, answer
+
+    executor, answer = asyncio.run(scenario())
+    assert [call["cancelled"] for call in calls] == [True, False]
+    assert answer == "done: plan my week"
+    assert (executor.cancelled, executor.failed, executor.waiters) == (1, 0, {})
+
+
+def test_the_run_keeps_going_while_another_caller_still_waits(monkeypatch):
+    calls = slow_runs(monkeypatch, 0.1)
+
+    async def scenario():
+        executor = SubAgentExecutor()
+        first = asyncio.create_task(executor.run(specialist, "plan my week"))
+        second = asyncio.create_task(executor.run(specialist, "Plan my  week"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return executor, await second
+
+    executor, answer = asyncio.run(scenario())
+    assert answer == "done: plan my week"
+    assert len(calls) == 1 and not calls[0]["cancelled"]
+    assert (executor.nested_runs, executor.cache_hits, executor.cancelled) == (1, 1, 0)
+
+
+def test_the_parent_context_and_run_config_are_forwarded(monkeypatch):
+    calls = slow_runs(monkeypatch, 0)
+    run_config = RunConfig(workflow_name="coordinator")
+
+    async def scenario():
+        executor = SubAgentExecutor()
+        parent = RunContextWrapper(context=executor)
+        await executor.run(specialist, "plan my week", context=parent, run_config=run_config)
+        return executor
+
+    executor = asyncio.run(scenario())
+    assert calls[0]["context"] is executor
+    assert calls[0]["run_config"] is run_config
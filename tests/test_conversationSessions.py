@@ -0,0 +1,64 @@
+import asyncio
+
+from conversationSessions import SUMMARY_PREFIX, SessionStore
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def assistant(text):
+    return {"role": "assistant", "content": text}
+
+
+def test_two_stores_on_one_database_see_each_others_writes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SessionStore(path), SessionStore(path)
+    try:
+        first.add_items("s", [user("hello")])
+        assert second.get_items("s") == [user("hello")]  # second has it cached now
+
+        first.add_items("s", [assistant("hi there")])
+        second.add_items("s", [user("my order is 1182")])  # Used to fail: UNIQUE constraint failed
+        expected = [user("hello"), assistant("hi there"), user("my order is 1182")]
+        assert first.get_items("s") == expected
+        assert second.get_items("s") == expected
+
+        # A pop followed by an add reuses the seq, the version still tells the other store
+        assert first.pop_item("s") == user("my order is 1182")
+        first.add_items("s", [user("my order is 1183")])
+        assert second.get_items("s")[-1] == user("my order is 1183")
+
+        second.clear("s")
+        assert first.get_items("s") == []
+    finally:
+        first.close()
+        second.close()
+
+
+def test_compaction_deletes_the_summarised_rows(tmp_path):
+    async def summarise(previous, items):
+        return f"{len(items)} earlier items"
+
+    async def scenario():
+        path = str(tmp_path / "sessions.db")
+        store = SessionStore(path, token_budget=200, keep_recent_tokens=60, summarise=summarise)
+        for turn in range(10):
+            store.add_items("s", [user(f"question {turn} " + "x" * 40), assistant(f"answer {turn} " + "y" * 40)])
+            await store.wait_for_compactions()
+        rows = store.db.execute("SELECT COUNT(*), MIN(seq) FROM items WHERE session_id = 's'").fetchone()
+        items = store.get_items("s")
+        store.close()
+
+        other = SessionStore(path)
+        reread = other.get_items("s")
+        other.close()
+        return store.compactions, rows, items, reread
+
+    compactions, (count, first_seq), items, reread = asyncio.run(scenario())
+    assert compactions > 0
+    assert count == len(items) - 1 < 20  # Only the unsummarised turns are left in the table
+    assert first_seq > 1
+    assert items[0]["content"].startswith(SUMMARY_PREFIX)
+    assert items[-1] == assistant("answer 9 " + "y" * 40)
+    assert reread == items
@@ -0,0 +1,19 @@
+from EmailMCPAgent import get_mongodb_server, get_triage_agent, result_guard
+
+
+def reachable_agents(agent, seen=None):
+    seen = seen if seen is not None else []
+    if agent not in seen:
+        seen.append(agent)
+        for handoff in agent.handoffs:
+            reachable_agents(handoff, seen)
+    return seen
+
+
+def test_every_agent_on_the_guarded_mongo_server_can_page_its_results():
+    # Building the agents only constructs the MCP servers, nothing is started or connected
+    agents = [agent for agent in reachable_agents(get_triage_agent()) if get_mongodb_server() in agent.mcp_servers]
+    assert {agent.name for agent in agents} == {"Internal Business Agent", "EmailAssistant"}
+    for agent in agents:
+        assert result_guard.page_tool in agent.tools, f"{agent.name} gets cursors it can't page with"
+
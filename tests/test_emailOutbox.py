@@ -0,0 +1,86 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+from emailOutbox import EmailOutbox, OutgoingEmail, retry_delay
+from sendgridStub import SendGridStub
+
+
+def outbox_for(stub, **kwargs):
+    return EmailOutbox(api_key="stub", from_email="sender@example.com", base_url=stub.base_url,
+                       requests_per_second=1000, **kwargs)
+
+
+def email_to(address, subject="Launch"):
+    return OutgoingEmail(to_emails=[address], subject=subject, plain_text_body="Our new listings are live!")
+
+
+def test_retry_after_in_seconds_or_as_an_http_date():
+    assert retry_delay("3", 1) == 3.0
+    assert 4 < retry_delay(formatdate(time.time() + 5, usegmt=True), 1) <= 5
+    assert retry_delay("Wed, 21 Oct 2015 07:28:00 GMT", 1) == 0.0  # Already passed
+    assert retry_delay("soon", 3) == retry_delay(None, 3) == 2.0  # Unparseable -> backoff
+
+
+def test_statuses_go_queued_sending_sent():
+    seen, watched = [], {}
+
+    class WatchingStub(SendGridStub):
+        async def _respond(self, method, path, headers, body):
+            seen.append(watched["outbox"].status(watched["id"]).status)
+            return await super()._respond(method, path, headers, body)
+
+    async def scenario():
+        async with WatchingStub(latency=0) as stub:
+            outbox = watched["outbox"] = outbox_for(stub)
+            message_id = watched["id"] = outbox.enqueue(email_to("a@example.com"))
+            seen.append(outbox.status(message_id).status)
+            await outbox.close()
+        return outbox.status(message_id)
+
+    status = asyncio.run(scenario())
+    assert seen == ["queued", "sending"]
+    assert (status.status, status.status_code, status.attempts) == ("sent", 202, 1)
+    assert status.sent_at is not None
+
+
+def test_429_with_an_http_date_and_500_are_retried():
+    async def scenario():
+        past = formatdate(time.time() - 60, usegmt=True)
+        async with SendGridStub(latency=0, script=[(429, [f"Retry-After: {past}"]), (500, [])]) as stub:
+            outbox = outbox_for(stub)
+            message_id = outbox.enqueue(email_to("a@example.com"))
+            await outbox.close()
+            return outbox.status(message_id), stub.requests
+
+    status, requests = asyncio.run(scenario())
+    assert (status.status, status.attempts, requests) == ("sent", 3, 3)
+
+
+def test_gives_up_after_max_retries_and_not_at_all_on_a_400():
+    async def scenario():
+        async with SendGridStub(latency=0, script=[(503, ["Retry-After: 0"])] * 2 + [(400, [])]) as stub:
+            outbox = outbox_for(stub, max_retries=2)
+            unavailable = outbox.enqueue(email_to("a@example.com"))
+            await outbox.close()
+            bad = outbox.enqueue(email_to("b@example.com"))
+            await outbox.close()
+            return outbox.status(unavailable), outbox.status(bad)
+
+    unavailable, bad = asyncio.run(scenario())
+    assert (unavailable.status, unavailable.status_code, unavailable.attempts) == ("failed", 503, 2)
+    assert (bad.status, bad.status_code, bad.attempts) == ("failed", 400, 1)
+
+
+def test_one_bad_recipient_does_not_fail_the_rest_of_its_batch():
+    async def scenario():
+        async with SendGridStub(latency=0, rejected={"bounced@example.com"}) as stub:
+            outbox = outbox_for(stub, workers=1, batch_wait=0.1)
+            ids = {address: outbox.enqueue(email_to(address))
+                   for address in ("a@example.com", "bounced@example.com", "c@example.com")}
+            await outbox.close()
+            return {address: outbox.status(i).status for address, i in ids.items()}, stub.delivered
+
+    statuses, delivered = asyncio.run(scenario())
+    assert statuses == {"a@example.com": "sent", "bounced@example.com": "failed", "c@example.com": "sent"}
+    assert delivered == 2
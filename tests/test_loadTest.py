@@ -0,0 +1,41 @@
+import asyncio
+import copy
+import json
+
+from agents import Agent, RunConfig
+
+from loadTest import BASELINE, LoadTest, compare
+from standInModel import StandInModelProvider
+
+
+def test_compare_refuses_a_baseline_run_with_other_options(capsys):
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    record = copy.deepcopy(baseline)
+    record["label"] = "latest"
+    record["config"]["label"] = "latest"
+    assert compare(record, baseline)
+
+    record["config"]["rate"] = 50
+    assert not compare(record, baseline)
+    assert "--rate: 8 there, 50 here" in capsys.readouterr().out
+
+
+def test_errors_keep_an_example_message_and_the_monitor_is_stopped():
+    def script(system_instructions, input, tools, handoffs):
+        raise RuntimeError("model is down")
+
+    async def scenario():
+        agent = Agent(name="Triage")
+        run_config = RunConfig(model_provider=StandInModelProvider(latency=0, seconds_per_token=0, script=script),
+                               tracing_disabled=True)
+        test = LoadTest({"handoffs": agent, "apprise": agent, "escalation": agent}, run_config, rate=50,
+                        duration=0.1, think_time=0.01, seed=1)
+        results = await test.run()
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return results, others
+
+    results, others = asyncio.run(scenario())
+    assert results["errors"]["RuntimeError"] == results["arrivals"] > 0
+    assert results["error_examples"] == {"RuntimeError": "model is down"}
+    assert others == []  # The monitor task has finished, not just been asked to
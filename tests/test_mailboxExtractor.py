@@ -0,0 +1,57 @@
+import asyncio
+import glob
+
+import pytest
+
+from mailboxExtractor import Checkpoint, ParquetWriter, extract_mailbox
+from understandingAgentOutputs import EmailData, Person
+
+pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+
+def record(text, next_steps=None):
+    return EmailData(subject=text, sender=Person(name="Sam", role=None, contact=None), recipients=[],
+                     main_points=[text], meetings=[], tasks=[], next_steps=next_steps)
+
+
+def test_every_commit_is_a_complete_part_file_with_the_same_schema(tmp_path):
+    async def extractor(text):
+        # The first batch has no next_steps at all, the later ones do
+        return record(text, next_steps=None if int(text.split()[1]) < 10 else "reply")
+
+    writer = ParquetWriter(str(tmp_path / "emails.parquet"))
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"), commit_every=20)
+    messages = (f"message {i}" for i in range(50))
+    extracted, skipped, failed = asyncio.run(extract_mailbox(messages, writer, checkpoint, extractor,
+                                                             requests_per_minute=0))
+    checkpoint.close()
+    writer.close()
+
+    parts = sorted(glob.glob(str(tmp_path / "emails-*.parquet")))
+    assert (extracted, skipped, failed) == (50, 0, 0)
+    assert len(parts) > 1 and not glob.glob(str(tmp_path / "*.tmp"))
+    tables = [pyarrow_parquet.read_table(part) for part in parts]
+    assert all(table.schema == tables[0].schema for table in tables)
+    assert sum(table.num_rows for table in tables) == checkpoint_done(tmp_path) == 50
+
+
+def test_rows_are_only_done_once_their_part_file_is_written(tmp_path):
+    writer = ParquetWriter(str(tmp_path / "emails.parquet"))
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"), commit_every=1000)
+    checkpoint.before_commit = writer.flush
+    checkpoint.claim("a")
+    writer.write("a", record("hello"))
+    checkpoint.finish("a")
+    # A crash here: nothing is committed and no part file exists, so the next run extracts "a" again
+    assert checkpoint_done(tmp_path) == 0 and not glob.glob(str(tmp_path / "emails-*.parquet"))
+    checkpoint.commit()
+    assert checkpoint_done(tmp_path) == 1
+    assert pyarrow_parquet.read_table(writer.parts[0]).column("hash").to_pylist() == ["a"]
+    checkpoint.close()
+
+
+def checkpoint_done(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+    done = checkpoint.counts().get("done", 0)
+    checkpoint.db.close()
+    return done
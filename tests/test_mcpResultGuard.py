@@ -0,0 +1,49 @@
+import json
+import time
+
+from mcp.types import CallToolResult, TextContent
+
+from mcpResultGuard import ResultGuard
+
+
+def listings(count):
+    return CallToolResult(content=[TextContent(type="text", text=json.dumps(
+        [{"_id": i, "title": f"Listing {i}", "description": "x" * 50} for i in range(count)]))])
+
+
+def first_page(guard, count=30):
+    return json.loads(guard._shape_result("listings", listings(count)).content[-1].text)
+
+
+def test_pages_through_a_result_with_the_cursor():
+    guard = ResultGuard(max_documents=10)
+    page = first_page(guard)
+    seen = [d["_id"] for d in page["documents"]]
+    while page["cursor"]:
+        page = json.loads(guard.next_page(page["cursor"]))
+        seen += [d["_id"] for d in page["documents"]]
+    assert seen == list(range(30))
+    assert not guard.cursors
+
+
+def test_unused_cursors_are_capped_and_expire(monkeypatch):
+    guard = ResultGuard(max_documents=10, max_cursors=3, cursor_ttl=60)
+    tokens = [first_page(guard)["cursor"] for _ in range(5)]
+    assert list(guard.cursors) == tokens[2:]  # Oldest dropped first
+    assert "error" in json.loads(guard.next_page(tokens[0]))
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert "error" in json.loads(guard.next_page(tokens[-1]))
+    assert not guard.cursors
+
+
+def test_aggregations_are_bounded_unless_they_write_out():
+    guard = ResultGuard(projections={"listings": ["title"]})
+    shaped = guard._shape_arguments("aggregate", {"collection": "listings", "pipeline": [{"$match": {}}]})
+    assert shaped["pipeline"] == [{"$match": {}}, {"$limit": 500}, {"$project": {"title": 1}}]
+
+    for last in ({"$out": "popular"}, {"$merge": {"into": "popular"}}):
+        pipeline = [{"$match": {}}, last]
+        shaped = guard._shape_arguments("aggregate", {"collection": "listings", "pipeline": list(pipeline)})
+        assert shaped["pipeline"] == pipeline
@@ -0,0 +1,48 @@
+import asyncio
+
+from agents import Agent, ModelProvider, RunConfig, Runner
+
+from modelCascade import STREAM_HOLDBACK, CascadeModelProvider
+from standInModel import StandInModelProvider
+
+
+class StandInTiers(ModelProvider):
+    def __init__(self, replies):
+        self.models = {model: StandInModelProvider(latency=0, seconds_per_token=0,
+                                                   script=lambda *args, reply=reply: reply).model
+                       for model, reply in replies.items()}
+
+    def get_model(self, model_name):
+        return self.models[model_name]
+
+
+def stream(provider, request="What are your business hours?"):
+    async def run():
+        result = Runner.run_streamed(Agent(name="Support"), request, run_config=RunConfig(model_provider=provider,
+                                                                                         tracing_disabled=True))
+        deltas = [event.data.delta async for event in result.stream_events()
+                  if event.type == "raw_response_event" and event.data.type == "response.output_text.delta"]
+        return "".join(deltas), result.final_output
+
+    return asyncio.run(run())
+
+
+def test_a_streamed_answer_that_starts_badly_is_escalated_before_anything_is_sent():
+    good = "We're open from 9am to 5pm, Monday to Friday, and from 10am to 4pm on Saturdays. " * 2
+    provider = CascadeModelProvider(real_provider=StandInTiers({
+        "gpt-4.1-nano": "I'm not sure, " + "let me think about that for a moment. " * 4,
+        "gpt-4.1-mini": good, "gpt-4.1": good}))
+    streamed, final = stream(provider)
+    assert streamed == final == good
+    assert provider.stats["fast"].escalated_from == 1
+    assert provider.stats["standard"].calls == 1 and provider.stats["standard"].escalated_from == 0
+
+
+def test_a_good_streamed_answer_is_passed_on_whole():
+    long_answer = "We're open from 9am to 5pm on weekdays. " * 10
+    assert len(long_answer) > STREAM_HOLDBACK
+    provider = CascadeModelProvider(real_provider=StandInTiers({
+        "gpt-4.1-nano": long_answer, "gpt-4.1-mini": "unused", "gpt-4.1": "unused"}))
+    streamed, final = stream(provider)
+    assert streamed == final == long_answer
+    assert provider.stats["fast"].escalated_from == 0 and provider.stats["standard"].calls == 0
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from modelCassettes import SCENARIOS, CassetteMiss, run_scenario
+from standInModel import StandInModelProvider
+
+
+@pytest.mark.parametrize("name", ["basic", "handoffs", "streaming", "mcp_weather"])
+def test_record_then_replay_gives_the_same_run(tmp_path, name):
+    async def scenario():
+        recorded = await run_scenario(name, "record", directory=str(tmp_path),
+                                      real_provider=StandInModelProvider(latency=0, seconds_per_token=0))
+        replayed = await run_scenario(name, "replay", directory=str(tmp_path), strict=True, latency_scale=0)
+        return recorded, replayed
+
+    recorded, replayed = asyncio.run(scenario())
+    assert recorded["recorded"] == replayed["replayed"] > 0
+    assert replayed["recorded"] == 0
+    assert replayed["model_calls"] == recorded["model_calls"]
+    assert replayed["final_output"] == recorded["final_output"]
+
+
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_checked_in_cassettes_replay_exactly(name):
+    # Strict: every request must hash to a recorded one, so a change to an agent's prompt, tools or handoffs
+    # that alters what's sent to the model fails here until the cassette is re-recorded
+    stats = asyncio.run(run_scenario(name, "replay", strict=True, latency_scale=0))
+    assert stats["recorded"] == 0 and stats["replayed"] > 0
+
+
+def test_replay_without_a_recording_is_a_miss(tmp_path):
+    with pytest.raises(CassetteMiss):
+        asyncio.run(run_scenario("basic", "replay", directory=str(tmp_path), latency_scale=0))
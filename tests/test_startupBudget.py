@@ -0,0 +1,28 @@
+from startupBudget import own_cost
+
+
+def row(name, depth, self_us, cumulative_us):
+    return {"name": name, "depth": depth, "self": self_us, "cumulative": cumulative_us}
+
+
+def test_own_cost_is_the_module_minus_the_excluded_subtree():
+    # -X importtime order: children before their parent
+    rows = [
+        row("dotenv", 1, 4_000, 4_000),
+        row("openai", 2, 900_000, 900_000),
+        row("agents.voice", 2, 50_000, 50_000),
+        row("agents", 1, 1_000_000, 1_950_000),
+        row("mcp", 1, 30_000, 30_000),
+        row("voiceAgent", 0, 6_000, 1_990_000),
+    ]
+    result = own_cost(rows, "voiceAgent", "agents")
+    assert (result["total"], result["excluded"]) == (1_990_000, 1_950_000)
+    assert [r["name"] for r in result["own_rows"]] == ["dotenv", "mcp", "voiceAgent"]
+    assert sum(r["self"] for r in result["own_rows"]) == result["total"] - result["excluded"]
+    assert "agents.voice" in result["modules"]
+
+
+def test_a_module_that_does_not_import_the_excluded_package_owns_everything():
+    rows = [row("json", 1, 2_000, 2_000), row("handoffs", 0, 1_000, 3_000)]
+    result = own_cost(rows, "handoffs", "agents")
+    assert (result["total"], result["excluded"]) == (3_000, 0)
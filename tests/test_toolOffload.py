@@ -0,0 +1,53 @@
+import asyncio
+import json
+import threading
+
+from agents import RunContextWrapper, function_tool
+from agents.tool_context import ToolContext
+
+from toolOffload import ToolExecutor, offload_tool
+
+
+def lookup_listing(listing_id: int) -> str:
+    """Look up a listing by id."""
+    if listing_id < 0:
+        raise ValueError("no such listing")
+    return f"{listing_id} on {threading.current_thread().name}"
+
+
+def invoke(tool, arguments: dict):
+    context = ToolContext(context=None, tool_name=tool.name, tool_call_id="call_1",
+                          tool_arguments=json.dumps(arguments))
+    return asyncio.run(tool.on_invoke_tool(context, json.dumps(arguments)))
+
+
+def test_offloaded_tool_keeps_its_settings_and_runs_on_the_executor():
+    def failure(context: RunContextWrapper, error: Exception) -> str:
+        return f"Lookup failed: {error}"
+
+    tool = function_tool(lookup_listing, failure_error_function=failure, is_enabled=False, needs_approval=True,
+                         strict_mode=False)
+    executor = ToolExecutor(max_workers=1, name="offload-test")
+    offloaded = offload_tool(tool, executor)
+    try:
+        assert offloaded is not tool
+        assert (offloaded.name, offloaded.description, offloaded.params_json_schema) == \
+               (tool.name, tool.description, tool.params_json_schema)
+        assert (offloaded.is_enabled, offloaded.needs_approval, offloaded.strict_json_schema) == (False, True, False)
+
+        assert invoke(offloaded, {"listing_id": 7}).startswith("7 on offload-test")
+        assert invoke(offloaded, {"listing_id": -1}) == "Lookup failed: no such listing"
+        assert executor.metrics.outcomes.series == {("lookup_listing", "ok"): 1, ("lookup_listing", "error"): 1}
+    finally:
+        executor.shutdown()
+
+
+def test_async_tools_are_left_alone():
+    @function_tool
+    async def ping() -> str:
+        """Ping."""
+        return "pong"
+
+    executor = ToolExecutor(max_workers=1)
+    assert offload_tool(ping, executor) is ping
+    executor.shutdown()
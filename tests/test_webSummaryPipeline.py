@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from webSummaryPipeline import SummaryCache, SummaryPipeline, chunk_text
+
+
+def pipeline_for(tmp_path, sent):
+    async def summarise(agent, text):
+        sent.append(text)
+        return f"summary of {len(text)} characters"
+
+    return SummaryPipeline(summarise=summarise, cache=SummaryCache(str(tmp_path)), max_chunk_tokens=20)
+
+
+@pytest.mark.parametrize("text", ["", "   ", "\n\n \t\n"])
+def test_a_page_with_no_text_has_an_empty_summary_and_no_model_calls(tmp_path, text):
+    sent = []
+    pipeline = pipeline_for(tmp_path, sent)
+    assert asyncio.run(pipeline.summarise_text(text)) == ""
+    assert sent == [] and pipeline.stats["chunks"] == 0
+
+
+def test_blank_lines_never_become_a_chunk_of_their_own(tmp_path):
+    lines = ["word " * 15] + ["   "] * 40 + ["word " * 15]
+    assert all(chunk.strip() for chunk in chunk_text("\n".join(lines), 20))
+
+    sent = []
+    asyncio.run(pipeline_for(tmp_path, sent).summarise_text("\n".join(lines)))
+    assert sent and all(text.strip() for text in sent)
@@ -0,0 +1,248 @@
+import asyncio
+import dataclasses
+import functools
+import inspect
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from agents import Agent, FunctionTool, RunConfig, Runner, function_tool
+from dotenv import load_dotenv
+
+from agentMetrics import LATENCY_BUCKETS, AgentMetrics, Counter, Histogram
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# get_listing_count / get_popular_listing (pymongo) and the FastMCP get_weather (requests) are plain `def`s that
+# block while they wait on the network. Run on the event loop they freeze every other conversation; handed to
+# asyncio.to_thread they share the loop's default executor with everything else, with no timeout and no limit.
+# ToolExecutor gives the blocking tools their own thread pool instead:
+# - a fixed number of threads, so a slow database can't start hundreds of threads
+# - a timeout per tool (the model gets an error back, the thread finishes in the background)
+# - cancelling the run cancels tool calls that haven't started yet
+# - queue depth / wait / run time metrics, and an optional limit on concurrent calls per tool
+# Use it with @function_tool on top of @executor.tool(...), or offload_agent(agent) to re-wrap an existing agent.
+
+
+class ToolTimeout(Exception):
+    pass
+
+
+class OffloadMetrics(AgentMetrics):
+    def __init__(self):
+        super().__init__()
+        self.queue_wait = Histogram("tool_offload_queue_seconds", "Time a tool call waited for a thread",
+                                    ("tool",), LATENCY_BUCKETS)
+        self.run_time = Histogram("tool_offload_run_seconds", "Time a tool call ran in its thread", ("tool",),
+                                  LATENCY_BUCKETS)
+        self.outcomes = Counter("tool_offload_calls_total", "Offloaded tool calls by outcome", ("tool", "outcome"))
+
+    @property
+    def all(self):
+        return [self.queue_wait, self.run_time, self.outcomes]
+
+
+class ToolExecutor:
+    def __init__(self, max_workers: int = 8, default_timeout: Optional[float] = 30, name: str = "tool"):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.metrics = OffloadMetrics()
+        self.queued = 0  # Submitted, waiting for a thread
+        self.running = 0
+        self.max_queued = 0
+        self._lock = threading.Lock()
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+
+    def tool(self, timeout: Optional[float] = None, max_concurrency: Optional[int] = None, name: Optional[str] = None):
+        """Turns a blocking function into an async one that runs on this executor (signature and docstring kept)."""
+        def decorator(func: Callable) -> Callable:
+            return self.wrap(func, timeout, max_concurrency, name)
+        return decorator
+
+    def wrap(self, func: Callable, timeout: Optional[float] = None, max_concurrency: Optional[int] = None,
+             name: Optional[str] = None) -> Callable:
+        tool_name = name or func.__name__
+        timeout = timeout if timeout is not None else self.default_timeout
+        if max_concurrency:
+            self._limits[tool_name] = asyncio.Semaphore(max_concurrency)
+
+        @functools.wraps(func)
+        async def offloaded(*args, **kwargs):
+            limit = self._limits.get(tool_name)
+            if limit is None:
+                return await self._submit(tool_name, func, timeout, args, kwargs)
+            async with limit:
+                return await self._submit(tool_name, func, timeout, args, kwargs)
+
+        return offloaded
+
+    async def _submit(self, tool_name: str, func: Callable, timeout: Optional[float], args, kwargs):
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            self.metrics.queue_wait.observe((tool_name,), started - submitted)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                self.metrics.run_time.observe((tool_name,), time.perf_counter() - started)
+
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self.pool.submit(run)
+        try:
+            # Cancelling (or timing out) the wrapped future also cancels the pool's future if it hasn't started
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._dequeue_if_cancelled(future)
+            self.metrics.outcomes.inc((tool_name, "timeout"))
+            raise ToolTimeout(f"{tool_name} took longer than {timeout}s") from None
+        except asyncio.CancelledError:
+            self._dequeue_if_cancelled(future)
+            self.metrics.outcomes.inc((tool_name, "cancelled"))
+            raise
+        except Exception:
+            self.metrics.outcomes.inc((tool_name, "error"))
+            raise
+        self.metrics.outcomes.inc((tool_name, "ok"))
+        return result
+
+    def _dequeue_if_cancelled(self, future):
+        # run() never started, so it never took itself off the queue
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def prometheus_text(self) -> str:
+        return self.metrics.prometheus_text() + (
+            f"# TYPE tool_offload_queued gauge\ntool_offload_queued {self.queued}\n"
+            f"# TYPE tool_offload_running gauge\ntool_offload_running {self.running}\n"
+            f"# TYPE tool_offload_max_queued gauge\ntool_offload_max_queued {self.max_queued}\n")
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def blocking_function(tool: FunctionTool) -> Optional[Callable]:
+    """The plain `def` behind a @function_tool, or None if it's async (or not a @function_tool at all).
+
+    FunctionTool doesn't keep the function it was built from, so this looks through the invoker's attributes and
+    closures for the first function that isn't part of the SDK.
+    """
+    seen, pending = set(), [tool.on_invoke_tool]
+    while pending:
+        obj = pending.pop(0)
+        if id(obj) in seen or len(seen) > 50:
+            continue
+        seen.add(id(obj))
+        if inspect.isfunction(obj) and not obj.__module__.startswith("agents"):
+            return None if inspect.iscoroutinefunction(obj) else obj
+        if inspect.isfunction(obj):
+            pending.extend(cell.cell_contents for cell in obj.__closure__ or ())
+        if hasattr(obj, "__dict__"):
+            pending.extend(vars(obj).values())
+        pending = [o for o in pending if callable(o) and not isinstance(o, (type, FunctionTool))]
+    return None
+
+
+def offload_tool(tool: FunctionTool, executor: "ToolExecutor", timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None) -> FunctionTool:
+    """The same tool with its blocking function run on the executor.
+
+    Only the invoker is swapped (taken from a @function_tool of the offloaded function), so everything else the
+    tool was built with - failure_error_function, is_enabled, needs_approval, strictness, guardrails - is kept.
+    """
+    func = blocking_function(tool)
+    if func is None:
+        return tool
+    offloaded = function_tool(executor.wrap(func, timeout, max_concurrency, tool.name), name_override=tool.name)
+    return dataclasses.replace(tool, on_invoke_tool=offloaded.on_invoke_tool)
+
+
+def offload_agent(agent: Agent, executor: "ToolExecutor", timeouts: Optional[Dict[str, float]] = None,
+                  limits: Optional[Dict[str, int]] = None, _done: Optional[dict] = None) -> Agent:
+    """A copy of the agent (and the agents it hands off to) with every blocking function tool on the executor."""
+    timeouts, limits, done = timeouts or {}, limits or {}, {} if _done is None else _done
+    if id(agent) in done:
+        return done[id(agent)]
+    copy = done[id(agent)] = agent.clone()
+    copy.tools = [offload_tool(tool, executor, timeouts.get(tool.name), limits.get(tool.name))
+                  if isinstance(tool, FunctionTool) else tool for tool in agent.tools]
+    copy.handoffs = [offload_agent(h, executor, timeouts, limits, done) if isinstance(h, Agent) else h
+                     for h in agent.handoffs]
+    return copy
+
+
+async def main():
+    from appriseMarketplace.appriseMarketAgent import triage_agent
+
+    executor = ToolExecutor(max_workers=4)
+    # Mongo gets 5 seconds and at most 2 aggregations at once
+    agent = offload_agent(triage_agent, executor, timeouts={"get_popular_listing": 5},
+                          limits={"get_popular_listing": 2})
+    result = await Runner.run(agent, "Which listing is the most popular, and how many listings are there?")
+    print(result.final_output)
+    print(executor.prometheus_text())
+    executor.shutdown()
+
+
+def slow_lookup() -> str:
+    """Look up the most popular listing."""
+    time.sleep(0.05)  # Stand-in for a 50ms pymongo aggregation
+    return "Sea View Cottage, 4.9 stars"
+
+
+async def benchmark(conversations: int = 200, concurrency: int = 50):
+    from standInModel import StandInModelProvider
+
+    from handoffs import billing_agent, technical_agent, triage_agent
+
+    # What a blocking call inside an async tool (or an older SDK calling sync tools directly) does
+    async def inline_lookup() -> str:
+        """Look up the most popular listing."""
+        return slow_lookup()
+
+    executor = ToolExecutor(max_workers=16, default_timeout=5)
+    variants = {
+        "on the event loop": function_tool(inline_lookup, name_override="slow_lookup"),
+        "asyncio.to_thread": function_tool(slow_lookup),
+        "ToolExecutor(16)": offload_tool(function_tool(slow_lookup), executor),
+    }
+    run_config = RunConfig(model_provider=StandInModelProvider(latency=0.05, seconds_per_token=0.0005),
+                           tracing_disabled=True)
+    for label, tool in variants.items():
+        agent = triage_agent.clone(handoffs=[billing_agent.clone(tools=[tool]),
+                                             technical_agent.clone(tools=[tool])])
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def conversation(i: int):
+            async with gate:
+                start = time.perf_counter()
+                await Runner.run(agent, f"Billing question {i}: look up the most popular listing",
+                                 run_config=run_config)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(i) for i in range(conversations)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(f"{label:>18}: p50 {latencies[len(latencies) // 2] * 1000:5.0f}ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:5.0f}ms, "
+              f"{conversations / elapsed:5.1f} conversations/s")
+    print(f"ToolExecutor peak queue depth: {executor.max_queued}")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())
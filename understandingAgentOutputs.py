@@ -106,9 +106,14 @@ sample_email = """
 """
 
 
-async def process_email(email_text):
+# Runs the email_extractor agent and returns the validated EmailData (used by process_email and mailboxExtractor.py)
+async def extract_email(email_text) -> EmailData:
     result = await Runner.run(email_extractor, f"Please extract information from this email:\n\n{email_text}")
-    result = result.final_output
+    return result.final_output
+
+
+async def process_email(email_text):
+    result = await extract_email(email_text)
 
     # Formatting the
     print(f"Subject: {result.subject}")
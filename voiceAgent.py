@@ -1,22 +1,21 @@
 import asyncio
 import random
 import time
-import numpy as np
-import sounddevice as sd
 import os
 
 from agents import (
     Agent,
+    RunConfig,
+    Runner,
     function_tool,
 )
-from agents.voice import (
-    AudioInput,
-    SingleAgentVoiceWorkflow,
-    VoicePipeline,
-)
 from agents.extensions.handoff_prompt import prompt_with_handoff_instructions
 from dotenv import load_dotenv
 
+from conversationSessions import SessionStore
+from modelCascade import DEFAULT_TIERS, CascadeModelProvider, ModelTier
+from modelClient import install_shared_client, voice_model_provider
+
 # Loading the .env variables from the .env file
 load_dotenv()
 
@@ -135,10 +134,52 @@ agent = Agent(
     ],
 )
 
+
+# numpy, sounddevice (which opens PortAudio) and agents.voice are only imported once audio is actually used, so
+# importing this module for its agents and tools doesn't pay for them (or need an audio device at all)
+_session_workflow_class = None
+
+
+def _session_voice_workflow():
+    global _session_workflow_class
+    if _session_workflow_class is not None:
+        return _session_workflow_class
+    from agents.voice import VoiceWorkflowBase, VoiceWorkflowHelper
+
+    # Like SingleAgentVoiceWorkflow, but the conversation lives in a session instead of a list in memory:
+    # it survives restarts, and older turns get summarised so each voice turn stays short (and quick)
+    class SessionVoiceWorkflow(VoiceWorkflowBase):
+        def __init__(self, agent, session, run_config=None):
+            self.current_agent = agent
+            self.session = session
+            self.run_config = run_config
+
+        async def run(self, transcription: str):
+            result = Runner.run_streamed(self.current_agent, transcription, session=self.session,
+                                         run_config=self.run_config)
+            async for chunk in VoiceWorkflowHelper.stream_text_from(result):
+                yield chunk
+            # Stay with whichever specialist the conversation was handed to
+            self.current_agent = result.last_agent
+
+    _session_workflow_class = SessionVoiceWorkflow
+    return _session_workflow_class
+
+
+def __getattr__(name):
+    if name == "SessionVoiceWorkflow":
+        return _session_voice_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# gpt-4o-mini stays the middle tier for voice. Voice turns are streamed, so a cheap tier's answer is checked on
+# its first sentence (modelCascade.STREAM_HOLDBACK) before it's spoken, and escalated if that looks wrong
+VOICE_TIERS = [DEFAULT_TIERS[0], ModelTier("standard", "gpt-4o-mini", 0.15, 0.60), DEFAULT_TIERS[2]]
+
 # Define audio parameters
 SAMPLE_RATE = 24000
 CHANNELS = 1
-DTYPE = np.int16
+DTYPE = "int16"  # numpy and sounddevice both accept the name, so defining it doesn't need numpy
 
 # Voice activity detection parameters
 SILENCE_THRESHOLD = 500  # Adjust based on your microphone and environment
@@ -148,6 +189,8 @@ BUFFER_DURATION = 0.5  # Additional buffer time to record after silence
 
 def generate_tone(frequency=440, duration=0.3, volume=0.5):
     """Generate a tone to signal when to speak."""
+    import numpy as np
+
     t = np.linspace(0, duration, int(SAMPLE_RATE * duration), False)
     tone = np.sin(2 * np.pi * frequency * t) * volume
     audio = np.array(tone * 32767, dtype=DTYPE)
@@ -156,6 +199,8 @@ def generate_tone(frequency=440, duration=0.3, volume=0.5):
 
 def play_tone():
     """Play a tone to signal the user to speak."""
+    import sounddevice as sd
+
     tone = generate_tone(frequency=880, duration=0.2)  # Higher frequency, shorter duration
     sd.play(tone, SAMPLE_RATE)
     sd.wait()
@@ -163,6 +208,9 @@ def play_tone():
 
 async def record_until_silence():
     """Record audio until silence is detected."""
+    import numpy as np
+    import sounddevice as sd
+
     print("Listening... Speak now (will stop after silence)")
 
     # Play tone to signal user to speak
@@ -229,6 +277,8 @@ async def record_until_silence():
 
 async def play_audio_stream(result):
     """Play the response audio stream."""
+    import sounddevice as sd
+
     # Create an audio player
     player = sd.OutputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype=DTYPE)
     player.start()
@@ -245,6 +295,11 @@ async def play_audio_stream(result):
 
 
 async def main():
+    from agents.voice import AudioInput, VoicePipeline, VoicePipelineConfig
+
+    # The agent and the speech-to-text / text-to-speech models all share one pooled HTTP client
+    install_shared_client()
+
     # Clear screen for better user experience
     os.system('cls' if os.name == 'nt' else 'clear')
 
@@ -256,9 +311,13 @@ async def main():
     print("Ask about listings, bookings, hosting, or technical support")
     print("=" * 60)
 
-    # Create the voice pipeline with the workflow
+    # Create the voice pipeline with the workflow (one session per caller, "voice-local" for this terminal)
+    store = SessionStore()
     pipeline = VoicePipeline(
-        workflow=SingleAgentVoiceWorkflow(agent)
+        # Simple questions get a faster model than gpt-4o-mini (see modelCascade.py)
+        workflow=_session_voice_workflow()(agent, store.session("voice-local"),
+                                      RunConfig(model_provider=CascadeModelProvider(tiers=VOICE_TIERS))),
+        config=VoicePipelineConfig(model_provider=voice_model_provider()),
     )
 
     print("Apprise Assistant is ready to help you.")
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from agents import Agent, Runner
+from dotenv import load_dotenv
+
+# Loading the .env variables from the .env file
+load_dotenv()
+
+# MCPAgentWithOpenAISDKTutorial.handle_request asks the agent to fetch docs.replit.com/updates through
+# mcp-server-fetch and summarise it -> the whole page ends up in one context window.
+# This pipeline does the heavy lifting locally instead:
+# 1. fetch with conditional requests (ETag / Last-Modified), so an unchanged page isn't downloaded again
+# 2. extract the readable text locally (no scripts, styles, nav bars...)
+# 3. split the text into token-bounded chunks
+# 4. summarise the chunks concurrently (map), then combine the chunk summaries (reduce)
+# 5. cache chunk summaries by content hash, so only chunks that changed are summarised again
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".summary_cache")
+
+# tiktoken is optional -> fall back to ~4 characters per token
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except ImportError:
+    def count_tokens(text: str) -> int:
+        return len(text) // 4
+
+
+# Elements that never contain readable content
+SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "svg", "form", "iframe"}
+# Elements that should start a new line in the extracted text
+BLOCK_TAGS = {"p", "div", "section", "article", "li", "ul", "ol", "br", "tr", "table", "main",
+              "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in ("h1", "h2", "h3") and not self._skip_depth:
+            self.parts.append("#" * int(tag[1]) + " ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def extract_text(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html)
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def chunk_text(text: str, max_tokens: int = 1500) -> List[str]:
+    """Greedily pack lines into chunks of at most max_tokens (a single over-long line is split by words)."""
+    chunks, current, current_tokens = [], [], 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line)
+        if line_tokens > max_tokens:
+            words = line.split()
+            step = max(1, len(words) * max_tokens // line_tokens)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [line]
+        for piece in pieces:
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    # A run of blank lines can make a chunk of nothing but whitespace -> not worth a model call
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SummaryCache:
+    """Page validators (ETag / Last-Modified) and chunk summaries, saved as JSON in CACHE_DIR."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.path = os.path.join(cache_dir, "cache.json")
+        self.pages: Dict[str, dict] = {}
+        self.chunks: Dict[str, str] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.pages, self.chunks = data.get("pages", {}), data.get("chunks", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"pages": self.pages, "chunks": self.chunks}, f)
+
+
+chunk_agent = Agent(
+    name="Chunk Summariser",
+    model="gpt-4.1-mini",
+    instructions="""Summarise this section of a web page as a short bullet list of the key facts.
+    Only include information that is in the text.""",
+)
+
+reduce_agent = Agent(
+    name="Summary Combiner",
+    model="gpt-4.1-mini",
+    instructions="""You are given bullet-point summaries of consecutive sections of one web page.
+    Combine them into a single concise summary, removing repetition and keeping the most important updates.""",
+)
+
+
+async def summarise_with_agent(agent: Agent, text: str) -> str:
+    result = await Runner.run(agent, text)
+    return result.final_output
+
+
+# (agent, text) -> summary. Swappable so the pipeline can be benchmarked with a stand-in model
+Summariser = Callable[[Agent, str], Awaitable[str]]
+
+
+class SummaryPipeline:
+    def __init__(self, summarise: Summariser = summarise_with_agent, cache: Optional[SummaryCache] = None,
+                 max_chunk_tokens: int = 1500, concurrency: int = 8, client: Optional[httpx.AsyncClient] = None):
+        self.summarise = summarise
+        self.cache = cache or SummaryCache()
+        self.max_chunk_tokens = max_chunk_tokens
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = client
+        self.stats = {"fetched": 0, "not_modified": 0, "chunks": 0, "chunk_cache_hits": 0, "model_calls": 0}
+
+    async def fetch(self, url: str) -> str:
+        """GET the page, sending the cached validators so an unchanged page comes back as a 304."""
+        cached = self.cache.pages.get(url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        client = self.client or httpx.AsyncClient(follow_redirects=True, timeout=20)
+        try:
+            response = await client.get(url, headers=headers)
+        finally:
+            if self.client is None:
+                await client.aclose()
+
+        if response.status_code == 304 and "text" in cached:
+            self.stats["not_modified"] += 1
+            return cached["text"]
+
+        response.raise_for_status()
+        self.stats["fetched"] += 1
+        text = extract_text(response.text)
+        self.cache.pages[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "text": text,
+        }
+        return text
+
+    async def _summarise_chunk(self, chunk: str) -> str:
+        key = content_hash(chunk)
+        if key in self.cache.chunks:
+            self.stats["chunk_cache_hits"] += 1
+            return self.cache.chunks[key]
+        async with self.semaphore:
+            self.stats["model_calls"] += 1
+            summary = await self.summarise(chunk_agent, chunk)
+        self.cache.chunks[key] = summary
+        return summary
+
+    async def _reduce(self, summaries: List[str]) -> str:
+        if not summaries:
+            return ""
+        if len(summaries) == 1:
+            return summaries[0]
+        # If the chunk summaries are still too big for one call, reduce them in groups first
+        groups = chunk_text("\n\n".join(summaries), self.max_chunk_tokens * 2)
+        if len(groups) > 1:
+            summaries = await asyncio.gather(*(self._summarise_chunk(group) for group in groups))
+            return await self._reduce(list(summaries))
+        key = content_hash("reduce:" + groups[0])
+        if key not in self.cache.chunks:
+            self.stats["model_calls"] += 1
+            self.cache.chunks[key] = await self.summarise(reduce_agent, groups[0])
+        else:
+            self.stats["chunk_cache_hits"] += 1
+        return self.cache.chunks[key]
+
+    async def summarise_text(self, text: str) -> str:
+        """Summarise the text; a page with no text (empty or only whitespace) has an empty summary."""
+        chunks = chunk_text(text.strip(), self.max_chunk_tokens)
+        if not chunks:
+            return ""
+        self.stats["chunks"] += len(chunks)
+        summaries = await asyncio.gather(*(self._summarise_chunk(chunk) for chunk in chunks))
+        summary = await self._reduce(list(summaries))
+        self.cache.save()
+        return summary
+
+    async def summarise_url(self, url: str) -> dict:
+        text = await self.fetch(url)
+        fetched_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return {"url": url, "fetched_at": fetched_at, "summary": await self.summarise_text(text)}
+
+
+# Stand-in model for the benchmark: a fixed overhead plus latency that grows with the size of the text
+async def stand_in_summarise(agent: Agent, text: str) -> str:
+    await asyncio.sleep(0.3 + count_tokens(text) / 4_000)
+    return "\n".join(f"- {line}" for line in text.splitlines()[:3])
+
+
+async def benchmark(fixture_dir: str = os.path.join("fixtures", "html")):
+    import tempfile
+
+    for name in sorted(os.listdir(fixture_dir)):
+        with open(os.path.join(fixture_dir, name)) as f:
+            html = f.read()
+        print(f"=== {name}: {count_tokens(html)} tokens of HTML ===")
+
+        start = time.perf_counter()
+        await stand_in_summarise(chunk_agent, html)
+        print(f"Whole page in one call:    {time.perf_counter() - start:.2f}s, {count_tokens(html)} prompt tokens")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            pipeline = SummaryPipeline(summarise=stand_in_summarise, cache=SummaryCache(cache_dir),
+                                       max_chunk_tokens=800)
+            text = extract_text(html)
+            start = time.perf_counter()
+            await pipeline.summarise_text(text)
+            print(f"Map-reduce (cold cache):   {time.perf_counter() - start:.2f}s, {count_tokens(text)} text tokens, "
+                  f"{pipeline.stats['chunks']} chunks, {pipeline.stats['model_calls']} model calls")
+
+            # Change one line near the end of the page -> only that chunk (and the reduce) is summarised again
+            lines = text.splitlines()
+            lines[-2] = lines[-2] + " (updated)"
+            pipeline.stats.update(chunks=0, model_calls=0, chunk_cache_hits=0)
+            start = time.perf_counter()
+            await pipeline.summarise_text("\n".join(lines))
+            print(f"Map-reduce (one change):   {time.perf_counter() - start:.2f}s, "
+                  f"{pipeline.stats['model_calls']} model calls, {pipeline.stats['chunk_cache_hits']} cache hits")
+
+
+async def main():
+    pipeline = SummaryPipeline()
+    result = await pipeline.summarise_url("https://docs.replit.com/updates")
+    print(result["summary"])
+    print(f"\nFetched at {result['fetched_at']} ({pipeline.stats})")
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(benchmark() if "--benchmark" in sys.argv else main())